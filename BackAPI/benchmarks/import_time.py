@@ -0,0 +1,102 @@
+"""
+Informe del tiempo de arranque: importaciones y primera resolución.
+
+Para cada modo se lanza un intérprete nuevo que importa la aplicación (`main`, sin
+iniciar el servidor) y resuelve un caso típico (h por convección y el espesor óptimo de
+una tubería). Se informa:
+- El tiempo de importación de la aplicación y el de la primera resolución.
+- Si SymPy llegó a importarse.
+- Los paquetes con mayor tiempo de importación acumulado (`python -X importtime`).
+
+Modos:
+- kernels: con los kernels pregenerados (`python -m services.kernel_codegen`).
+- sympy: CALC_KERNELS=0, las ecuaciones se compilan con SymPy en la primera resolución.
+
+Uso:
+    python BackAPI/benchmarks/import_time.py [--top 10] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+KERNELS_PATH = os.path.join(SRC_DIR, 'services', 'equation_kernels.py')
+
+# Se ejecuta en el intérprete nuevo; imprime una línea JSON con las mediciones
+PROBE = r'''
+import contextlib, io, json, sys, time
+started = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    import main
+imported = time.perf_counter()
+from services.calculator import calculate_convection_coefficient, solve_equation
+h = calculate_convection_coefficient({'Te': 35.0, 'Ta': 20.0, 'H': 0.1, 'v': 2.0}, 'exterior', 'horizontal')
+solve_equation('optimo_economico_cilindro', {
+    'Ti': 180.0, 'Ta': 20.0, 'k': 0.045, 'C': 350.0, 'w': 0.08, 'beta': 8000.0,
+    'vida_util': 10.0, 'eta': 0.85, 'diametro': 0.1, 'h': h}, 'e')
+solved = time.perf_counter()
+print(json.dumps({'import_ms': (imported - started) * 1e3, 'first_solve_ms': (solved - imported) * 1e3,
+                  'sympy': 'sympy' in sys.modules}))
+'''
+
+MODES = {
+    'kernels': {'CALC_KERNELS': '1'},
+    'sympy': {'CALC_KERNELS': '0'},
+}
+
+
+def run_probe(env_overrides: dict) -> tuple:
+    """
+    Ejecuta la sonda en un intérprete nuevo.
+
+    Returns:
+        tuple[dict, list]: Mediciones de la sonda y líneas de `-X importtime`.
+    """
+    env = dict(os.environ, LOG_LEVEL='WARNING', **env_overrides)
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', PROBE], cwd=SRC_DIR, env=env,
+                               capture_output=True, text=True, check=True)
+    measures = json.loads(completed.stdout.strip().splitlines()[-1])
+    return measures, completed.stderr.splitlines()
+
+
+def top_imports(lines: list, top: int) -> list:
+    """
+    Paquetes con mayor tiempo de importación (ms).
+
+    El tiempo de cada paquete es el acumulado de su importación más externa, que
+    incluye la de sus submódulos y dependencias.
+    """
+    totals = {}
+    for line in lines:
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        root = name.strip().split('.')[0]
+        totals[root] = max(totals.get(root, 0.0), int(cumulative) / 1e3)
+    return sorted(totals.items(), key=lambda item: -item[1])[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--top', type=int, default=10, help='Módulos a mostrar por modo.')
+    parser.add_argument('--repeat', type=int, default=3, help='Ejecuciones por modo (se informa la mediana).')
+    args = parser.parse_args()
+
+    if not os.path.exists(KERNELS_PATH):
+        print("Aviso: no hay kernels pregenerados; ejecuta `python -m services.kernel_codegen` en BackAPI/src.")
+    for mode, env in MODES.items():
+        runs = [run_probe(env) for _ in range(args.repeat)]
+        runs.sort(key=lambda run: run[0]['import_ms'] + run[0]['first_solve_ms'])
+        measures, lines = runs[len(runs) // 2]
+        print(f"\n[{mode}] importación: {measures['import_ms']:.0f} ms, "
+              f"primera resolución: {measures['first_solve_ms']:.0f} ms, "
+              f"total: {measures['import_ms'] + measures['first_solve_ms']:.0f} ms, "
+              f"SymPy importado: {'sí' if measures['sympy'] else 'no'}")
+        for name, ms in top_imports(lines, args.top):
+            print(f"    {name:<28} {ms:>8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Prueba de carga local: servidor de Flask frente a gunicorn con varios procesos.
+
+Para cada modo de servidor se arranca `main.py` en un subproceso (APP_SERVER=flask o
+APP_SERVER=gunicorn), se espera a que responda y se envían solicitudes concurrentes
+a `/plot_espesor` (barridos de 200 puntos) o a `/solve_equation` (cada solicitud con un
+valor distinto de 'Ti', para que no la sirva la caché de resultados). Se informa la
+latencia de la primera solicitud, el rendimiento (solicitudes por segundo) y los
+percentiles de latencia.
+
+Uso:
+    python BackAPI/benchmarks/load_test.py [--modes flask,gunicorn] [--workers 4]
+                                           [--concurrency 8] [--requests 400]
+                                           [--route plot_espesor|solve_equation]
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+MAIN_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'main.py'))
+HOST = '127.0.0.1'
+
+KNOWN_VALUES = {
+    'Ta': 20.0, 'Te': 35.0, 'k': 0.045, 'C': 350.0, 'w': 0.08, 'beta': 8000.0,
+    'vida_util': 10.0, 'eta': 0.85, 'diametro': 0.1, 'H': 0.1, 'v': 2.0,
+}
+
+
+def payload(route: str, i: int) -> dict:
+    """Cuerpo de la solicitud número `i` para la ruta indicada."""
+    if route == 'plot_espesor':
+        return {
+            'equation_key': 'optimo_economico_cilindro', 'variable': 'Ti', 'known_values': KNOWN_VALUES,
+            'flow_type': 'exterior', 'orientation': 'horizontal',
+            'min_val': 50 + i % 50, 'max_val': 249 + i % 50, 'step_val': 1,
+        }
+    return {
+        'equation_key': 'optimo_economico_cilindro', 'variable_to_solve': 'e',
+        'known_values': {**KNOWN_VALUES, 'Ti': 100.0 + i * 0.01},
+        'flow_type': 'exterior', 'orientation': 'horizontal',
+    }
+
+
+def post(port: int, route: str, body: dict) -> float:
+    """Envía una solicitud POST y devuelve su latencia en segundos."""
+    started = time.perf_counter()
+    connection = http.client.HTTPConnection(HOST, port, timeout=120)
+    try:
+        connection.request('POST', f'/{route}', json.dumps(body), {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"/{route} devolvió {response.status}")
+    finally:
+        connection.close()
+    return time.perf_counter() - started
+
+
+def start_server(mode: str, port: int, workers: int) -> subprocess.Popen:
+    """Arranca `main.py` en el modo indicado y espera a que acepte conexiones."""
+    env = dict(os.environ, APP_SERVER=mode, APP_HOST=HOST, APP_PORT=str(port),
+               APP_WORKERS=str(workers), FLASK_ENV='production', LOG_LEVEL='WARNING')
+    process = subprocess.Popen([sys.executable, MAIN_PATH], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"El servidor '{mode}' terminó con código {process.returncode}.")
+        try:
+            connection = http.client.HTTPConnection(HOST, port, timeout=1)
+            connection.request('GET', '/variables_leyenda')
+            connection.getresponse().read()
+            connection.close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"El servidor '{mode}' no respondió en 60 s.")
+
+
+def run_load(mode: str, port: int, workers: int, route: str, concurrency: int, requests: int) -> dict:
+    """Mide un modo de servidor y devuelve sus estadísticas."""
+    process = start_server(mode, port, workers)
+    try:
+        first = post(port, route, payload(route, 0))
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = np.array(list(pool.map(lambda i: post(port, route, payload(route, i)),
+                                               range(1, requests + 1))))
+        elapsed = time.perf_counter() - started
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return {
+        'first_ms': first * 1e3,
+        'throughput': requests / elapsed,
+        'p50_ms': float(np.percentile(latencies, 50)) * 1e3,
+        'p99_ms': float(np.percentile(latencies, 99)) * 1e3,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--modes', default='flask,gunicorn', help='Modos de servidor separados por comas.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Procesos de gunicorn (por defecto, el número de CPU).')
+    parser.add_argument('--concurrency', type=int, default=8, help='Clientes concurrentes.')
+    parser.add_argument('--requests', type=int, default=400, help='Solicitudes por modo.')
+    parser.add_argument('--route', choices=('plot_espesor', 'solve_equation'), default='plot_espesor')
+    parser.add_argument('--port', type=int, default=5099, help='Puerto de los servidores de prueba.')
+    args = parser.parse_args()
+
+    print(f"CPU: {os.cpu_count()}, ruta: /{args.route}, clientes: {args.concurrency}, solicitudes: {args.requests}")
+    print(f"{'modo':<22} {'1ª sol. ms':>11} {'sol/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    baseline = None
+    for mode in args.modes.split(','):
+        stats = run_load(mode, args.port, args.workers, args.route, args.concurrency, args.requests)
+        label = f"{mode} ({args.workers} proc.)" if mode == 'gunicorn' else mode
+        speedup = f"  x{stats['throughput'] / baseline:.2f}" if baseline else ''
+        baseline = baseline or stats['throughput']
+        print(f"{label:<22} {stats['first_ms']:>11.1f} {stats['throughput']:>9.1f} "
+              f"{stats['p50_ms']:>9.1f} {stats['p99_ms']:>9.1f}{speedup}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Mide la aceleración del pool de procesos al resolver un lote grande.
+
+Resuelve un lote de casos de `optimo_economico_cilindro` (con cálculo automático de 'h')
+primero en un solo proceso y luego con cada número de procesos indicado, comprueba que
+los resultados sean idénticos e imprime el tiempo y la aceleración de cada configuración.
+
+Uso:
+    python BackAPI/benchmarks/parallel_speedup.py [--cases 100000] [--workers 2 4 8]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from services import parallel  # noqa: E402
+from services.batch import solve_columns  # noqa: E402
+from services.equation_registry import warm_registry  # noqa: E402
+
+
+def build_columns(size: int, seed: int = 0) -> dict:
+    """Genera columnas aleatorias de tramos de tubería."""
+    rng = np.random.default_rng(seed)
+    return {
+        'Ti': rng.uniform(80, 450, size),
+        'Ta': 25.0,
+        'Te': rng.uniform(35, 50, size),
+        'k': rng.uniform(0.03, 0.08, size),
+        'C': rng.uniform(150, 600, size),
+        'w': 0.05,
+        'beta': 8000,
+        'vida_util': 10,
+        'eta': 0.8,
+        'diametro': rng.uniform(0.02, 0.6, size),
+        'v': rng.uniform(0.5, 5, size),
+    }
+
+
+def run(columns: dict, size: int, workers: int, repeat: int):
+    """Resuelve el lote `repeat` veces con `workers` procesos; devuelve el mejor tiempo y el resultado."""
+    os.environ['CALC_WORKERS'] = str(workers)
+    parallel.shutdown_executor()
+    if workers > 1:
+        # Arranque del pool fuera de la medición (los procesos precompilan el registro)
+        list(parallel.map_chunks(warm_registry, [()] * workers))
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = solve_columns('optimo_economico_cilindro', 'e', dict(columns), size,
+                               'exterior', 'horizontal')
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--cases', type=int, default=100000, help='Número de casos del lote.')
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4, os.cpu_count() or 1],
+                        help='Números de procesos a medir.')
+    parser.add_argument('--repeat', type=int, default=3, help='Repeticiones por configuración.')
+    args = parser.parse_args()
+
+    os.environ['CALC_PARALLEL_MIN_POINTS'] = '1'
+    warm_registry()
+    columns = build_columns(args.cases)
+
+    serial_time, serial_result = run(columns, args.cases, 0, args.repeat)
+    print(f"CPUs disponibles: {os.cpu_count()}  casos: {args.cases}")
+    print(f"{'procesos':>8}  {'tiempo (s)':>10}  {'casos/s':>10}  {'aceleración':>11}")
+    print(f"{1:>8}  {serial_time:>10.3f}  {args.cases / serial_time:>10.0f}  {1.0:>11.2f}")
+    for workers in sorted(set(w for w in args.workers if w > 1)):
+        elapsed, result = run(columns, args.cases, workers, args.repeat)
+        identical = (np.array_equal(serial_result['result'], result['result'], equal_nan=True)
+                     and serial_result['errors'] == result['errors'])
+        print(f"{workers:>8}  {elapsed:>10.3f}  {args.cases / elapsed:>10.0f}  {serial_time / elapsed:>11.2f}"
+              + ('' if identical else '  (¡resultados distintos!)'))
+    parallel.shutdown_executor()
+
+
+if __name__ == '__main__':
+    main()
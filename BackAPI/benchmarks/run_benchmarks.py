@@ -0,0 +1,313 @@
+"""
+Suite de benchmarks del servicio de cálculo y de las rutas de la API.
+
+Cubre todas las ecuaciones de `EQUATIONS` y todas las geometrías
+(plano/cilindro/esfera × interior/exterior × vertical/horizontal):
+- single/<clave>: Latencia de `solve_equation` con el registro compilado y sin resultado en caché.
+- cold/<clave>: Primera resolución con el registro y la caché vacíos (incluye la compilación).
+- cached/<clave>: Resolución repetida, servida por la caché de resultados.
+- convection/<flujo>_<orientación>/<régimen>: `calculate_convection_coefficient`.
+- restrictions/<clave>: `check_restrictions` con las restricciones de cada correlación.
+- sweep/<geometría>/<flujo>_<orientación>: Ruta `/plot_espesor` con 500 puntos.
+- sweep_cold/<geometría>: La misma ruta con el registro vacío.
+- batch/<geometría>/<flujo>_<orientación>: `solve_columns` con 10000 casos.
+
+Los resultados (en milisegundos, con percentiles) se guardan en JSON. Con `--compare`
+se comparan contra un archivo anterior y se señalan las regresiones; el proceso termina
+con código 1 si alguna supera el umbral.
+
+Uso:
+    python BackAPI/benchmarks/run_benchmarks.py [--output resultados.json] [--quick]
+    python BackAPI/benchmarks/run_benchmarks.py --compare base.json [--threshold 0.2]
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from flask import Flask  # noqa: E402
+
+from api.calculations import calculations_bp  # noqa: E402
+from services.batch import solve_columns  # noqa: E402
+from services.calculator import calculate_convection_coefficient, check_restrictions, solve_equation  # noqa: E402
+from services.equation_registry import clear_registry, warm_registry  # noqa: E402
+from services.equations import EQUATIONS  # noqa: E402
+from services.result_cache import get_result_cache  # noqa: E402
+
+GEOMETRIES = {
+    'plano': 'optimo_economico_plano',
+    'cilindro': 'optimo_economico_cilindro',
+    'esfera': 'optimo_economico_esfera',
+}
+FLOW_TYPES = ('interior', 'exterior')
+ORIENTATIONS = ('vertical', 'horizontal')
+
+# Caso de referencia (tubería de vapor típica)
+BASE_VALUES = {
+    'Ti': 180.0, 'Ta': 20.0, 'Te': 35.0, 'k': 0.045, 'C': 350.0, 'w': 0.08,
+    'beta': 8000.0, 'vida_util': 10.0, 'eta': 0.85, 'diametro': 0.1, 'H': 0.1,
+    'v': 2.0, 'h': 12.0, 'e': 0.05, 'e_c': 0.004, 'r_c': 0.004,
+}
+# Valores de entrada para forzar cada régimen de convección
+REGIME_INPUTS = {
+    'laminar': {'Te': 35.0, 'Ta': 20.0, 'H': 0.1, 'v': 2.0},
+    'turbulento': {'Te': 60.0, 'Ta': 20.0, 'H': 3.0, 'v': 5.0},
+}
+
+SWEEP_POINTS = 500
+BATCH_CASES = 10000
+
+# Diferencia absoluta mínima (ms) para considerar una regresión; evita ruido en
+# benchmarks de microsegundos
+MIN_REGRESSION_MS = 0.05
+
+
+def unknown_for(equation_key: str) -> str:
+    """Incógnita con que se mide cada ecuación del catálogo."""
+    if equation_key.startswith('optimo_economico'):
+        return 'e'
+    if equation_key.startswith('conv_'):
+        return 'h'
+    return 'e_c' if equation_key == 'espesor_critico_plano' else 'r_c'
+
+
+def summarize(samples: list) -> dict:
+    """Resume una lista de tiempos (segundos) en milisegundos con percentiles."""
+    values = np.asarray(samples) * 1e3
+    return {
+        'n': int(values.size),
+        'mean': float(values.mean()),
+        'min': float(values.min()),
+        'p50': float(np.percentile(values, 50)),
+        'p90': float(np.percentile(values, 90)),
+        'p99': float(np.percentile(values, 99)),
+        'max': float(values.max()),
+    }
+
+
+def timed(func, repeat: int, setup=None) -> list:
+    """Ejecuta `func` `repeat` veces (llamando antes a `setup`, fuera de la medición)."""
+    samples = []
+    for i in range(repeat):
+        if setup is not None:
+            setup(i)
+        start = time.perf_counter()
+        func(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def equation_values(i: int) -> dict:
+    """Valores de entrada ligeramente distintos en cada repetición (evitan la caché)."""
+    return dict(BASE_VALUES, Ti=BASE_VALUES['Ti'] + 0.01 * i)
+
+
+def bench_equations(repeat: int) -> dict:
+    """Latencia de `solve_equation` en frío, con registro compilado y desde la caché."""
+    results = {}
+    cache = get_result_cache()
+    for key, eq in EQUATIONS.items():
+        equation = eq['latex'] if isinstance(eq, dict) else eq
+        variable = unknown_for(key)
+
+        def solve(i, equation=equation, variable=variable):
+            solve_equation(equation, equation_values(i), variable)
+
+        def reset(_):
+            clear_registry()
+            cache.clear()
+
+        results[f'cold/{key}'] = timed(solve, max(repeat // 10, 3), setup=reset)
+        warm_registry()
+        results[f'single/{key}'] = timed(solve, repeat, setup=lambda _: cache.clear())
+        solve(0)
+        results[f'cached/{key}'] = timed(lambda i: solve(0), repeat)
+    return results
+
+
+def bench_convection(repeat: int) -> dict:
+    """Latencia de `calculate_convection_coefficient` y `check_restrictions`."""
+    results = {}
+    cache = get_result_cache()
+    for flow_type in FLOW_TYPES:
+        for orientation in ORIENTATIONS:
+            for regime, inputs in REGIME_INPUTS.items():
+                def compute(i, inputs=inputs, flow_type=flow_type, orientation=orientation):
+                    calculate_convection_coefficient(dict(inputs, Te=inputs['Te'] + 0.01 * i),
+                                                     flow_type, orientation)
+                results[f'convection/{flow_type}_{orientation}/{regime}'] = timed(
+                    compute, repeat, setup=lambda _: cache.clear())
+    for key, eq in EQUATIONS.items():
+        if isinstance(eq, dict):
+            restrictions = eq['restricciones']
+            results[f'restrictions/{key}'] = timed(
+                lambda i, restrictions=restrictions: check_restrictions(restrictions, REGIME_INPUTS['laminar']),
+                repeat)
+    return results
+
+
+def bench_sweeps(repeat: int) -> dict:
+    """Latencia de la ruta `/plot_espesor` con 500 puntos (incluye la serialización JSON)."""
+    app = Flask(__name__)
+    app.register_blueprint(calculations_bp)
+    client = app.test_client()
+    results = {}
+
+    def body(equation_key, flow_type, orientation):
+        known_values = {k: v for k, v in BASE_VALUES.items() if k not in ('h', 'e', 'e_c', 'r_c', 'Ti')}
+        return {
+            'equation_key': equation_key, 'variable': 'Ti', 'known_values': known_values,
+            'flow_type': flow_type, 'orientation': orientation,
+            'min_val': 50, 'max_val': 50 + SWEEP_POINTS - 1, 'step_val': 1,
+        }
+
+    def post(payload):
+        response = client.post('/plot_espesor', json=payload)
+        if response.status_code != 200:
+            raise RuntimeError(f"/plot_espesor devolvió {response.status_code}: {response.get_data(as_text=True)}")
+
+    for geometry, equation_key in GEOMETRIES.items():
+        payload = body(equation_key, 'exterior', 'horizontal')
+        results[f'sweep_cold/{geometry}'] = timed(lambda i: post(payload), max(repeat // 10, 3),
+                                                  setup=lambda _: clear_registry())
+        warm_registry()
+        for flow_type in FLOW_TYPES:
+            for orientation in ORIENTATIONS:
+                payload = body(equation_key, flow_type, orientation)
+                results[f'sweep/{geometry}/{flow_type}_{orientation}'] = timed(lambda i: post(payload), repeat)
+    return results
+
+
+def bench_batches(repeat: int) -> dict:
+    """Latencia de `solve_columns` con 10000 casos aleatorios (semilla fija)."""
+    rng = np.random.default_rng(0)
+    columns = {
+        'Ti': rng.uniform(80, 450, BATCH_CASES),
+        'Ta': rng.uniform(0, 35, BATCH_CASES),
+        'k': rng.uniform(0.03, 0.08, BATCH_CASES),
+        'C': rng.uniform(150, 600, BATCH_CASES),
+        'w': 0.08, 'beta': 8000.0, 'vida_util': 10.0, 'eta': 0.85,
+        'diametro': rng.uniform(0.02, 0.6, BATCH_CASES),
+        'v': rng.uniform(0.5, 5, BATCH_CASES),
+    }
+    columns['Te'] = columns['Ta'] + rng.uniform(5, 40, BATCH_CASES)
+    columns['H'] = columns['diametro']
+    warm_registry()
+    results = {}
+    for geometry, equation_key in GEOMETRIES.items():
+        for flow_type in FLOW_TYPES:
+            for orientation in ORIENTATIONS:
+                results[f'batch/{geometry}/{flow_type}_{orientation}'] = timed(
+                    lambda i, key=equation_key, ft=flow_type, ori=orientation:
+                        solve_columns(key, 'e', dict(columns), BATCH_CASES, ft, ori),
+                    repeat)
+    return results
+
+
+def environment() -> dict:
+    """Descripción del entorno en que se ejecutaron los benchmarks."""
+    import sympy
+    try:
+        import scipy
+    except ImportError:
+        # El servicio no usa SciPy; solo se registra su versión si está instalada
+        scipy = None
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SRC_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__ if scipy is not None else None,
+        'sympy': sympy.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """
+    Compara los p50 de dos ejecuciones.
+
+    Returns:
+        list[tuple]: (nombre, p50 base, p50 actual, cociente, es_regresión) por benchmark común.
+    """
+    rows = []
+    for name, summary in sorted(current['results'].items()):
+        base = baseline.get('results', {}).get(name)
+        if base is None:
+            continue
+        ratio = summary['p50'] / base['p50'] if base['p50'] > 0 else float('inf')
+        regression = ratio > 1 + threshold and summary['p50'] - base['p50'] > MIN_REGRESSION_MS
+        rows.append((name, base['p50'], summary['p50'], ratio, regression))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--output', default='benchmark_results.json', help='Archivo JSON de resultados.')
+    parser.add_argument('--repeat', type=int, default=50, help='Repeticiones de los benchmarks de latencia.')
+    parser.add_argument('--quick', action='store_true', help='Menos repeticiones (comprobación rápida).')
+    parser.add_argument('--filter', default='', help='Solo grupos cuyo nombre contenga este texto '
+                                                    '(equations, convection, sweeps, batches).')
+    parser.add_argument('--compare', help='Archivo JSON de referencia contra el que comparar.')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Aumento relativo del p50 que se considera regresión (por defecto 0.2 = 20%%).')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    repeat = 10 if args.quick else args.repeat
+    groups = {
+        'equations': lambda: bench_equations(repeat),
+        'convection': lambda: bench_convection(repeat),
+        'sweeps': lambda: bench_sweeps(max(repeat // 5, 3)),
+        'batches': lambda: bench_batches(max(repeat // 10, 3)),
+    }
+    results = {}
+    for group, run in groups.items():
+        if args.filter and args.filter not in group:
+            continue
+        start = time.perf_counter()
+        results.update({name: summarize(samples) for name, samples in run().items()})
+        print(f"{group}: {time.perf_counter() - start:.1f} s", file=sys.stderr)
+
+    current = {'environment': environment(), 'results': results}
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(current, f, indent=2)
+
+    print(f"{'benchmark':<58} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10}")
+    for name, summary in sorted(results.items()):
+        print(f"{name:<58} {summary['p50']:>10.3f} {summary['p90']:>10.3f} {summary['p99']:>10.3f}")
+    print(f"\nResultados guardados en {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        rows = compare(current, baseline, args.threshold)
+        print(f"\n{'benchmark':<58} {'base p50':>10} {'p50':>10} {'cociente':>9}")
+        for name, base_p50, p50, ratio, regression in rows:
+            print(f"{name:<58} {base_p50:>10.3f} {p50:>10.3f} {ratio:>9.2f}" + ('  REGRESIÓN' if regression else ''))
+        regressions = [row for row in rows if row[4]]
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) más de un {args.threshold:.0%} más lentos que la referencia.")
+            sys.exit(1)
+        print("\nSin regresiones respecto a la referencia.")
+
+
+if __name__ == '__main__':
+    main()
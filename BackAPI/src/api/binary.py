@@ -0,0 +1,63 @@
+"""
+Respuestas binarias columnares para los resultados numéricos grandes.
+
+Las rutas de barridos, mallas y lotes responden en JSON por defecto. Con la cabecera
+`Accept` se puede pedir, en su lugar, uno de los formatos de `services.columnar`:
+- `application/vnd.calc-columns`: arreglos float64/int64 little-endian con una cabecera
+  JSON y mapas de validez (sin dependencias; se lee sin copiar).
+- `application/x-npy`: arreglo estructurado de NumPy, con NaN donde no hay valor.
+- `application/vnd.apache.arrow.stream`: Apache Arrow IPC (solo si `pyarrow` está instalado).
+
+Funciones principales:
+- negotiate_binary: Formato binario pedido en la cabecera `Accept`, o None.
+- nullable_column: Columna float con validez según NaN.
+- binary_response: Codifica columnas y metadatos en una respuesta.
+"""
+import numpy as np
+from flask import Response
+
+from services.columnar import FORMAT_MIMETYPES, available_formats, encode
+
+
+def negotiate_binary(request):
+    """
+    Devuelve el formato binario que pide la cabecera `Accept`.
+
+    Args:
+        request (flask.Request): La solicitud.
+
+    Returns:
+        str | None: 'columns', 'npy', 'arrow' o None si se prefiere JSON (o el formato
+                    pedido no está disponible en este entorno).
+    """
+    formats = {FORMAT_MIMETYPES[fmt]: fmt for fmt in available_formats()}
+    best = request.accept_mimetypes.best_match(['application/json', *formats])
+    return formats.get(best)
+
+
+def nullable_column(name: str, values) -> tuple:
+    """
+    Columna float cuyos valores NaN se marcan como ausentes.
+
+    Returns:
+        tuple[str, numpy.ndarray, numpy.ndarray]: (nombre, valores, máscara de validez).
+    """
+    values = np.asarray(values, dtype=float)
+    return name, values, ~np.isnan(values)
+
+
+def binary_response(fmt: str, columns: list, metadata: dict = None, shape: tuple = None) -> Response:
+    """
+    Codifica columnas y metadatos en una respuesta con el tipo MIME del formato.
+
+    Args:
+        fmt (str): Formato devuelto por `negotiate_binary`.
+        columns (list[tuple[str, numpy.ndarray, numpy.ndarray | None]]): Columnas como
+            (nombre, valores, máscara de validez o None).
+        metadata (dict, optional): Metadatos serializables a JSON.
+        shape (tuple, optional): Forma del arreglo en el formato 'npy'.
+
+    Returns:
+        flask.Response: La respuesta binaria.
+    """
+    return Response(encode(fmt, columns, metadata, shape), mimetype=FORMAT_MIMETYPES[fmt])
@@ -5,13 +5,333 @@ Incluye rutas para:
 - Resolver ecuaciones basadas en valores conocidos y una variable a resolver.
 - Obtener información detallada (LaTeX, restricciones) de una ecuación específica.
 - Obtener la leyenda de variables utilizadas en las ecuaciones.
-- Generar datos para graficar el espesor óptimo económico en función de otra variable.
+- Consultar los contadores de la caché de resultados.
+- Generar datos para graficar el espesor óptimo económico en función de otra variable,
+  opcionalmente en streaming (NDJSON o Server-Sent Events, ver `api.streaming`) o con
+  muestreo adaptativo (ver `services.sampling`).
+- Responder barridos, mallas y lotes en formatos binarios columnares si se piden en la
+  cabecera `Accept` (ver `api.binary`).
+- Calcular el espesor de mínimo costo minimizando directamente el costo total, con su
+  desglose y periodo de recuperación (`/optimize_cost`, ver `services.economics`).
+- Elegir la configuración comercial (espesores disponibles, una o dos capas) de mínimo
+  costo a partir del óptimo continuo (`/commercial_thickness`, ver `services.commercial`).
+- Resolver de forma acoplada el espesor, la temperatura de superficie, 'h' y una
+  conductividad dependiente de la temperatura (`/solve_coupled`, ver `services.coupling`).
+- Consultar el catálogo de materiales aislantes del servidor y comparar el espesor
+  óptimo de todos los materiales aptos en una sola solicitud (`/materials`, ver
+  `services.materials`).
+- Resolver por lotes muchos casos (por ejemplo, tramos de tubería) en una sola solicitud.
+- Resolver archivos de casos de toda una planta (CSV o Parquet) por bloques, devolviendo
+  el archivo con los resultados en streaming (`/bulk_solve`, ver `services.bulk`).
+- Generar mallas multidimensionales del espesor (superficies 2D/3D) sobre varias variables.
+- Enviar mallas y lotes grandes como trabajos asíncronos, consultar su progreso y
+  resultados parciales, y cancelarlos (`/jobs`, ver `services.jobs`).
+- Exportar métricas de duración por ruta, ecuación y fase (`/metrics`, ver `api.instrumentation`).
 """
+import json
+import logging
+import shutil
+import tempfile
+
 from flask import Blueprint, request, jsonify
 from services.calculator import solve_equation, EQUATIONS, VARIABLES_LEYENDA, calculate_convection_coefficient
+from services.vectorized import sweep_espesor, iter_sweep_espesor, range_size, DEFAULT_NUMERIC_METHOD
+from services.sampling import adaptive_sweep_espesor, DEFAULT_MAX_POINTS, DEFAULT_TOLERANCE
+from services.batch import solve_cases, solve_columns, format_result
+from services.bulk import BULK_MIMETYPES, csv_results, parquet_results
+from services.columnar import arrow_available
+from services.economics import COST_COLUMNS, GEOMETRIES, optimize_cost, format_cost_result
+from services.commercial import COMMERCIAL_COLUMNS, MAX_LAYERS, format_commercial_result, select_commercial
+from services.coupling import COUPLED_COLUMNS, DEFAULT_COUPLING_MAXITER, DEFAULT_COUPLING_TOL, \
+    format_coupled_result, solve_coupled
+from services.materials import get_material_catalog, rank_materials
+from services.grid import axis_values, sweep_grid, DEFAULT_CHUNK_SIZE
+from services.result_cache import get_result_cache
+from services.jobs import JobQueueFull, get_job_manager
+from services.metrics import phase
+from api.instrumentation import init_instrumentation
+from api.streaming import negotiate_stream, stream_events, stream_file
+from api.binary import binary_response, negotiate_binary, nullable_column
 import numpy as np
 
 calculations_bp = Blueprint('calculations', __name__)
+init_instrumentation(calculations_bp)
+logger = logging.getLogger(__name__)
+
+# Máximo de puntos que se aceptan en un barrido de /plot_espesor
+MAX_PUNTOS_GRAFICA = 100000
+# Máximo de puntos de un barrido de /plot_espesor en streaming (no se acumula en memoria)
+MAX_PUNTOS_STREAMING = 10000000
+# Máximo de casos que se aceptan en una solicitud de /solve_batch
+MAX_CASOS_LOTE = 200000
+# Máximo de puntos (producto de los ejes) que se aceptan en una malla de /plot_grid
+MAX_PUNTOS_MALLA = 2000000
+# Rango (mínimo, máximo, paso) por defecto de cada variable en /plot_espesor
+RANGOS_GRAFICA = {
+    'Ta': (10, 50, 1), 'Te': (10, 100, 5), 'Ti': (20, 300, 5),
+    'v': (0.1, 10, 0.2), 'k': (0.01, 0.2, 0.005),
+    'diametro': (0.01, 1, 0.02), 'C': (100, 10000, 200),
+    'w': (0.01, 0.2, 0.005), 'beta': (0, 8760, 24),
+    'vida_util': (1, 30, 1), 'eta': (10, 100, 5)
+}
+# Modos de muestreo de /plot_espesor: paso fijo o adaptativo (ver `services.sampling`)
+MUESTREOS = ('uniform', 'adaptive')
+# Segundos que se sugiere esperar (Retry-After) cuando la cola de trabajos está llena
+JOBS_RETRY_AFTER = 30
+
+
+class RequestError(ValueError):
+    """Error en el cuerpo de una solicitud, con el código HTTP con que se responde."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _plot_request(data, max_points: int) -> dict:
+    """
+    Valida el cuerpo de `/plot_espesor` y completa el rango por defecto de la variable.
+
+    Args:
+        data: Cuerpo JSON de la solicitud.
+        max_points (int): Número máximo de puntos admitido.
+
+    Con `"sampling": "adaptive"` el rango solo necesita 'min_val' y 'max_val'; el paso
+    se ignora y el número de puntos lo fija 'max_points' (ver `services.sampling`).
+
+    Returns:
+        dict: 'equation_key', 'variable', 'known_values', 'flow_type', 'orientation',
+              'min_val', 'max_val', 'step_val', 'size' (número de puntos o presupuesto
+              de puntos) y 'sampling' ('uniform' o 'adaptive'); en modo adaptativo,
+              además 'tol'.
+
+    Raises:
+        RequestError: Si faltan parámetros, el rango no es válido, la ecuación no
+                      existe (404) o el barrido supera `max_points`.
+    """
+    if not isinstance(data, dict):
+        raise RequestError('El cuerpo de la solicitud debe ser un objeto JSON.')
+    equation_key = data.get('equation_key')
+    variable = data.get('variable')
+    known_values = data.get('known_values', {})
+
+    flow_type = data.get('flow_type')
+    if not flow_type and 'flow_type' in known_values:
+        flow_type = known_values['flow_type']
+
+    orientation = data.get('orientation')
+    if not orientation and 'orientation' in known_values:
+        orientation = known_values['orientation']
+
+    req_min_val = data.get('min_val')
+    req_max_val = data.get('max_val')
+    req_step_val = data.get('step_val')
+
+    if not variable or not equation_key:
+        raise RequestError('Faltan parámetros: variable o equation_key')
+
+    sampling = data.get('sampling', 'uniform')
+    if sampling not in MUESTREOS:
+        raise RequestError(f"Muestreo no válido: '{sampling}'. Opciones: {', '.join(MUESTREOS)}.")
+    if sampling == 'adaptive':
+        return _adaptive_plot_request(data, equation_key, variable, known_values, flow_type, orientation)
+
+    if req_min_val is not None and req_max_val is not None and req_step_val is not None:
+        if not (isinstance(req_min_val, (int, float)) and
+                isinstance(req_max_val, (int, float)) and
+                isinstance(req_step_val, (int, float))):
+            raise RequestError('Mínimo, Máximo y Paso deben ser números.')
+        if req_step_val <= 0:
+            raise RequestError('El valor de "Paso" para la gráfica debe ser positivo.')
+        min_to_use, max_to_use, step_to_use = req_min_val, req_max_val, req_step_val
+    else:
+        min_to_use, max_to_use, step_to_use = RANGOS_GRAFICA.get(variable, (0, 10, 1))
+
+    if EQUATIONS.get(equation_key) is None:
+        raise RequestError(f"Ecuación '{equation_key}' no encontrada.", 404)
+
+    size = range_size(min_to_use, max_to_use, step_to_use)
+    if size > max_points:
+        raise RequestError(f'El número de puntos ({size}) supera el máximo permitido ({max_points}). Ajusta el rango o el paso.')
+
+    if equation_key.startswith('optimo_economico') and variable != 'h' and (not flow_type or not orientation):
+        logger.debug("plot_espesor: no se puede calcular h para %s porque falta flow_type u orientation.", variable)
+    return {
+        'equation_key': equation_key, 'variable': variable, 'known_values': known_values,
+        'flow_type': flow_type, 'orientation': orientation,
+        'min_val': min_to_use, 'max_val': max_to_use, 'step_val': step_to_use, 'size': size,
+        'sampling': sampling,
+    }
+
+
+def _adaptive_plot_request(data: dict, equation_key: str, variable: str, known_values: dict,
+                           flow_type: str, orientation: str) -> dict:
+    """
+    Valida el rango, la tolerancia y el presupuesto de puntos del muestreo adaptativo.
+
+    El presupuesto se limita a `MAX_PUNTOS_GRAFICA`: el resultado adaptativo se
+    responde completo, nunca en streaming.
+
+    Returns:
+        dict: Los parámetros de `_plot_request`, con 'sampling' igual a 'adaptive',
+              'size' igual al presupuesto de puntos y 'tol'.
+
+    Raises:
+        RequestError: Si el rango, la tolerancia o el presupuesto no son válidos, o la
+                      ecuación no existe (404).
+    """
+    req_min_val, req_max_val = data.get('min_val'), data.get('max_val')
+    if req_min_val is not None and req_max_val is not None:
+        if not (isinstance(req_min_val, (int, float)) and isinstance(req_max_val, (int, float))):
+            raise RequestError('Mínimo y Máximo deben ser números.')
+        min_to_use, max_to_use = req_min_val, req_max_val
+    else:
+        min_to_use, max_to_use, _ = RANGOS_GRAFICA.get(variable, (0, 10, 1))
+    if max_to_use <= min_to_use:
+        raise RequestError('El valor de "Máximo" debe ser mayor que el de "Mínimo".')
+
+    tol = data.get('tol', DEFAULT_TOLERANCE)
+    budget = data.get('max_points', DEFAULT_MAX_POINTS)
+    if not isinstance(tol, (int, float)) or isinstance(tol, bool) or not 0 < tol < 1:
+        raise RequestError("'tol' debe ser un número entre 0 y 1 (fracción del rango de la curva).")
+    if not isinstance(budget, int) or isinstance(budget, bool) or budget < 2:
+        raise RequestError("'max_points' debe ser un entero mayor o igual que 2.")
+    if budget > MAX_PUNTOS_GRAFICA:
+        raise RequestError(f"'max_points' ({budget}) supera el máximo permitido ({MAX_PUNTOS_GRAFICA}).")
+
+    if EQUATIONS.get(equation_key) is None:
+        raise RequestError(f"Ecuación '{equation_key}' no encontrada.", 404)
+    return {
+        'equation_key': equation_key, 'variable': variable, 'known_values': known_values,
+        'flow_type': flow_type, 'orientation': orientation,
+        'min_val': min_to_use, 'max_val': max_to_use, 'step_val': None, 'size': budget,
+        'sampling': 'adaptive', 'tol': tol,
+    }
+
+
+def _plot_events(params: dict):
+    """
+    Eventos de un barrido de `/plot_espesor` en streaming.
+
+    Yields:
+        tuple[str, dict]: ('start', {'variable', 'total'}), un ('points', {'start', 'x',
+                          'y', 'h_vals', 'iterations'}) por bloque, con el mismo formato
+                          que la respuesta JSON, y ('end', {'points', 'iterations'}).
+    """
+    yield 'start', {'variable': params['variable'], 'total': params['size']}
+    iterations = 0
+    for chunk in iter_sweep_espesor(params['equation_key'], params['variable'], params['min_val'],
+                                    params['step_val'], params['size'], params['known_values'],
+                                    params['flow_type'], params['orientation']):
+        chunk_iterations = int(chunk['iterations'].sum())
+        iterations += chunk_iterations
+        yield 'points', {
+            'start': chunk['start'],
+            'x': chunk['x'].tolist(),
+            'y': [None if np.isnan(y) else y for y in chunk['e'].tolist()],
+            'h_vals': [None if np.isnan(h) else h for h in chunk['h'].tolist()],
+            'iterations': chunk_iterations,
+        }
+    yield 'end', {'points': params['size'], 'iterations': iterations}
+
+
+def _batch_request(data) -> dict:
+    """
+    Valida el cuerpo de `/solve_batch` (o de un trabajo 'solve_batch').
+
+    Returns:
+        dict: {'cases': [...]} en el formato de lista; en el de columnas, 'equation_key',
+              'variable_to_solve', 'columns' (columnas y valores comunes), 'size',
+              'flow_type' y 'orientation'.
+
+    Raises:
+        RequestError: Si el cuerpo no tiene un formato válido o supera `MAX_CASOS_LOTE`.
+    """
+    if not isinstance(data, dict):
+        raise RequestError('El cuerpo de la solicitud debe ser un objeto JSON.')
+
+    if 'cases' in data:
+        cases = data['cases']
+        if not isinstance(cases, list):
+            raise RequestError("'cases' debe ser una lista de casos.")
+        if len(cases) > MAX_CASOS_LOTE:
+            raise RequestError(f'El número de casos ({len(cases)}) supera el máximo permitido ({MAX_CASOS_LOTE}).')
+        return {'cases': cases}
+
+    columns = data.get('columns')
+    if not isinstance(columns, dict) or not columns:
+        raise RequestError("Se requiere 'cases' (lista de casos) o 'columns' (arreglos paralelos).")
+    lengths = {len(values) for values in columns.values() if isinstance(values, list)}
+    if len(lengths) != 1:
+        raise RequestError('Todas las columnas deben ser listas de igual longitud.')
+    size = lengths.pop()
+    if size > MAX_CASOS_LOTE:
+        raise RequestError(f'El número de casos ({size}) supera el máximo permitido ({MAX_CASOS_LOTE}).')
+
+    known_values = data.get('known_values') or {}
+    return {
+        'equation_key': data.get('equation_key'),
+        'variable_to_solve': data.get('variable_to_solve'),
+        'columns': {**known_values, **columns},
+        'size': size,
+        'flow_type': data.get('flow_type') or known_values.get('flow_type'),
+        'orientation': data.get('orientation') or known_values.get('orientation'),
+    }
+
+
+def _grid_request(data):
+    """
+    Valida el cuerpo de `/plot_grid` (o de un trabajo 'plot_grid').
+
+    Returns:
+        tuple[dict, list]: Los parámetros de la malla (serializables a JSON, con los ejes
+                           como listas explícitas de valores) y los ejes como pares
+                           (variable, valores).
+
+    Raises:
+        RequestError: Si faltan parámetros, la ecuación no existe (404) o la malla
+                      supera `MAX_PUNTOS_MALLA`.
+    """
+    if not isinstance(data, dict):
+        raise RequestError('El cuerpo de la solicitud debe ser un objeto JSON.')
+    equation_key = data.get('equation_key')
+    known_values = data.get('known_values') or {}
+    axes_spec = data.get('axes')
+
+    if not equation_key or not isinstance(axes_spec, list) or not axes_spec:
+        raise RequestError("Faltan parámetros: equation_key o axes (lista de ejes)")
+    if EQUATIONS.get(equation_key) is None:
+        raise RequestError(f"Ecuación '{equation_key}' no encontrada.", 404)
+    try:
+        axes = [axis_values(axis) for axis in axes_spec]
+    except ValueError as e:
+        raise RequestError(str(e))
+    variables = [variable for variable, _ in axes]
+    if len(set(variables)) != len(variables):
+        raise RequestError('Cada variable solo puede aparecer en un eje.')
+    total = int(np.prod([values.size for _, values in axes]))
+    if total > MAX_PUNTOS_MALLA:
+        raise RequestError(f'El número de puntos de la malla ({total}) supera el máximo permitido ({MAX_PUNTOS_MALLA}).')
+    chunk_size = data.get('chunk_size', DEFAULT_CHUNK_SIZE)
+    if not isinstance(chunk_size, int) or chunk_size <= 0:
+        raise RequestError("'chunk_size' debe ser un entero positivo.")
+
+    params = {
+        'equation_key': equation_key,
+        'axes': [{'variable': variable, 'values': values.tolist()} for variable, values in axes],
+        'known_values': known_values,
+        'flow_type': data.get('flow_type') or known_values.get('flow_type'),
+        'orientation': data.get('orientation') or known_values.get('orientation'),
+        'chunk_size': chunk_size,
+    }
+    return params, axes
+
+
+# Validación de los parámetros de cada tipo de trabajo asíncrono
+JOB_VALIDATORS = {
+    'plot_grid': lambda data: _grid_request(data)[0],
+    'solve_batch': _batch_request,
+}
 
 @calculations_bp.route('/solve_equation', methods=['POST'])
 def solve_equation_route():
@@ -27,6 +347,9 @@ def solve_equation_route():
         variable_to_solve (str): La variable que se desea despejar de la ecuación.
         flow_type (str, optional): Tipo de flujo (ej. 'laminar', 'turbulento').
         orientation (str, optional): Orientación de la superficie (ej. 'horizontal', 'vertical').
+        method (str, optional): Método numérico: 'halley' (por defecto), 'newton' o 'brentq'.
+        x0 (float, optional): Estimación inicial del método numérico, por ejemplo la
+                              solución de un caso vecino.
 
     Returns:
         JSON: Un objeto con el resultado del cálculo, el número de iteraciones y el valor de 'h' si fue calculado o provisto.
@@ -61,7 +384,9 @@ def solve_equation_route():
             return jsonify({'error': f'Error calculando h: {str(e)}'}), 400
 
     try:
-        result, iterations = solve_equation(latex, known_values, variable_to_solve)
+        result, iterations = solve_equation(latex, known_values, variable_to_solve,
+                                            method=data.get('method') or DEFAULT_NUMERIC_METHOD,
+                                            x0=data.get('x0'))
         response = {'result': result, 'iterations': iterations}
         if 'h' in known_values:
             response['h'] = known_values['h']
@@ -103,13 +428,34 @@ def variables_leyenda():
     """
     return jsonify(VARIABLES_LEYENDA)
 
+@calculations_bp.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    """
+    Obtiene los contadores de la caché de resultados de este proceso.
+
+    Returns:
+        JSON: Tamaño, límites y contadores de aciertos, fallos y desalojos
+              (ver `services.result_cache.ResultCache.stats`).
+    """
+    return jsonify(get_result_cache().stats())
+
 @calculations_bp.route('/plot_espesor', methods=['POST'])
 def plot_espesor():
     """
     Genera datos para graficar el espesor ('e') en función de una variable seleccionada.
 
     Calcula el espesor 'e' (y opcionalmente 'h' si es una ecuación de óptimo económico)
-    para un rango de valores de la variable independiente especificada.
+    para un rango de valores de la variable independiente especificada. Todos los puntos
+    se resuelven en una sola pasada vectorizada (ver `services.vectorized.sweep_espesor`).
+
+    Con `Accept: application/x-ndjson` o `Accept: text/event-stream`, los puntos se envían
+    por bloques a medida que se calculan (ver `api.streaming` y `_plot_events`), sin
+    acumular la serie completa en el servidor; se admiten hasta `MAX_PUNTOS_STREAMING`.
+
+    Con `"sampling": "adaptive"` los puntos no siguen un paso fijo: la curva se refina
+    donde 'e' o 'h' se curvan y donde cambia la correlación de convección, hasta la
+    tolerancia 'tol' o el presupuesto 'max_points' (ver `services.sampling`). Este modo
+    no se envía en streaming: la respuesta es siempre completa.
 
     Body (JSON):
         equation_key (str): Clave de la ecuación a utilizar.
@@ -120,115 +466,819 @@ def plot_espesor():
         min_val (float, optional): Valor mínimo para el rango de la variable del eje X.
         max_val (float, optional): Valor máximo para el rango de la variable del eje X.
         step_val (float, optional): Paso para el rango de la variable del eje X.
+        sampling (str, optional): 'uniform' (por defecto, paso fijo) o 'adaptive'.
+        tol (float, optional): Tolerancia del muestreo adaptativo, en fracción del rango
+                               de valores de cada curva. Por defecto 1e-3.
+        max_points (int, optional): Presupuesto de puntos del muestreo adaptativo.
+                                    Por defecto 200.
 
     Returns:
         JSON: Un objeto con listas de valores para 'x' (variable independiente),
-              'y' (espesor 'e' calculado), y 'h_vals' (coeficiente 'h' calculado si aplica).
+              'y' (espesor 'e' calculado), y 'h_vals' (coeficiente 'h' calculado si aplica),
+              además de 'iterations' (total de iteraciones numéricas del barrido).
+              En modo adaptativo incluye también 'transitions' (cambios de correlación
+              de convección, con los valores a cada lado) y 'sampling' (puntos usados,
+              tolerancia, presupuesto y si se alcanzó la tolerancia).
+              Si `Accept` pide un formato binario (ver `api.binary`), las columnas 'x',
+              'y' y 'h_vals' en ese formato, con 'iterations' en los metadatos.
               Retorna errores si faltan parámetros o si ocurren problemas durante el cálculo.
     """
-    data = request.get_json()
-    equation_key = data.get('equation_key')
-    variable = data.get('variable')
-    known_values = data.get('known_values', {})
-    
-    flow_type = data.get('flow_type') 
-    if not flow_type and 'flow_type' in known_values:
-        flow_type = known_values['flow_type']
-    
-    orientation = data.get('orientation')
-    if not orientation and 'orientation' in known_values:
-        orientation = known_values['orientation']
+    stream_format = negotiate_stream(request)
+    try:
+        params = _plot_request(request.get_json(silent=True),
+                               MAX_PUNTOS_STREAMING if stream_format else MAX_PUNTOS_GRAFICA)
+    except RequestError as e:
+        return jsonify({'error': str(e)}), e.status
+    adaptive = params['sampling'] == 'adaptive'
+    if stream_format and not adaptive:
+        return stream_events(_plot_events(params), stream_format)
 
-    req_min_val = data.get('min_val')
-    req_max_val = data.get('max_val')
-    req_step_val = data.get('step_val')
-    
-    default_rangos = {
-        'Ta': (10, 50, 1), 'Te': (10, 100, 5), 'Ti': (20, 300, 5),
-        'v': (0.1, 10, 0.2), 'k': (0.01, 0.2, 0.005),
-        'diametro': (0.01, 1, 0.02), 'C': (100, 10000, 200),
-        'w': (0.01, 0.2, 0.005), 'beta': (0, 8760, 24),
-        'vida_util': (1, 30, 1), 'eta': (10, 100, 5)
+    equation_key, variable = params['equation_key'], params['variable']
+    known_values, flow_type, orientation = params['known_values'], params['flow_type'], params['orientation']
+
+    if adaptive:
+        with phase('sweep'):
+            barrido = adaptive_sweep_espesor(equation_key, variable, params['min_val'], params['max_val'],
+                                             known_values, flow_type, orientation,
+                                             tol=params['tol'], max_points=params['size'])
+    else:
+        x_array = np.arange(params['min_val'], params['max_val'] + params['step_val'], params['step_val'])
+        # Todos los puntos se resuelven en una sola pasada vectorizada
+        with phase('sweep'):
+            barrido = sweep_espesor(equation_key, variable, x_array, known_values, flow_type, orientation)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("plot_espesor: barrido de '%s' con %d puntos: %d valores de 'e' calculados, %d iteraciones.",
+                     variable, barrido['x'].size, np.count_nonzero(~np.isnan(barrido['e'])),
+                     barrido['iterations'].sum())
+
+    extra = {}
+    if adaptive:
+        extra = {
+            'transitions': barrido['transitions'],
+            'sampling': {'mode': 'adaptive', 'points': int(barrido['x'].size), 'tol': params['tol'],
+                         'max_points': params['size'], 'converged': barrido['converged']},
+        }
+
+    binary_format = negotiate_binary(request)
+    if binary_format:
+        with phase('serialize'):
+            return binary_response(binary_format, [
+                ('x', barrido['x'], None),
+                nullable_column('y', barrido['e']),
+                nullable_column('h_vals', barrido['h']),
+            ], {'iterations': int(barrido['iterations'].sum()), **extra})
+
+    with phase('serialize'):
+        x_vals = barrido['x'].tolist()
+        y_vals = [None if np.isnan(y) else y for y in barrido['e'].tolist()]
+        if barrido['h_calculado']:
+            h_vals = [None if np.isnan(h) else h for h in barrido['h'].tolist()]
+        else:
+            h_vals = [None] * len(x_vals)
+
+        return jsonify({'x': x_vals, 'y': y_vals, 'h_vals': h_vals,
+                        'iterations': int(barrido['iterations'].sum()), **extra})
+
+
+def _columns_binary_response(fmt: str, group_result: dict):
+    """
+    Respuesta binaria de `/solve_batch` con columnas (ver `api.binary`).
+
+    Las columnas son 'result' y 'h' (float64) e 'iterations' (int64, sin valor si la
+    solución es de forma cerrada); los mensajes de error van en los metadatos
+    ('errors', por posición del caso).
+    """
+    errors = {str(i): error for i, error in enumerate(group_result['errors']) if error}
+    result_valid = ~np.isnan(group_result['result'])
+    if errors:
+        result_valid[[int(i) for i in errors]] = False
+    size = result_valid.size
+    return binary_response(fmt, [
+        ('result', group_result['result'], result_valid),
+        nullable_column('h', group_result['h']),
+        ('iterations', np.asarray(group_result['iterations'], dtype=np.int64),
+         np.full(size, bool(group_result['numeric']))),
+    ], {'errors': errors})
+
+
+def _batch_binary_response(fmt: str, results: list):
+    """
+    Respuesta binaria de `/solve_batch` con lista de casos, con las mismas columnas
+    que `_columns_binary_response`.
+    """
+    size = len(results)
+    values = {name: np.full(size, np.nan) for name in ('result', 'h')}
+    iterations = np.zeros(size, dtype=np.int64)
+    numeric = np.zeros(size, dtype=bool)
+    errors = {}
+    for i, result in enumerate(results):
+        for name, column in values.items():
+            if result[name] is not None:
+                column[i] = result[name]
+        if isinstance(result['iterations'], int) and not isinstance(result['iterations'], bool):
+            iterations[i] = result['iterations']
+            numeric[i] = True
+        if result['error']:
+            errors[str(i)] = result['error']
+    return binary_response(fmt, [
+        nullable_column('result', values['result']),
+        nullable_column('h', values['h']),
+        ('iterations', iterations, numeric),
+    ], {'errors': errors})
+
+
+@calculations_bp.route('/solve_batch', methods=['POST'])
+def solve_batch():
+    """
+    Resuelve muchos casos en una sola solicitud.
+
+    Acepta dos formatos de cuerpo (JSON):
+
+    1. Lista de casos, cada uno con la misma estructura que el cuerpo de `/solve_equation`:
+        cases (list[dict]): Casos con 'equation_key', 'known_values', 'variable_to_solve'
+                            y opcionalmente 'flow_type' y 'orientation'.
+
+    2. Columnas (arreglos paralelos) para casos de una misma ecuación:
+        equation_key (str): La clave identificadora de la ecuación.
+        variable_to_solve (str): La variable que se desea despejar.
+        columns (dict): Un arreglo de valores por variable (todos de igual longitud).
+        known_values (dict, optional): Valores comunes a todos los casos.
+        flow_type (str, optional): Tipo de flujo, necesario para calcular 'h'.
+        orientation (str, optional): Orientación, necesaria para calcular 'h'.
+
+    Returns:
+        JSON: Con listas, `{'results': [{'result', 'h', 'iterations', 'error'}, ...]}`;
+              con columnas, `{'result': [...], 'h': [...], 'iterations': [...], 'error': [...]}`.
+              Los casos que fallan llevan su mensaje en 'error' sin afectar al resto.
+              Si `Accept` pide un formato binario (ver `api.binary`), en ambos casos las
+              columnas 'result', 'h' e 'iterations', con los errores en los metadatos.
+              Los errores de formato de la solicitud retornan un código 400.
+    """
+    try:
+        params = _batch_request(request.get_json(silent=True))
+    except RequestError as e:
+        return jsonify({'error': str(e)}), e.status
+
+    binary_format = negotiate_binary(request)
+    if 'cases' in params:
+        results = solve_cases(params['cases'])
+        with phase('serialize'):
+            if binary_format:
+                return _batch_binary_response(binary_format, results)
+            return jsonify({'results': results})
+
+    size = params['size']
+    try:
+        group_result = solve_columns(params['equation_key'], params['variable_to_solve'], params['columns'],
+                                     size, params['flow_type'], params['orientation'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    with phase('serialize'):
+        if binary_format:
+            return _columns_binary_response(binary_format, group_result)
+        results = [format_result(group_result, i) for i in range(size)]
+        return jsonify({
+            'result': [r['result'] for r in results],
+            'h': [r['h'] for r in results],
+            'iterations': [r['iterations'] for r in results],
+            'error': [r['error'] for r in results],
+        })
+
+
+def _bulk_request(values, files, content_type: str) -> dict:
+    """
+    Valida los parámetros de `/bulk_solve` (query string o campos del formulario).
+
+    Returns:
+        dict: 'format' ('csv' o 'parquet'), 'filename' (nombre del archivo de entrada o
+              None), 'defaults' (valores comunes, ver `services.bulk.solve_chunk`) y
+              'mapping' (asociaciones explícitas de encabezados o None).
+
+    Raises:
+        RequestError: Si un parámetro no tiene un formato válido (400) o se pide Parquet
+                      sin `pyarrow` instalado (415).
+    """
+    def json_object(name):
+        text = values.get(name)
+        if not text:
+            return None
+        try:
+            value = json.loads(text)
+        except ValueError:
+            raise RequestError(f"'{name}' debe ser un objeto JSON.")
+        if not isinstance(value, dict):
+            raise RequestError(f"'{name}' debe ser un objeto JSON.")
+        return value
+
+    upload = files.get('file')
+    filename = upload.filename if upload is not None else None
+    fmt = values.get('format')
+    if fmt is None:
+        mimetype = upload.mimetype if upload is not None else content_type
+        parquet = (filename or '').lower().endswith('.parquet') or 'parquet' in (mimetype or '')
+        fmt = 'parquet' if parquet else 'csv'
+    if fmt not in BULK_MIMETYPES:
+        raise RequestError(f"'format' debe ser uno de: {', '.join(BULK_MIMETYPES)}.")
+    if fmt == 'parquet' and not arrow_available():
+        raise RequestError("El formato 'parquet' requiere pyarrow, que no está instalado.", 415)
+    return {
+        'format': fmt,
+        'filename': filename,
+        'defaults': {
+            'equation_key': values.get('equation_key'),
+            'variable_to_solve': values.get('variable_to_solve') or 'e',
+            'flow_type': values.get('flow_type'),
+            'orientation': values.get('orientation'),
+            'known_values': json_object('known_values') or {},
+        },
+        'mapping': json_object('mapping'),
     }
 
-    if not variable or not equation_key:
-        return jsonify({'error': 'Faltan parámetros: variable o equation_key'}), 400
-    
-    if req_min_val is not None and req_max_val is not None and req_step_val is not None:
-        if not (isinstance(req_min_val, (int, float)) and
-                isinstance(req_max_val, (int, float)) and
-                isinstance(req_step_val, (int, float))):
-            return jsonify({'error': 'Mínimo, Máximo y Paso deben ser números.'}), 400
-        if req_step_val <= 0:
-            return jsonify({'error': 'El valor de "Paso" para la gráfica debe ser positivo.'}), 400
-        
-        min_to_use = req_min_val
-        max_to_use = req_max_val
-        step_to_use = req_step_val
+
+@calculations_bp.route('/bulk_solve', methods=['POST'])
+def bulk_solve():
+    """
+    Resuelve un archivo de casos (CSV o Parquet) y lo devuelve con los resultados.
+
+    El archivo se lee, resuelve y envía por bloques (ver `services.bulk`), así que la
+    memoria no depende de su tamaño. Cada fila es un caso; sus columnas se asocian a las
+    variables por el encabezado ('Ti', 'Ti (°C)', 'diámetro [m]', ...).
+
+    Body:
+        El archivo como cuerpo de la solicitud (`Content-Type: text/csv` o
+        `application/vnd.apache.parquet`) o como campo 'file' de un formulario
+        multipart.
+
+    Query string (o campos del formulario):
+        equation_key (str, optional): Ecuación de las filas sin columna 'equation_key'
+                                      (o 'tipo_calculo'); 'plano', 'cilindro' y 'esfera'
+                                      equivalen a las de óptimo económico.
+        variable_to_solve (str, optional): Incógnita común. Por defecto 'e'.
+        flow_type (str, optional): Tipo de flujo común (o columna 'ambiente').
+        orientation (str, optional): Orientación común (o columna 'orientacion').
+        known_values (str, optional): Objeto JSON con valores comunes, usados en las
+                                      celdas vacías y las columnas ausentes.
+        mapping (str, optional): Objeto JSON {encabezado: variable} para las columnas
+                                 que no se reconocen por su nombre.
+        format (str, optional): 'csv' o 'parquet'. Por defecto, según el nombre o el
+                                tipo del archivo.
+
+    Returns:
+        El archivo en el mismo formato con las columnas de la incógnita, 'h', 'regime'
+        y 'error' agregadas (o reemplazadas si ya existían). Los errores de formato de
+        la solicitud o del encabezado retornan un código 400 antes de empezar a
+        responder; los de cada fila van en su columna 'error'.
+    """
+    try:
+        params = _bulk_request(request.values, request.files, request.content_type)
+    except RequestError as e:
+        return jsonify({'error': str(e)}), e.status
+
+    upload = request.files.get('file')
+    if upload is not None:
+        # Flask cierra los archivos subidos al terminar la vista, antes de enviar la respuesta
+        source = tempfile.TemporaryFile()
+        shutil.copyfileobj(upload.stream, source)
+        source.seek(0)
     else:
-        min_to_use, max_to_use, step_to_use = default_rangos.get(variable, (0, 10, 1))
-    
-    x_vals = []
-    y_vals = []
-    h_vals = []
-
-    eq_obj = EQUATIONS.get(equation_key)
-    if eq_obj is None:
-        return jsonify({'error': f"Ecuación '{equation_key}' no encontrada."}), 404
-    
-    latex_eq_principal = eq_obj['latex'] if isinstance(eq_obj, dict) else eq_obj
-    variable_principal_a_resolver = 'e'
-
-    for v_iter_val in np.arange(min_to_use, max_to_use + step_to_use, step_to_use):
-        current_known_values = known_values.copy()
-        current_known_values[variable] = v_iter_val
-
-        valor_principal_calculado = None
-        h_calculado_iter = None
-
-        # Solo calcular h automáticamente si la variable a graficar NO es 'h'
-        if equation_key.startswith('optimo_economico') and variable != 'h':
-            temp_known_values_for_h = current_known_values.copy()
-            if 'h' in temp_known_values_for_h:
-                del temp_known_values_for_h['h']
-            
-            if not flow_type or not orientation:
-                print(f"[PLOT DEBUG] No se puede calcular h para {variable}={v_iter_val} porque falta flow_type o orientation general.")
-            else:
-                try:
-                    h_calculado_iter = calculate_convection_coefficient(
-                        temp_known_values_for_h,
-                        flow_type,
-                        orientation
-                    )
-                    current_known_values['h'] = h_calculado_iter
-                    print(f"[PLOT DEBUG] h calculado para {variable}={v_iter_val}: {h_calculado_iter}")
-                except Exception as e_h:
-                    print(f"[PLOT DEBUG] Error calculando h para {variable}={v_iter_val}: {e_h}")
-                    current_known_values.pop('h', None)
-        elif variable == 'h':
-            # Si la variable a graficar es 'h', usar el valor iterado directamente
-            h_calculado_iter = v_iter_val
-            current_known_values['h'] = v_iter_val
+        source = request.stream
+    stem = (params['filename'] or 'casos').rsplit('.', 1)[0]
+    try:
+        if params['format'] == 'parquet':
+            chunks = parquet_results(source, params['defaults'], params['mapping'])
+            content_type = BULK_MIMETYPES['parquet']
+        else:
+            chunks, charset = csv_results(source, params['defaults'], params['mapping'])
+            content_type = f"{BULK_MIMETYPES['csv']}; charset={charset}"
+    except ValueError as e:
+        source.close()
+        return jsonify({'error': str(e)}), 400
+    return stream_file(chunks, content_type, f"{stem}_resultados.{params['format']}")
+
+
+def _cost_request(data) -> dict:
+    """
+    Valida el cuerpo de `/optimize_cost`.
+
+    Returns:
+        dict: 'equation_key', 'columns' (valores conocidos y columnas), 'size', 'single'
+              (True si no se enviaron columnas), 'flow_type', 'orientation' y 'cross_check'.
+
+    Raises:
+        RequestError: Si el cuerpo no tiene un formato válido, la ecuación no es de óptimo
+                      económico o se supera `MAX_CASOS_LOTE`.
+    """
+    if not isinstance(data, dict):
+        raise RequestError('El cuerpo de la solicitud debe ser un objeto JSON.')
+    equation_key = data.get('equation_key')
+    if equation_key not in GEOMETRIES:
+        raise RequestError(f"'equation_key' debe ser una de: {', '.join(GEOMETRIES)}.")
+    known_values = data.get('known_values') or {}
+    if not isinstance(known_values, dict):
+        raise RequestError("'known_values' debe ser un objeto.")
+
+    columns = data.get('columns')
+    size = 1
+    if columns is not None:
+        if not isinstance(columns, dict) or not columns:
+            raise RequestError("'columns' debe ser un objeto con un arreglo de valores por variable.")
+        lengths = {len(values) for values in columns.values() if isinstance(values, list)}
+        if len(lengths) != 1:
+            raise RequestError('Todas las columnas deben ser listas de igual longitud.')
+        size = lengths.pop()
+        if size > MAX_CASOS_LOTE:
+            raise RequestError(f'El número de casos ({size}) supera el máximo permitido ({MAX_CASOS_LOTE}).')
+    return {
+        'equation_key': equation_key,
+        'columns': {**known_values, **(columns or {})},
+        'size': size,
+        'single': columns is None,
+        'flow_type': data.get('flow_type') or known_values.get('flow_type'),
+        'orientation': data.get('orientation') or known_values.get('orientation'),
+        'cross_check': bool(data.get('cross_check', True)),
+    }
+
+
+@calculations_bp.route('/optimize_cost', methods=['POST'])
+def optimize_cost_route():
+    """
+    Calcula el espesor de mínimo costo total minimizando directamente el costo.
+
+    Alternativa a resolver las ecuaciones `optimo_economico_*`: construye el costo total
+    durante la vida útil (aislamiento + energía perdida) de la geometría y lo minimiza
+    (ver `services.economics`), por lo que siempre obtiene el mínimo global, también
+    cuando la ecuación no tiene cambio de signo en su intervalo de búsqueda.
+
+    Body (JSON):
+        equation_key (str): 'optimo_economico_plano', 'optimo_economico_cilindro' u
+                            'optimo_economico_esfera' (define la geometría).
+        known_values (dict): Valores conocidos (k, C, Ti, Ta, w, beta, vida_util, eta, r o
+                             diametro, y h o las variables para calcularlo).
+        columns (dict, optional): Un arreglo de valores por variable para resolver muchos
+                                  casos (todos de igual longitud).
+        flow_type (str, optional): Tipo de flujo, necesario para calcular 'h'.
+        orientation (str, optional): Orientación, necesaria para calcular 'h'.
+        cross_check (bool, optional): Resolver también la ecuación del catálogo y comparar.
+                                      Por defecto es True.
+
+    Returns:
+        JSON: Sin columnas, un objeto con 'e', 'h', 'cost' ('insulation', 'energy',
+              'total' durante la vida útil y 'annual'), 'heat_loss' y 'heat_loss_bare' (W),
+              'savings_annual', 'payback_years', 'iterations', 'cross_check' y 'error'.
+              Con columnas, las mismas claves como listas (el costo como 'cost_insulation',
+              'cost_energy', 'cost_total' y 'cost_annual'). En ambos casos 'basis' indica
+              la unidad de instalación ('m2', 'm' o 'unidad'). Los errores de formato de la
+              solicitud retornan un código 400.
+    """
+    try:
+        params = _cost_request(request.get_json(silent=True))
+    except RequestError as e:
+        return jsonify({'error': str(e)}), e.status
+    try:
+        with phase('optimize'):
+            result = optimize_cost(params['equation_key'], params['columns'], params['size'],
+                                   params['flow_type'], params['orientation'], params['cross_check'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
+    with phase('serialize'):
+        if params['single']:
+            return jsonify({'basis': result['basis'], **format_cost_result(result, 0)})
+        response = {'basis': result['basis']}
+        for name in COST_COLUMNS + (('e_equation', 'discrepancy') if params['cross_check'] else ()):
+            response[name] = [None if np.isnan(value) else value for value in result[name].tolist()]
+        response['iterations'] = result['iterations'].tolist()
+        response['error'] = result['errors']
+        return jsonify(response)
+
+
+def _commercial_request(data) -> dict:
+    """
+    Valida el cuerpo de `/commercial_thickness` (el formato de `/optimize_cost` con
+    'thicknesses' y 'max_layers').
+
+    Returns:
+        dict: Lo que devuelve `_cost_request`, además de 'thicknesses' (lista o None) y
+              'max_layers'.
+
+    Raises:
+        RequestError: Si el cuerpo no tiene un formato válido, la ecuación no es de óptimo
+                      económico, se supera `MAX_CASOS_LOTE` o 'thicknesses'/'max_layers'
+                      no son válidos.
+    """
+    params = _cost_request(data)
+    thicknesses = data.get('thicknesses')
+    if thicknesses is not None:
+        if (not isinstance(thicknesses, list) or not thicknesses
+                or not all(isinstance(t, (int, float)) and not isinstance(t, bool) and t > 0 for t in thicknesses)):
+            raise RequestError("'thicknesses' debe ser una lista de espesores positivos (m).")
+    max_layers = data.get('max_layers', MAX_LAYERS)
+    if max_layers not in (1, MAX_LAYERS) or isinstance(max_layers, bool):
+        raise RequestError(f"'max_layers' debe ser 1 o {MAX_LAYERS}.")
+    params.update({'thicknesses': thicknesses, 'max_layers': max_layers})
+    return params
+
+
+@calculations_bp.route('/commercial_thickness', methods=['POST'])
+def commercial_thickness_route():
+    """
+    Elige la configuración comercial de mínimo costo total a partir del óptimo continuo.
+
+    Calcula el óptimo continuo (como `/optimize_cost`), busca en el índice ordenado de
+    configuraciones de una o dos capas las vecinas de ese espesor y elige la de menor
+    costo total, o la superficie desnuda si aislar no compensa (ver `services.commercial`).
+
+    Body (JSON):
+        equation_key (str): 'optimo_economico_plano', 'optimo_economico_cilindro' u
+                            'optimo_economico_esfera'.
+        known_values (dict): Valores conocidos, como en `/optimize_cost`; con 'material'
+                             (ver `/materials`) los espesores, 'C' y 'k' salen del catálogo
+                             si no se indican.
+        columns (dict, optional): Un arreglo de valores por variable para muchos casos
+                                  ('material' también puede ser una columna).
+        thicknesses (list[float], optional): Espesores comerciales disponibles (m).
+        max_layers (int, optional): 1 o 2 capas. Por defecto 2.
+        flow_type (str, optional): Tipo de flujo, necesario para calcular 'h'.
+        orientation (str, optional): Orientación, necesaria para calcular 'h'.
+
+    Returns:
+        JSON: Sin columnas, un objeto con 'basis', 'e' (espesor total), 'layers' (espesor
+              de cada capa), 'e_continuous', 'h', 'cost', 'cost_total_continuous',
+              'penalty' (sobrecosto relativo), 'heat_loss', 'savings_annual',
+              'payback_years' y 'error'. Con columnas, listas con 'e', 'layer_1',
+              'layer_2', 'e_continuous', 'cost_total_continuous', 'penalty', el desglose
+              del costo y 'error'. Los errores de formato de la solicitud retornan un
+              código 400.
+    """
+    try:
+        params = _commercial_request(request.get_json(silent=True))
+    except RequestError as e:
+        return jsonify({'error': str(e)}), e.status
+    try:
+        with phase('optimize'):
+            result = select_commercial(params['equation_key'], params['columns'], params['size'],
+                                       params['thicknesses'], params['max_layers'],
+                                       params['flow_type'], params['orientation'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    with phase('serialize'):
+        if params['single']:
+            return jsonify({'basis': result['basis'], **format_commercial_result(result, 0)})
+        response = {'basis': result['basis']}
+        for name in COMMERCIAL_COLUMNS + COST_COLUMNS[1:]:
+            response[name] = [None if np.isnan(value) else value for value in result[name].tolist()]
+        response['error'] = result['errors']
+        return jsonify(response)
+
+
+def _coupled_request(data) -> dict:
+    """
+    Valida el cuerpo de `/solve_coupled` (el mismo formato que `/optimize_cost`).
+
+    Returns:
+        dict: Lo que devuelve `_cost_request`, además de 'tol' y 'maxiter'.
+
+    Raises:
+        RequestError: Si el cuerpo no tiene un formato válido, la ecuación no es de óptimo
+                      económico, se supera `MAX_CASOS_LOTE` o 'tol'/'maxiter' no son válidos.
+    """
+    params = _cost_request(data)
+    tol = data.get('tol', DEFAULT_COUPLING_TOL)
+    if isinstance(tol, bool) or not isinstance(tol, (int, float)) or not tol > 0:
+        raise RequestError("'tol' debe ser un número positivo.")
+    maxiter = data.get('maxiter', DEFAULT_COUPLING_MAXITER)
+    if isinstance(maxiter, bool) or not isinstance(maxiter, int) or not 1 <= maxiter <= 1000:
+        raise RequestError("'maxiter' debe ser un entero entre 1 y 1000.")
+    params.update({'tol': float(tol), 'maxiter': maxiter})
+    return params
+
+
+@calculations_bp.route('/solve_coupled', methods=['POST'])
+def solve_coupled_route():
+    """
+    Resuelve el espesor óptimo acoplado con la temperatura de superficie, 'h' y k(T).
+
+    Itera 'e', 'Te', 'h' (correlaciones de convección) y k(Tm) hasta un punto fijo, con
+    aceleración de Aitken y vectorizado sobre los casos (ver `services.coupling`). 'Te',
+    si se indica, solo es la estimación inicial.
+
+    Body (JSON):
+        equation_key (str): 'optimo_economico_plano', 'optimo_economico_cilindro' u
+                            'optimo_economico_esfera'.
+        known_values (dict): Valores conocidos, como en `/optimize_cost`; k(Tm) se indica
+                             con 'k0', 'k1' y 'k2' o con 'material' (ver `/materials`), o
+                             con 'k' si es constante.
+        columns (dict, optional): Un arreglo de valores por variable para resolver muchos
+                                  casos (todos de igual longitud).
+        flow_type (str, optional): Tipo de flujo, necesario para calcular 'h'.
+        orientation (str, optional): Orientación, necesaria para calcular 'h'.
+        tol (float, optional): Tolerancia sobre 'Te' en °C. Por defecto 1e-6.
+        maxiter (int, optional): Máximo de iteraciones. Por defecto 50.
+
+    Returns:
+        JSON: Sin columnas, un objeto con 'e', 'Te', 'h', 'k', 'T_mean', 'iterations',
+              'evaluations', 'converged', 'discontinuous' y 'error'. Con columnas, las
+              mismas claves como listas. Los errores de formato de la solicitud o los
+              materiales desconocidos retornan un código 400.
+    """
+    try:
+        params = _coupled_request(request.get_json(silent=True))
+    except RequestError as e:
+        return jsonify({'error': str(e)}), e.status
+    try:
+        with phase('coupled'):
+            result = solve_coupled(params['equation_key'], params['columns'], params['size'],
+                                   params['flow_type'], params['orientation'], params['tol'], params['maxiter'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    with phase('serialize'):
+        if params['single']:
+            return jsonify(format_coupled_result(result, 0))
+        response = {name: [None if np.isnan(value) else value for value in result[name].tolist()]
+                    for name in COUPLED_COLUMNS}
+        for name in ('iterations', 'evaluations', 'converged', 'discontinuous'):
+            response[name] = result[name].tolist()
+        response['error'] = result['errors']
+        return jsonify(response)
+
+
+@calculations_bp.route('/materials', methods=['GET'])
+def list_materials():
+    """
+    Devuelve el catálogo de materiales aislantes del servidor.
+
+    Query string:
+        temperature (float, optional): Solo los materiales cuyo rango de servicio
+                                       contiene esta temperatura (°C).
+
+    Returns:
+        JSON: Un objeto con 'materials', una lista con 'id', 'name', 't_min', 't_max'
+              (°C), 'k_coefficients' (k0, k1, k2 de k(Tm) = k0 + k1·Tm + k2·Tm²), 'C'
+              ($/m³) y 'thicknesses' (espesores comerciales en m).
+    """
+    catalog = get_material_catalog()
+    temperature = request.args.get('temperature')
+    if temperature is None:
+        positions = range(len(catalog))
+    else:
         try:
-            valor_principal_calculado_tupla = solve_equation(
-                latex_eq_principal,
-                current_known_values, 
-                variable_principal_a_resolver 
-            )
-            valor_principal_calculado = valor_principal_calculado_tupla[0]
-            print(f"[PLOT DEBUG] Valor principal '{variable_principal_a_resolver}' calculado para {variable}={v_iter_val} (con h={current_known_values.get('h')}): {valor_principal_calculado}")
-        except Exception as e_principal:
-            print(f"[PLOT DEBUG] Error calculando '{variable_principal_a_resolver}' para {variable}={v_iter_val}: {e_principal}")
-            valor_principal_calculado = None
-
-        x_vals.append(v_iter_val)
-        y_vals.append(valor_principal_calculado)
-        h_vals.append(h_calculado_iter)
-
-    x_vals = [float(x) for x in x_vals]
-    y_vals = [float(y) if y is not None else None for y in y_vals]
-    h_vals = [float(h) if h is not None else None for h in h_vals]
-
-    return jsonify({'x': x_vals, 'y': y_vals, 'h_vals': h_vals})
\ No newline at end of file
+            temperature = float(temperature)
+        except ValueError:
+            return jsonify({'error': "'temperature' debe ser un número."}), 400
+        positions = catalog.applicable(temperature, temperature)
+    return jsonify({'materials': [catalog.describe(int(i)) for i in positions]})
+
+
+def _materials_request(data) -> dict:
+    """
+    Valida el cuerpo de `/materials/rank`.
+
+    Returns:
+        dict: 'equation_key', 'known_values', 'flow_type', 'orientation', 'materials'
+              (lista de identificadores o None) y 'limit' (entero o None).
+
+    Raises:
+        RequestError: Si el cuerpo no tiene un formato válido o la ecuación no es de
+                      óptimo económico.
+    """
+    if not isinstance(data, dict):
+        raise RequestError('El cuerpo de la solicitud debe ser un objeto JSON.')
+    equation_key = data.get('equation_key')
+    if equation_key not in GEOMETRIES:
+        raise RequestError(f"'equation_key' debe ser una de: {', '.join(GEOMETRIES)}.")
+    known_values = data.get('known_values') or {}
+    if not isinstance(known_values, dict):
+        raise RequestError("'known_values' debe ser un objeto.")
+    materials = data.get('materials')
+    if materials is not None and (not isinstance(materials, list)
+                                  or not all(isinstance(m, str) for m in materials)):
+        raise RequestError("'materials' debe ser una lista de identificadores de material.")
+    limit = data.get('limit')
+    if limit is not None and (isinstance(limit, bool) or not isinstance(limit, int) or limit < 1):
+        raise RequestError("'limit' debe ser un entero positivo.")
+    return {
+        'equation_key': equation_key,
+        'known_values': known_values,
+        'flow_type': data.get('flow_type') or known_values.get('flow_type'),
+        'orientation': data.get('orientation') or known_values.get('orientation'),
+        'materials': materials or None,
+        'limit': limit,
+    }
+
+
+@calculations_bp.route('/materials/rank', methods=['POST'])
+def rank_materials_route():
+    """
+    Compara el espesor de mínimo costo de todos los materiales aptos para un caso.
+
+    Evalúa k(Tm) de cada material del catálogo cuyo rango de servicio cubre las
+    temperaturas del caso y minimiza el costo total de todos ellos en una sola pasada
+    vectorizada (ver `services.materials.rank_materials`), en lugar de una solicitud
+    a `/optimize_cost` por material.
+
+    Body (JSON):
+        equation_key (str): 'optimo_economico_plano', 'optimo_economico_cilindro' u
+                            'optimo_economico_esfera' (define la geometría).
+        known_values (dict): Valores conocidos del caso, como en `/optimize_cost`; 'k' y
+                             'C' se ignoran (los aporta cada material).
+        flow_type (str, optional): Tipo de flujo, necesario para calcular 'h'.
+        orientation (str, optional): Orientación, necesaria para calcular 'h'.
+        materials (list[str], optional): Materiales a comparar. Por defecto, todo el catálogo.
+        limit (int, optional): Máximo de materiales en la clasificación.
+
+    Returns:
+        JSON: 'basis', 't_mean', 'temperature_range', 'candidates', 'ranking' (ordenado
+              por costo total; cada material con 'rank', 'material', 'name', 'k', 'C',
+              'thicknesses' y el resultado de `/optimize_cost`) y 'excluded' (materiales
+              fuera de su rango de servicio). Los errores de formato de la solicitud o
+              los materiales desconocidos retornan un código 400.
+    """
+    try:
+        params = _materials_request(request.get_json(silent=True))
+    except RequestError as e:
+        return jsonify({'error': str(e)}), e.status
+    try:
+        with phase('optimize'):
+            result = rank_materials(params['equation_key'], params['known_values'], params['flow_type'],
+                                    params['orientation'], params['materials'], params['limit'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    with phase('serialize'):
+        return jsonify(result)
+
+
+@calculations_bp.route('/plot_grid', methods=['POST'])
+def plot_grid():
+    """
+    Genera una malla del espesor ('e') sobre el producto cartesiano de varias variables.
+
+    La malla se resuelve por bloques con el motor vectorizado, de modo que la memoria
+    de trabajo queda acotada por el tamaño del bloque.
+
+    Body (JSON):
+        equation_key (str): Clave de la ecuación a utilizar.
+        axes (list[dict]): Ejes de la malla. Cada eje tiene 'variable' y, o bien
+                           'values' (lista explícita), o bien 'min', 'max' y 'step'.
+        known_values (dict): Valores conocidos para las demás variables.
+        flow_type (str, optional): Tipo de flujo, necesario para calcular 'h'.
+        orientation (str, optional): Orientación, necesaria para calcular 'h'.
+        chunk_size (int, optional): Puntos resueltos por bloque.
+
+    Returns:
+        JSON: Un objeto con 'axes' (variable y valores de cada eje), 'shape', 'order'
+              ('C': el último eje varía más rápido), 'e' y 'h_vals' (listas planas con
+              null donde no hay valor) e 'iterations' (total de iteraciones numéricas).
+              Si `Accept` pide un formato binario (ver `api.binary`), las columnas 'e' y
+              'h_vals' en ese formato, con lo demás en los metadatos.
+              Retorna errores si faltan parámetros o la malla es demasiado grande.
+    """
+    try:
+        params, axes = _grid_request(request.get_json(silent=True))
+    except RequestError as e:
+        return jsonify({'error': str(e)}), e.status
+    total = int(np.prod([values.size for _, values in axes]))
+
+    with phase('sweep'):
+        malla = sweep_grid(params['equation_key'], axes, params['known_values'], params['flow_type'],
+                           params['orientation'], params['chunk_size'])
+
+    binary_format = negotiate_binary(request)
+    if binary_format:
+        with phase('serialize'):
+            return binary_response(binary_format, [
+                nullable_column('e', malla['e']),
+                nullable_column('h_vals', malla['h']),
+            ], {
+                'axes': [{'variable': variable, 'values': values.tolist()} for variable, values in axes],
+                'shape': list(malla['shape']),
+                'order': 'C',
+                'iterations': malla['iterations'],
+            }, shape=malla['shape'])
+
+    with phase('serialize'):
+        return jsonify({
+            'axes': [{'variable': variable, 'values': values.tolist()} for variable, values in axes],
+            'shape': list(malla['shape']),
+            'order': 'C',
+            'e': [None if np.isnan(e) else e for e in malla['e'].tolist()],
+            'h_vals': ([None if np.isnan(h) else h for h in malla['h'].tolist()]
+                       if malla['h_calculado'] else [None] * total),
+            'iterations': malla['iterations'],
+        })
+
+
+@calculations_bp.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    Envía una malla o un lote grande como trabajo asíncrono.
+
+    Los parámetros se validan igual que en la ruta síncrona; el cálculo se hace por
+    bloques en los hilos de trabajo (ver `services.jobs`).
+
+    Body (JSON):
+        kind (str): Tipo de trabajo: 'plot_grid' o 'solve_batch'.
+        params (dict): El mismo cuerpo que acepta la ruta síncrona correspondiente.
+
+    Returns:
+        JSON: Código 202 con 'job_id', 'status', 'status_url' y 'result_url' (y la
+              cabecera Location). Código 400/404 si los parámetros no son válidos y
+              503 si la cola de trabajos está llena.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'El cuerpo de la solicitud debe ser un objeto JSON.'}), 400
+    kind = data.get('kind')
+    if kind not in JOB_VALIDATORS:
+        return jsonify({'error': f"'kind' debe ser uno de: {', '.join(JOB_VALIDATORS)}."}), 400
+    try:
+        params = JOB_VALIDATORS[kind](data.get('params'))
+    except RequestError as e:
+        return jsonify({'error': str(e)}), e.status
+    try:
+        job_id = get_job_manager().submit(kind, params)
+    except JobQueueFull as e:
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = str(JOBS_RETRY_AFTER)
+        return response, 503
+
+    status_url = f'/jobs/{job_id}'
+    response = jsonify({'job_id': job_id, 'status': 'queued', 'status_url': status_url,
+                        'result_url': f'{status_url}/result'})
+    response.headers['Location'] = status_url
+    return response, 202
+
+
+@calculations_bp.route('/jobs', methods=['GET'])
+def list_jobs():
+    """
+    Lista los trabajos conservados y los contadores de la cola.
+
+    Returns:
+        JSON: {'jobs': [...], 'stats': {...}} (ver `services.jobs.JobManager.stats`).
+    """
+    manager = get_job_manager()
+    return jsonify({'jobs': manager.list_jobs(), 'stats': manager.stats()})
+
+
+@calculations_bp.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """
+    Obtiene el estado y el progreso de un trabajo.
+
+    Args:
+        job_id (str): Identificador devuelto por `POST /jobs`.
+
+    Returns:
+        JSON: 'id', 'kind', 'status' ('queued', 'running', 'done', 'failed' o 'cancelled'),
+              'progress' ('done', 'total', 'fraction'), 'error', 'result_bytes' y las
+              marcas de tiempo. Código 404 si no existe o ya fue desalojado.
+    """
+    job = get_job_manager().status(job_id)
+    if job is None:
+        return jsonify({'error': 'Trabajo no encontrado'}), 404
+    return jsonify(job)
+
+
+@calculations_bp.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    """
+    Obtiene el resultado de un trabajo, parcial mientras se ejecuta.
+
+    Args:
+        job_id (str): Identificador devuelto por `POST /jobs`.
+
+    Returns:
+        JSON: El estado del trabajo con 'complete' (bool) y 'result', con el mismo
+              formato que la ruta síncrona y null en los puntos o casos aún no
+              resueltos. Código 404 si no existe o ya fue desalojado.
+    """
+    with phase('serialize'):
+        job = get_job_manager().result(job_id)
+        if job is None:
+            return jsonify({'error': 'Trabajo no encontrado'}), 404
+        return jsonify(job)
+
+
+@calculations_bp.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """
+    Cancela un trabajo pendiente o en ejecución, o elimina uno terminado.
+
+    Un trabajo en ejecución se detiene al terminar el bloque en curso y conserva el
+    resultado parcial.
+
+    Args:
+        job_id (str): Identificador devuelto por `POST /jobs`.
+
+    Returns:
+        JSON: El estado del trabajo tras la cancelación, o {'deleted': true} si estaba
+              terminado y se eliminó. Código 404 si no existe.
+    """
+    manager = get_job_manager()
+    if manager.status(job_id) is None:
+        return jsonify({'error': 'Trabajo no encontrado'}), 404
+    job = manager.cancel(job_id)
+    return jsonify(job if job is not None else {'id': job_id, 'deleted': True})
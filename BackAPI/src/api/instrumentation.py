@@ -0,0 +1,154 @@
+"""
+Instrumentación de las solicitudes de la API de cálculos.
+
+Registra en el blueprint de cálculos los ganchos que, cuando la medición está activada
+(CALC_METRICS=1, ver `services.metrics`):
+- Miden cada solicitud y las fases del cálculo (`services.metrics.phase`).
+- Añaden la cabecera `Server-Timing` con el tiempo de cada fase, visible en las
+  herramientas de desarrollo del navegador.
+- Registran la duración en los histogramas que exporta `GET /metrics`.
+
+Las respuestas en streaming (NDJSON/SSE de `/plot_espesor`, `/bulk_solve`) envían sus
+cabeceras antes de calcular el cuerpo, por lo que no llevan `Server-Timing`: sus fases
+se miden mientras se genera el cuerpo y se registran en los histogramas al terminar el
+envío.
+
+Con CALC_PROFILING=1, una solicitud con `?profile=1` se ejecuta bajo cProfile y su
+respuesta se sustituye por un JSON con el estado y el cuerpo originales, los tiempos por
+fase y el resumen de cProfile.
+
+Funciones principales:
+- init_instrumentation: Registra los ganchos de medición y la ruta `/metrics` en un blueprint.
+"""
+import cProfile
+import io
+import pstats
+
+from flask import Response, g, jsonify, request
+
+from services.metrics import (
+    current_timings,
+    finish_request,
+    metrics_enabled,
+    observe_request,
+    profiling_enabled,
+    render_prometheus,
+    resume_request,
+    start_request,
+)
+
+# Funciones que se muestran en el resumen de cProfile
+PROFILE_LIMIT = 40
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _equation_key():
+    """Clave de la ecuación de la solicitud (ruta o cuerpo JSON), o None."""
+    if request.view_args and request.view_args.get('equation_key'):
+        return request.view_args['equation_key']
+    data = request.get_json(silent=True) if request.is_json else None
+    if isinstance(data, dict) and isinstance(data.get('equation_key'), str):
+        return data['equation_key']
+    return None
+
+
+def _before_request():
+    """Empieza a medir la solicitud y, si se pidió, a perfilarla."""
+    if request.endpoint and request.endpoint.endswith('.metrics'):
+        return
+    profile = profiling_enabled() and request.args.get('profile') == '1'
+    if not (profile or metrics_enabled()):
+        return
+    start_request()
+    if profile:
+        g.calc_profiler = cProfile.Profile()
+        g.calc_profiler.enable()
+
+
+def _after_request(response):
+    """Añade `Server-Timing`, registra los histogramas y, si se perfiló, devuelve el resumen."""
+    profiler = g.pop('calc_profiler', None)
+    if profiler is not None:
+        profiler.disable()
+    timings = current_timings()
+    if timings is None:
+        return response
+    finish_request()
+    route = request.url_rule.rule if request.url_rule is not None else 'desconocida'
+    if response.is_streamed and profiler is None:
+        # Las cabeceras salen antes que el cuerpo: sin Server-Timing, se mide al terminar el envío
+        response.response = _measured_stream(response.response, timings, route, request.method,
+                                             response.status_code, _equation_key())
+        return response
+    total = timings.elapsed()
+    observe_request(route, request.method, response.status_code, total, _equation_key(), timings)
+    if profiler is None:
+        response.headers['Server-Timing'] = timings.server_timing(total)
+        return response
+
+    output = io.StringIO()
+    stats = pstats.Stats(profiler, stream=output)
+    stats.strip_dirs().sort_stats('cumulative').print_stats(PROFILE_LIMIT)
+    profiled = jsonify({
+        'status': response.status_code,
+        'response': response.get_json(silent=True) if response.is_json else None,
+        'timings': timings.as_dict(),
+        'total_ms': total * 1e3,
+        'profile': output.getvalue(),
+    })
+    profiled.headers['Server-Timing'] = timings.server_timing(total)
+    return profiled
+
+
+def _measured_stream(body, timings, route: str, method: str, status: int, equation_key: str):
+    """
+    Recorre el cuerpo de una respuesta en streaming midiendo las fases de cada bloque.
+
+    Al terminar el envío (o si el cliente se desconecta) registra la solicitud completa
+    en los histogramas.
+    """
+    iterator = iter(body)
+    try:
+        while True:
+            resume_request(timings)
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                finish_request()
+            yield chunk
+    finally:
+        close = getattr(body, 'close', None)
+        if close is not None:
+            close()
+        observe_request(route, method, status, timings.elapsed(), equation_key, timings)
+
+
+def _teardown_request(_exc):
+    """Descarta la medición si la solicitud terminó sin pasar por `_after_request`."""
+    finish_request()
+
+
+def metrics():
+    """
+    Exporta los histogramas de duración de este proceso en formato de texto de Prometheus.
+
+    Returns:
+        flask.Response: Histogramas por ruta, por clave de ecuación y por fase del cálculo
+                        (vacíos si CALC_METRICS no está activado).
+    """
+    return Response(render_prometheus(), mimetype=None, content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def init_instrumentation(blueprint):
+    """
+    Registra los ganchos de medición y la ruta `GET /metrics` en un blueprint.
+
+    Args:
+        blueprint (flask.Blueprint): Blueprint cuyas rutas se miden.
+    """
+    blueprint.before_request(_before_request)
+    blueprint.after_request(_after_request)
+    blueprint.teardown_request(_teardown_request)
+    blueprint.add_url_rule('/metrics', 'metrics', metrics, methods=['GET'])
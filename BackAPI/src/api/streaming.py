@@ -0,0 +1,112 @@
+"""
+Respuestas en streaming (NDJSON o Server-Sent Events) para los barridos largos.
+
+Una ruta que resuelve por bloques puede entregar cada bloque en cuanto está listo, en
+lugar de acumular la serie completa y responder al final. El formato se elige con la
+cabecera `Accept` de la solicitud:
+- `application/x-ndjson`: una línea JSON por evento, `{"event": <nombre>, ...datos}`.
+- `text/event-stream`: Server-Sent Events, `event: <nombre>` y `data: <JSON>` por evento.
+Cualquier otro valor (incluido `*/*`) mantiene la respuesta JSON habitual.
+
+Si el cálculo falla a mitad de la respuesta (cuando ya se envió el código 200), se
+envía un evento 'error' con el mensaje y la respuesta termina.
+
+Los archivos que se generan por bloques (por ejemplo, la salida de `/bulk_solve`) se
+envían con `stream_file`; si fallan a mitad de la respuesta, el archivo queda incompleto.
+
+Funciones principales:
+- negotiate_stream: Formato de streaming pedido en la cabecera `Accept`, o None.
+- stream_events: Convierte un generador de eventos en una respuesta en streaming.
+- stream_file: Envía un archivo a medida que se generan sus bloques.
+"""
+import json
+import logging
+
+from flask import Response, stream_with_context
+
+from services.metrics import phase
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+SSE_MIMETYPE = 'text/event-stream'
+STREAM_FORMATS = {NDJSON_MIMETYPE: 'ndjson', SSE_MIMETYPE: 'sse'}
+
+
+def negotiate_stream(request):
+    """
+    Devuelve el formato de streaming que pide la cabecera `Accept`.
+
+    Args:
+        request (flask.Request): La solicitud.
+
+    Returns:
+        str | None: 'ndjson', 'sse' o None si se prefiere la respuesta JSON habitual.
+    """
+    best = request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE, SSE_MIMETYPE])
+    return STREAM_FORMATS.get(best)
+
+
+def _encode(event: str, payload: dict, fmt: str) -> str:
+    """Serializa un evento en el formato indicado."""
+    if fmt == 'sse':
+        return f"event: {event}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n"
+    return json.dumps({'event': event, **payload}, separators=(',', ':')) + '\n'
+
+
+def stream_events(events, fmt: str) -> Response:
+    """
+    Convierte un generador de eventos en una respuesta en streaming.
+
+    Args:
+        events (iterator[tuple[str, dict]]): Pares (nombre del evento, datos
+                                             serializables a JSON).
+        fmt (str): 'ndjson' o 'sse' (ver `negotiate_stream`).
+
+    Returns:
+        flask.Response: Respuesta que envía cada evento en cuanto el generador lo produce.
+    """
+    def generate():
+        try:
+            for event, payload in events:
+                with phase('serialize'):
+                    encoded = _encode(event, payload, fmt)
+                yield encoded
+        except Exception as e:
+            logger.exception("Error durante una respuesta en streaming.")
+            yield _encode('error', {'error': str(e)}, fmt)
+
+    mimetype = SSE_MIMETYPE if fmt == 'sse' else NDJSON_MIMETYPE
+    response = Response(generate(), mimetype=mimetype)
+    response.headers['Cache-Control'] = 'no-cache'
+    # Evita que un proxy Nginx acumule la respuesta antes de reenviarla
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def stream_file(chunks, content_type: str, filename: str) -> Response:
+    """
+    Envía un archivo a medida que se generan sus bloques.
+
+    El generador se ejecuta dentro del contexto de la solicitud, así que puede seguir
+    leyendo el cuerpo o los archivos subidos mientras se responde.
+
+    Args:
+        chunks (iterator[bytes]): Bloques del archivo, en orden.
+        content_type (str): Tipo MIME del archivo (con su codificación si es texto).
+        filename (str): Nombre sugerido para la descarga.
+
+    Returns:
+        flask.Response: Respuesta que envía cada bloque en cuanto el generador lo produce.
+    """
+    def generate():
+        try:
+            yield from chunks
+        except Exception:
+            logger.exception("Error durante la generación de un archivo en streaming.")
+
+    response = Response(stream_with_context(generate()), content_type=content_type)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
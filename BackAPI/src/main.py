@@ -3,15 +3,19 @@ Script principal de la aplicación Flask.
 
 Este script se encarga de:
 - Cargar variables de entorno.
+- Configurar el registro (logging) según LOG_LEVEL y LOG_TRACE_SAMPLE.
 - Configurar las rutas base para ejecución en desarrollo y como bundle de PyInstaller.
 - Inicializar la aplicación Flask y registrar los blueprints.
 - Servir los archivos estáticos del frontend.
 - Encontrar un puerto libre para ejecutar la aplicación.
-- Iniciar el servidor Flask, abriendo automáticamente el navegador en modo de desarrollo.
+- Iniciar el servidor Flask, abriendo automáticamente el navegador en modo de desarrollo,
+  o el servidor de producción con varios procesos si APP_SERVER=gunicorn (ver `server`).
 """
 
 import os
 import sys
+import logging
+import multiprocessing
 import webbrowser
 import threading
 import socket
@@ -66,6 +70,12 @@ else:
 from flask import Flask, send_from_directory
 from flask_cors import CORS
 from api.calculations import calculations_bp
+from services.logging_setup import configure_logging
+from server import server_mode, gunicorn_available, run_gunicorn
+from services.jobs import start_shared_workers
+
+configure_logging()
+logger = logging.getLogger(__name__)
 
 # Determinar la ruta del frontend (carpeta Front)
 if hasattr(sys, '_MEIPASS'):
@@ -76,8 +86,8 @@ else:
     if not os.path.exists(os.path.join(static_folder, 'index.html')):
         # Intenta buscar en /app/Front (ruta absoluta dentro del contenedor Docker)
         static_folder = '/app/Front'
-print("STATIC FOLDER:", static_folder)
-print("INDEX EXISTS:", os.path.exists(os.path.join(static_folder, 'index.html')))
+logger.info("Carpeta estática: %s (index.html existe: %s)", static_folder,
+            os.path.exists(os.path.join(static_folder, 'index.html')))
 
 app = Flask(__name__, static_folder=static_folder, static_url_path='')
 CORS(app)
@@ -132,6 +142,8 @@ def find_free_port(start_port=5000, max_tries=20):
     raise RuntimeError('No se encontró un puerto libre.')
 
 if __name__ == '__main__':
+    # Necesario para que el pool de procesos de services.parallel funcione en el bundle de PyInstaller
+    multiprocessing.freeze_support()
     flask_env = os.environ.get('FLASK_ENV', 'production')
     app_debug = flask_env == 'development'
 
@@ -152,7 +164,7 @@ if __name__ == '__main__':
         try:
             temp_socket.bind((app_host, app_port))
         except OSError:
-            print(f"Puerto {app_port} (configurado) está ocupado, buscando uno libre...")
+            logger.info("Puerto %s (configurado) está ocupado, buscando uno libre...", app_port)
             app_port = find_free_port(app_port)
         finally:
             temp_socket.close()
@@ -160,10 +172,19 @@ if __name__ == '__main__':
         if not hasattr(sys, '_MEIPASS'): # No abrir navegador si es un bundle de PyInstaller
             final_url = f'http://{app_host}:{app_port}'
             threading.Timer(1.5, lambda: webbrowser.open(final_url)).start()
-            print(f"Servidor de desarrollo (proceso principal) iniciando. Navegador intentará abrir: {final_url}")
-            print("Espera a que el servidor Flask (proceso hijo del reloader) confirme que está escuchando en este puerto.")
+            logger.info("Servidor de desarrollo (proceso principal) iniciando. Navegador intentará abrir: %s", final_url)
+            logger.info("Espera a que el servidor Flask (proceso hijo del reloader) confirme que está escuchando en este puerto.")
 
     elif flask_env != 'development':
-        print(f"Servidor de producción configurado para el puerto {app_port} en host {app_host}")
+        logger.info("Servidor de producción configurado para el puerto %s en host %s", app_port, app_host)
+
+    if server_mode() == 'gunicorn' and not app_debug:
+        if gunicorn_available():
+            run_gunicorn(app, app_host, app_port)
+            sys.exit(0)
+        logger.warning("APP_SERVER=gunicorn no está disponible en este sistema; se usa el servidor de Flask.")
 
+    if not app_debug or is_werkzeug_reloader_process:
+        # Con CALC_JOB_PATH, retomar los trabajos en cola (no en el proceso vigilante del reloader)
+        start_shared_workers()
     app.run(debug=app_debug, host=app_host, port=app_port)
@@ -0,0 +1,141 @@
+"""
+Servidor WSGI de producción con varios procesos (gunicorn).
+
+El servidor de desarrollo de Flask (`app.run`) atiende las solicitudes en un solo
+proceso, y los cálculos retienen el GIL, de modo que las solicitudes concurrentes se
+resuelven de a una. En modo 'gunicorn' la aplicación se sirve con varios procesos:
+
+1. El proceso principal importa la aplicación, precompila el registro de ecuaciones
+   (desde los kernels pregenerados o, si faltan, con SymPy) y congela el recolector de
+   basura (`gc.freeze`).
+2. Después crea los procesos de trabajo con `fork`; todos comparten esa memoria
+   (copy-on-write), por lo que ni el arranque de cada proceso ni su primera solicitud
+   pagan la compilación de las ecuaciones.
+
+gunicorn solo funciona en sistemas tipo Unix; en Windows (o si no está instalado) se
+usa el servidor de Flask.
+
+Configuración (variables de entorno):
+- APP_SERVER: 'flask' (servidor de desarrollo, por defecto) o 'gunicorn'.
+- APP_WORKERS: Número de procesos de trabajo (por defecto, el número de CPU).
+- APP_THREADS: Hilos por proceso (por defecto 1). Con más de uno se usa el worker 'gthread'.
+- APP_TIMEOUT: Segundos que puede tardar una solicitud antes de reiniciar su proceso
+  (por defecto 120; las mallas grandes pueden tardar).
+
+Funciones principales:
+- server_mode: Modo de servidor configurado en APP_SERVER.
+- gunicorn_available: Indica si se puede usar gunicorn en este sistema.
+- preload_application: Precompila el estado compartido antes de crear los procesos.
+- run_gunicorn: Sirve la aplicación con gunicorn.
+"""
+import gc
+import logging
+import os
+import random
+import time
+
+from services.equation_registry import warm_registry
+from services.jobs import start_shared_workers
+
+logger = logging.getLogger(__name__)
+
+SERVER_MODES = ('flask', 'gunicorn')
+DEFAULT_TIMEOUT = 120
+
+
+def _env_int(name: str, default: int) -> int:
+    """Lee un entero positivo de una variable de entorno, con valor por defecto si no es válido."""
+    try:
+        value = int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+    return value if value > 0 else default
+
+
+def server_mode() -> str:
+    """
+    Devuelve el modo de servidor configurado en APP_SERVER.
+
+    Returns:
+        str: 'flask' o 'gunicorn' ('flask' si el valor no es válido).
+    """
+    mode = os.environ.get('APP_SERVER', 'flask').strip().lower()
+    return mode if mode in SERVER_MODES else 'flask'
+
+
+def gunicorn_available() -> bool:
+    """True si gunicorn está instalado y el sistema permite crear procesos con fork."""
+    if os.name == 'nt':
+        return False
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def preload_application() -> int:
+    """
+    Prepara en el proceso principal el estado que compartirán los procesos de trabajo.
+
+    Carga el registro de ecuaciones (de los kernels pregenerados o compilando con SymPy) y congela los objetos ya
+    creados para que el recolector de basura no los toque en los procesos hijos, lo que
+    rompería el copy-on-write.
+
+    Returns:
+        int: Número de ecuaciones compiladas en el registro.
+    """
+    started = time.perf_counter()
+    compiled = warm_registry()
+    gc.collect()
+    gc.freeze()
+    logger.info("Registro de ecuaciones precargado (%d ecuaciones) en %.2f s.",
+                compiled, time.perf_counter() - started)
+    return compiled
+
+
+def _post_fork(server, worker):
+    """Inicializa un proceso de trabajo recién creado."""
+    # Cada proceso sortea su propio muestreo de trazas (LOG_TRACE_SAMPLE)
+    random.seed()
+    # Con CALC_JOB_PATH, el proceso retoma los trabajos en cola sin esperar una solicitud
+    start_shared_workers()
+
+
+def run_gunicorn(app, host: str, port: int):
+    """
+    Sirve la aplicación con gunicorn, precargada en el proceso principal.
+
+    Args:
+        app (flask.Flask): La aplicación, ya creada con sus blueprints.
+        host (str): Dirección en que se escucha.
+        port (int): Puerto en que se escucha.
+    """
+    from gunicorn.app.base import BaseApplication
+
+    workers = _env_int('APP_WORKERS', os.cpu_count() or 1)
+    threads = _env_int('APP_THREADS', 1)
+    options = {
+        'bind': f'{host}:{port}',
+        'workers': workers,
+        'threads': threads,
+        'worker_class': 'gthread' if threads > 1 else 'sync',
+        'timeout': _env_int('APP_TIMEOUT', DEFAULT_TIMEOUT),
+        'preload_app': True,
+        'post_fork': _post_fork,
+    }
+
+    class _Application(BaseApplication):
+        """Aplicación de gunicorn que sirve el objeto `app` ya importado."""
+
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    preload_application()
+    logger.info("Servidor gunicorn en %s:%s con %d proceso(s) y %d hilo(s) por proceso.",
+                host, port, workers, threads)
+    _Application().run()
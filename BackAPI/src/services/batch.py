@@ -0,0 +1,326 @@
+"""
+Resolución por lotes de muchos casos (por ejemplo, tramos de tubería) en una sola solicitud.
+
+Los casos se agrupan por ecuación, incógnita, tipo de flujo y orientación; cada grupo
+se resuelve en una sola pasada con el motor vectorizado de `services.vectorized`
+(repartido entre procesos con `services.parallel` cuando el grupo es grande),
+aplicando la misma lógica que la ruta `/solve_equation` (cálculo automático de 'h'
+en las ecuaciones de óptimo económico). Los fallos se informan caso por caso sin
+interrumpir el resto del lote.
+
+Funciones principales:
+- convection_inputs: Valores con que se calcula 'h' (con 'diametro' como 'H' si falta).
+- fill_convection_h: Calcula 'h' en los casos que no lo indican, como `/solve_equation`.
+- solve_columns: Resuelve un grupo homogéneo de casos dados como columnas (arreglos paralelos).
+- solve_cases: Resuelve una lista heterogénea de casos (uno por objeto).
+- format_result: Convierte el resultado de un caso a un diccionario serializable a JSON.
+"""
+import numpy as np
+
+from services.equations import EQUATIONS
+from services.equation_registry import get_compiled_equation
+from services.parallel import chunk_bounds, map_chunks, parallel_chunk_size, should_parallelize
+from services.vectorized import (
+    STATUS_DATOS_INVALIDOS,
+    STATUS_MENSAJES,
+    STATUS_OK,
+    convection_coefficient_array,
+    solve_equation_array,
+)
+
+# Variables que se utilizan para calcular 'h' automáticamente
+H_INPUT_VARIABLES = ('Te', 'Ta', 'H', 'v')
+# Campos de cada caso que definen su grupo en `solve_cases`
+GROUP_FIELDS = ('equation_key', 'variable_to_solve', 'flow_type', 'orientation')
+
+
+def column_array(values, size: int):
+    """
+    Convierte una columna (lista o escalar) en un arreglo float de longitud `size`.
+
+    Los valores ausentes (None o '') y los no numéricos se convierten en NaN.
+
+    Args:
+        values: Escalar, lista o arreglo con los valores de la columna.
+        size (int): Número de casos.
+
+    Returns:
+        numpy.ndarray: La columna como arreglo float.
+
+    Raises:
+        ValueError: Si la columna es una lista con una longitud distinta de `size`.
+    """
+    if not isinstance(values, (list, tuple, np.ndarray)):
+        try:
+            return np.full(size, float(values))
+        except (TypeError, ValueError):
+            return np.full(size, np.nan)
+    if len(values) != size:
+        raise ValueError(f"Todas las columnas deben tener {size} valores (se recibieron {len(values)}).")
+    try:
+        return np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        pass
+    array = np.full(size, np.nan)
+    for i, value in enumerate(values):
+        try:
+            array[i] = float(value)
+        except (TypeError, ValueError):
+            continue
+    return array
+
+
+def _empty_result(size: int, error=None) -> dict:
+    """Resultado de un grupo con todos los casos sin calcular."""
+    return {
+        'result': np.full(size, np.nan),
+        'h': np.full(size, np.nan),
+        'iterations': np.zeros(size, dtype=int),
+        'numeric': False,
+        'errors': [error] * size,
+    }
+
+
+def convection_inputs(arrays: dict, mask) -> dict:
+    """
+    Valores con que se calcula 'h' en los casos de `mask`.
+
+    Toma las columnas de `H_INPUT_VARIABLES` y, como en `/solve_equation`, usa
+    'diametro' como 'H' cuando no se indica.
+
+    Args:
+        arrays (dict): Columnas del grupo como arreglos.
+        mask (numpy.ndarray): Casos (máscara booleana) para los que se calcula 'h'.
+
+    Returns:
+        dict: Arreglos por variable, uno por caso seleccionado.
+    """
+    h_inputs = {}
+    for name in H_INPUT_VARIABLES:
+        if name in arrays:
+            h_inputs[name] = arrays[name][mask]
+    if 'diametro' in arrays:
+        # Igual que en /solve_equation, H toma el diámetro cuando no se indica
+        diametro = arrays['diametro'][mask]
+        if 'H' in h_inputs:
+            h_inputs['H'] = np.where(np.isnan(h_inputs['H']), diametro, h_inputs['H'])
+        else:
+            h_inputs['H'] = diametro
+    return h_inputs
+
+
+def fill_convection_h(equation_key: str, arrays: dict, size: int, flow_type: str, orientation: str,
+                      errors: list):
+    """
+    Calcula 'h' con las correlaciones de convección en los casos que no lo indican.
+
+    Aplica la misma lógica que `/solve_equation`: solo en las ecuaciones de óptimo
+    económico, y 'H' toma el valor de 'diametro' cuando no se indica. Actualiza
+    `arrays['h']` y anota en `errors` los casos donde no se pudo calcular.
+
+    Args:
+        equation_key (str): Clave de la ecuación en `EQUATIONS`.
+        arrays (dict): Columnas del grupo como arreglos de longitud `size`.
+        size (int): Número de casos.
+        flow_type (str): Tipo de flujo, necesario para calcular 'h'.
+        orientation (str): Orientación, necesaria para calcular 'h'.
+        errors (list): Mensaje de error por caso (None si no hay error).
+
+    Returns:
+        numpy.ndarray: Los valores de 'h' (NaN donde no hay valor).
+    """
+    h_values = arrays.get('h', np.full(size, np.nan))
+    if not equation_key.startswith('optimo_economico'):
+        return h_values
+    needs_h = np.isnan(h_values) | (h_values == 0)
+    if needs_h.any():
+        if not flow_type or not orientation:
+            for i in np.flatnonzero(needs_h):
+                errors[i] = 'Faltan flow_type u orientation para calcular h'
+        else:
+            h_inputs = convection_inputs(arrays, needs_h)
+            h_calculado = convection_coefficient_array(h_inputs, flow_type, orientation, int(needs_h.sum()))
+            h_values = h_values.copy()
+            h_values[needs_h] = h_calculado
+            for i in np.flatnonzero(needs_h)[np.isnan(h_calculado)]:
+                errors[i] = (
+                    'Error calculando h: no se encontró una correlación de convección aplicable '
+                    f"para flow_type='{flow_type}', orientation='{orientation}' con los valores proporcionados."
+                )
+        arrays['h'] = h_values
+    return h_values
+
+
+def solve_columns(equation_key: str, variable_to_solve: str, columns: dict, size: int,
+                  flow_type: str = None, orientation: str = None, maxiter=50, tol=1e-6) -> dict:
+    """
+    Resuelve `size` casos de una misma ecuación a partir de columnas de valores.
+
+    Args:
+        equation_key (str): Clave de la ecuación en `EQUATIONS`.
+        variable_to_solve (str): Variable que se desea despejar.
+        columns (dict): Valores conocidos por variable: escalares (comunes a todos los
+                        casos) o listas/arreglos de longitud `size`.
+        size (int): Número de casos.
+        flow_type (str, optional): Tipo de flujo, necesario para calcular 'h'.
+        orientation (str, optional): Orientación, necesaria para calcular 'h'.
+        maxiter (int, optional): Iteraciones máximas del método numérico. Por defecto es 50.
+        tol (float, optional): Tolerancia del método numérico. Por defecto es 1e-6.
+
+    Returns:
+        dict: Diccionario con los arreglos 'result' y 'h' (NaN donde no hay valor),
+              'iterations', 'numeric' (bool) y 'errors' (lista con un mensaje por caso
+              fallido, None en los casos resueltos).
+
+    Raises:
+        ValueError: Si alguna columna tiene una longitud distinta de `size`.
+    """
+    if EQUATIONS.get(equation_key) is None:
+        return _empty_result(size, 'Ecuación no encontrada')
+    if not variable_to_solve:
+        return _empty_result(size, 'Falta variable_to_solve')
+
+    arrays = {
+        name: column_array(values, size)
+        for name, values in columns.items()
+        if name not in ('flow_type', 'orientation')
+    }
+    if should_parallelize(size):
+        chunk_args = [
+            (equation_key, variable_to_solve, {name: array[start:stop] for name, array in arrays.items()},
+             stop - start, flow_type, orientation, maxiter, tol)
+            for start, stop in chunk_bounds(size, parallel_chunk_size(size))
+        ]
+        return _merge_results(list(map_chunks(_solve_arrays, chunk_args)))
+    return _solve_arrays(equation_key, variable_to_solve, arrays, size, flow_type, orientation, maxiter, tol)
+
+
+def _merge_results(chunk_results: list) -> dict:
+    """Combina, en orden, los resultados de `_solve_arrays` de varios bloques."""
+    errors = []
+    for chunk in chunk_results:
+        errors.extend(chunk['errors'])
+    return {
+        'result': np.concatenate([chunk['result'] for chunk in chunk_results]),
+        'h': np.concatenate([chunk['h'] for chunk in chunk_results]),
+        'iterations': np.concatenate([chunk['iterations'] for chunk in chunk_results]),
+        'numeric': any(chunk['numeric'] for chunk in chunk_results),
+        'errors': errors,
+    }
+
+
+def _solve_arrays(equation_key: str, variable_to_solve: str, arrays: dict, size: int,
+                  flow_type: str, orientation: str, maxiter, tol) -> dict:
+    """
+    Resuelve un grupo de casos ya convertido a arreglos (ver `solve_columns`).
+
+    Es una función de nivel de módulo para que los procesos del pool puedan ejecutarla.
+    """
+    errors = [None] * size
+    h_values = fill_convection_h(equation_key, arrays, size, flow_type, orientation, errors)
+
+    try:
+        compiled = get_compiled_equation(equation_key, variable_to_solve)
+        known_values = {k: v for k, v in arrays.items() if k != variable_to_solve}
+        if 'r' in compiled.params and 'r' not in known_values and 'diametro' in known_values:
+            known_values['r'] = known_values['diametro'] / 2
+        missing = [name for name in compiled.params if name not in known_values]
+        if missing:
+            raise ValueError(
+                f"Faltan valores conocidos para resolver '{variable_to_solve}': {', '.join(missing)}."
+            )
+        solution = solve_equation_array(equation_key, known_values, variable_to_solve, size,
+                                        maxiter=maxiter, tol=tol)
+    except ValueError as e:
+        result = _empty_result(size)
+        result['h'] = h_values
+        result['errors'] = [error or str(e) for error in errors]
+        return result
+
+    for i in np.flatnonzero(solution['status'] != STATUS_OK):
+        if errors[i] is not None:
+            continue
+        if solution['status'][i] == STATUS_DATOS_INVALIDOS:
+            missing = [name for name in compiled.params if not np.isfinite(known_values[name][i])]
+            errors[i] = f"Faltan valores conocidos para resolver '{variable_to_solve}': {', '.join(missing)}."
+        else:
+            errors[i] = STATUS_MENSAJES[int(solution['status'][i])]
+    return {
+        'result': solution['values'],
+        'h': h_values,
+        'iterations': solution['iterations'],
+        'numeric': solution['numeric'],
+        'errors': errors,
+    }
+
+
+def format_result(group_result: dict, position: int) -> dict:
+    """
+    Devuelve el resultado de un caso como diccionario serializable a JSON.
+
+    Las iteraciones se informan como en `/solve_equation`: un entero si se usó el
+    método numérico o False si la solución es de forma cerrada.
+    """
+    value = group_result['result'][position]
+    h_value = group_result['h'][position]
+    error = group_result['errors'][position]
+    return {
+        'result': None if error or np.isnan(value) else float(value),
+        'h': None if np.isnan(h_value) else float(h_value),
+        'iterations': int(group_result['iterations'][position]) if group_result['numeric'] else False,
+        'error': error,
+    }
+
+
+def solve_cases(cases: list) -> list:
+    """
+    Resuelve una lista de casos con la misma estructura que el cuerpo de `/solve_equation`.
+
+    Los casos se agrupan por (equation_key, variable_to_solve, flow_type, orientation)
+    y cada grupo se resuelve con `solve_columns`.
+
+    Args:
+        cases (list[dict]): Casos con 'equation_key', 'known_values', 'variable_to_solve'
+                            y opcionalmente 'flow_type' y 'orientation'.
+
+    Returns:
+        list[dict]: Un resultado por caso, en el mismo orden, con 'result', 'h',
+                    'iterations' y 'error'.
+    """
+    results = [None] * len(cases)
+    groups = {}
+    for i, case in enumerate(cases):
+        if not isinstance(case, dict):
+            results[i] = {'result': None, 'h': None, 'iterations': None, 'error': 'El caso debe ser un objeto JSON'}
+            continue
+        known_values = case.get('known_values') or {}
+        if not isinstance(known_values, dict):
+            results[i] = {'result': None, 'h': None, 'iterations': None, 'error': 'known_values debe ser un objeto JSON'}
+            continue
+        group_key = (
+            case.get('equation_key'),
+            case.get('variable_to_solve'),
+            case.get('flow_type') or known_values.get('flow_type'),
+            case.get('orientation') or known_values.get('orientation'),
+        )
+        # Un valor no textual (lista u objeto JSON) no sirve como clave de grupo
+        invalid = next((name for name, value in zip(GROUP_FIELDS, group_key)
+                        if value is not None and not isinstance(value, str)), None)
+        if invalid is not None:
+            results[i] = {'result': None, 'h': None, 'iterations': None, 'error': f'{invalid} debe ser texto'}
+            continue
+        groups.setdefault(group_key, []).append(i)
+
+    for (equation_key, variable_to_solve, flow_type, orientation), indices in groups.items():
+        names = set()
+        for i in indices:
+            names.update(cases[i].get('known_values') or {})
+        columns = {
+            name: [(cases[i].get('known_values') or {}).get(name) for i in indices]
+            for name in names
+        }
+        group_result = solve_columns(equation_key, variable_to_solve, columns, len(indices),
+                                     flow_type, orientation)
+        for position, i in enumerate(indices):
+            results[i] = format_result(group_result, position)
+    return results
@@ -0,0 +1,503 @@
+"""
+Procesamiento masivo de archivos de casos (CSV o Parquet) en streaming.
+
+Una planta describe sus tramos de tubería en una planilla con miles de filas. Este
+módulo lee el archivo por bloques de `BULK_CHUNK_ROWS` filas, asocia sus columnas a las
+variables de `VARIABLES_LEYENDA` (ver `map_columns`), resuelve cada bloque con
+`services.batch.solve_columns` y devuelve el mismo archivo con las columnas del
+resultado: la incógnita (por defecto 'e'), 'h', 'regime' (la correlación de convección
+con que se calculó 'h'; vacía si 'h' venía en el archivo) y 'error'. Si el archivo ya
+tiene alguna de esas columnas (por ejemplo, al volver a procesar una salida), se
+reemplaza en su lugar; el resto de las columnas se copia sin cambios. Cada bloque se
+entrega en cuanto se resuelve, de modo que la memoria no depende del tamaño del archivo.
+
+Dentro de un bloque, las filas se agrupan por ecuación, incógnita, tipo de flujo y
+orientación, que pueden venir como columnas del archivo (también con los nombres del
+catálogo del frontend: 'tipo_calculo', 'ambiente' y 'orientacion') o como valores
+comunes de la solicitud. Las celdas vacías toman el valor común si se indica. Los
+fallos se informan fila por fila en 'error' sin interrumpir el resto del archivo.
+
+Formatos:
+- CSV: se detectan la codificación (UTF-8, con o sin BOM, o Windows-1252), el separador
+  (',', ';' o tabulación) y la coma decimal de las planillas en español; la salida usa
+  las mismas convenciones que la entrada.
+- Parquet: requiere `pyarrow` (opcional). Se lee por lotes de filas y la salida se
+  escribe con un grupo de filas por bloque. Parquet necesita acceso aleatorio, así que
+  un cuerpo no posicionable se copia antes a un archivo temporal.
+
+Funciones principales:
+- map_columns: Asocia los encabezados del archivo a variables y columnas de control.
+- solve_chunk: Resuelve un bloque de filas ya separado en columnas.
+- csv_results: Procesa un CSV y devuelve los bloques del CSV de salida.
+- parquet_results: Procesa un archivo Parquet y devuelve los bloques del Parquet de salida.
+"""
+import codecs
+import csv
+import io
+import re
+import shutil
+import tempfile
+import unicodedata
+
+import numpy as np
+
+from services.batch import column_array, convection_inputs, solve_columns
+from services.equations import EQUATIONS, VARIABLES_LEYENDA
+from services.vectorized import CONVECTION_REGIMES, convection_regime_index
+
+# Filas que se resuelven por bloque
+BULK_CHUNK_ROWS = 5000
+# Bytes iniciales con que se detectan la codificación, el separador y la coma decimal
+SNIFF_BYTES = 64 * 1024
+# Separadores de CSV que se reconocen (el primero es el predeterminado)
+CSV_DELIMITERS = (',', ';', '\t')
+# Variables numéricas que se reconocen en los encabezados
+BULK_VARIABLES = tuple(VARIABLES_LEYENDA) + ('diametro',)
+# Columnas de control (texto) que definen el grupo de cada fila
+CONTROL_COLUMNS = ('equation_key', 'variable_to_solve', 'flow_type', 'orientation')
+# Nombres alternativos de las columnas de control (catálogo del frontend)
+CONTROL_ALIASES = {
+    'tipo_calculo': 'equation_key',
+    'ecuacion': 'equation_key',
+    'incognita': 'variable_to_solve',
+    'ambiente': 'flow_type',
+    'orientacion': 'orientation',
+}
+# Columnas de resultado que acompañan a la incógnita
+RESULT_COLUMNS = ('h', 'regime', 'error')
+# Nombre de la columna de la incógnita cuando cada fila indica la suya
+MIXED_RESULT_COLUMN = 'result'
+# Tipos MIME de los archivos de salida
+BULK_MIMETYPES = {'csv': 'text/csv', 'parquet': 'application/vnd.apache.parquet'}
+
+
+def _normalize(name) -> str:
+    """Encabezado sin acentos, sin unidades entre paréntesis o corchetes y con '_' como separador."""
+    text = unicodedata.normalize('NFKD', str(name))
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    text = re.sub(r'[(\[][^)\]]*[)\]]', ' ', text)
+    return re.sub(r'[\s\-]+', '_', text.strip()).strip('_')
+
+
+def _header_index() -> tuple:
+    """Nombres reconocidos: exactos, sin distinguir mayúsculas (si no es ambiguo) y por descripción."""
+    exact = {name: name for name in BULK_VARIABLES + CONTROL_COLUMNS}
+    exact.update(CONTROL_ALIASES)
+    folded = {}
+    for name, target in exact.items():
+        folded.setdefault(name.casefold(), set()).add(target)
+    # 'h' y 'H' solo se distinguen por mayúsculas
+    folded = {name: targets.pop() for name, targets in folded.items() if len(targets) == 1}
+    for name, description in VARIABLES_LEYENDA.items():
+        folded.setdefault(_normalize(description).casefold(), name)
+    return exact, folded
+
+
+_EXACT_HEADERS, _FOLDED_HEADERS = _header_index()
+
+
+def map_columns(headers: list, mapping: dict = None) -> dict:
+    """
+    Asocia los encabezados del archivo a variables y columnas de control.
+
+    Un encabezado se reconoce si, sin acentos ni unidades ('Ti (°C)', 'diámetro [m]'),
+    coincide con el nombre de una variable de `VARIABLES_LEYENDA` (o 'diametro'), de una
+    columna de control o de un alias de `CONTROL_ALIASES`; las mayúsculas se ignoran
+    salvo entre 'h' y 'H'. También se reconoce la descripción de la variable en
+    `VARIABLES_LEYENDA`. Los encabezados no reconocidos se copian a la salida sin usarse.
+
+    Args:
+        headers (list[str]): Encabezados del archivo, en orden.
+        mapping (dict, optional): Asociaciones explícitas {encabezado: variable}, que
+                                  tienen prioridad; None o '' como variable ignora la
+                                  columna.
+
+    Returns:
+        dict: {posición de la columna: variable o columna de control}.
+
+    Raises:
+        ValueError: Si el mapeo nombra un encabezado inexistente o una variable
+                    desconocida, o si dos columnas se asocian a la misma variable.
+    """
+    mapping = mapping or {}
+    for header, target in mapping.items():
+        if header not in headers:
+            raise ValueError(f"La columna '{header}' del mapeo no existe en el archivo.")
+        if target and target not in BULK_VARIABLES + CONTROL_COLUMNS:
+            raise ValueError(f"La columna '{header}' se asocia a una variable desconocida: '{target}'.")
+
+    targets = {}
+    sources = {}
+    for position, header in enumerate(headers):
+        if header in mapping:
+            target = mapping[header] or None
+        else:
+            name = _normalize(header)
+            target = _EXACT_HEADERS.get(name) or _FOLDED_HEADERS.get(name.casefold())
+        if target is None:
+            continue
+        if target in sources:
+            raise ValueError(
+                f"Las columnas '{sources[target]}' y '{header}' se asocian a la misma variable '{target}'."
+            )
+        sources[target] = header
+        targets[position] = target
+    return targets
+
+
+def _control_values(values: dict, name: str, size: int, defaults: dict) -> list:
+    """Valor de una columna de control en cada fila (el común si la celda está vacía)."""
+    default = defaults.get(name)
+    column = values.get(name)
+    if column is None:
+        cells = [default] * size
+    else:
+        cells = [str(cell).strip() if cell is not None and str(cell).strip() else default for cell in column]
+    if name in ('flow_type', 'orientation'):
+        return [cell.lower() if cell else None for cell in cells]
+    if name == 'equation_key':
+        # 'plano', 'cilindro' o 'esfera' bastan para las ecuaciones de óptimo económico
+        return [f'optimo_economico_{cell}' if cell and cell not in EQUATIONS
+                and f'optimo_economico_{cell}' in EQUATIONS else cell for cell in cells]
+    return cells
+
+
+def solve_chunk(values: dict, size: int, defaults: dict) -> dict:
+    """
+    Resuelve un bloque de filas ya separado en columnas.
+
+    Args:
+        values (dict): Columnas del bloque por variable o columna de control (ver
+                       `map_columns`), cada una con `size` valores (números o textos
+                       con punto decimal; vacíos o None donde no hay valor).
+        size (int): Número de filas.
+        defaults (dict): Valores comunes: 'equation_key', 'variable_to_solve',
+                         'flow_type', 'orientation' y 'known_values' (valores de las
+                         variables para las celdas vacías o las columnas ausentes).
+
+    Returns:
+        dict: Arreglos 'result' y 'h' (NaN donde no hay valor) y listas 'regime'
+              (nombre de la correlación, '' si 'h' no se calculó) y 'errors' (mensaje
+              por fila, None en las resueltas).
+    """
+    result = {'result': np.full(size, np.nan), 'h': np.full(size, np.nan),
+              'regime': [''] * size, 'errors': [None] * size}
+    if size == 0:
+        return result
+
+    arrays = {name: column_array(column, size) for name, column in values.items() if name not in CONTROL_COLUMNS}
+    for name, value in (defaults.get('known_values') or {}).items():
+        common = column_array(value, size)
+        arrays[name] = np.where(np.isnan(arrays[name]), common, arrays[name]) if name in arrays else common
+
+    groups = {}
+    keys = zip(*(_control_values(values, name, size, defaults) for name in CONTROL_COLUMNS))
+    for row, key in enumerate(keys):
+        groups.setdefault(key, []).append(row)
+
+    for (equation_key, variable_to_solve, flow_type, orientation), rows in groups.items():
+        rows = np.asarray(rows)
+        columns = {name: array[rows] for name, array in arrays.items()}
+        solved = solve_columns(equation_key, variable_to_solve, columns, rows.size, flow_type, orientation)
+        result['h'][rows] = solved['h']
+        for row, value, error in zip(rows, solved['result'], solved['errors']):
+            result['errors'][row] = error
+            if error is None:
+                result['result'][row] = value
+
+        if equation_key and equation_key.startswith('optimo_economico') and flow_type and orientation:
+            given_h = columns.get('h', np.full(rows.size, np.nan))
+            computed = (np.isnan(given_h) | (given_h == 0)) & np.isfinite(solved['h'])
+            if computed.any():
+                regimes = convection_regime_index(convection_inputs(columns, computed), flow_type, orientation,
+                                                  int(computed.sum()))
+                for row, index in zip(rows[computed], regimes):
+                    result['regime'][row] = CONVECTION_REGIMES[index] if index >= 0 else ''
+    return result
+
+
+def _result_names(targets: dict, defaults: dict) -> tuple:
+    """
+    Columnas de salida: la de la incógnita (la común, o 'result' si cada fila indica la
+    suya) seguida de `RESULT_COLUMNS` (sin repetir 'h' si es la incógnita).
+    """
+    if 'variable_to_solve' in targets.values():
+        name = MIXED_RESULT_COLUMN
+    else:
+        name = defaults.get('variable_to_solve') or MIXED_RESULT_COLUMN
+    return (name,) + tuple(column for column in RESULT_COLUMNS if column != name)
+
+
+def _output_positions(headers: list, targets: dict, names: tuple) -> dict:
+    """
+    Posición de cada columna de resultado: la de la columna de entrada con ese nombre
+    (o asociada a esa variable) o una nueva al final.
+    """
+    by_target = {target: position for position, target in targets.items()}
+    by_name = {_normalize(header).casefold(): position for position, header in enumerate(headers)}
+    positions = {}
+    width = len(headers)
+    for name in names:
+        position = by_target.get(name)
+        if position is None and by_name.get(name.casefold()) not in targets:
+            # Una columna con el mismo nombre que no se usa como variable ('H' no es 'h')
+            position = by_name.get(name.casefold())
+        if position is None or position in positions.values():
+            position = width
+            width += 1
+        positions[name] = position
+    return positions
+
+
+def _read_sample(stream, size: int) -> bytes:
+    """Lee hasta `size` bytes (menos solo al final del flujo)."""
+    parts = []
+    remaining = size
+    while remaining > 0:
+        part = stream.read(remaining)
+        if not part:
+            break
+        parts.append(part)
+        remaining -= len(part)
+    return b''.join(parts)
+
+
+class _PrefixedStream(io.RawIOBase):
+    """Flujo de bytes que entrega primero `prefix` y luego el resto de `stream`."""
+
+    def __init__(self, prefix: bytes, stream):
+        self._prefix = memoryview(prefix)
+        self._stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if len(self._prefix):
+            count = min(len(buffer), len(self._prefix))
+            buffer[:count] = self._prefix[:count]
+            self._prefix = self._prefix[count:]
+            return count
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _sniff_csv(sample: bytes) -> tuple:
+    """Codificación, separador y uso de coma decimal a partir de los primeros bytes."""
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        encoding = 'utf-8-sig' if sample.startswith(codecs.BOM_UTF8) else 'utf-8'
+    except UnicodeDecodeError:
+        encoding = 'cp1252'
+    text = sample.decode(encoding, errors='ignore')
+    header, _, body = text.partition('\n')
+    counts = [header.count(delimiter) for delimiter in CSV_DELIMITERS]
+    delimiter = CSV_DELIMITERS[int(np.argmax(counts))] if max(counts) else CSV_DELIMITERS[0]
+    decimal_comma = delimiter != ',' and re.search(r'\d,\d', body) is not None
+    return encoding, delimiter, decimal_comma
+
+
+def _format_number(value: float, decimal_comma: bool) -> str:
+    """Número para una celda CSV ('' si es NaN)."""
+    if np.isnan(value):
+        return ''
+    text = repr(float(value))
+    return text.replace('.', ',') if decimal_comma else text
+
+
+def csv_results(stream, defaults: dict, mapping: dict = None, chunk_rows: int = BULK_CHUNK_ROWS):
+    """
+    Procesa un archivo CSV de casos y devuelve los bloques del CSV de salida.
+
+    El encabezado se lee y se valida antes de devolver el iterador, así que los errores
+    de formato se informan antes de empezar a responder. Las filas vacías se omiten y
+    el flujo se cierra al terminar.
+
+    Args:
+        stream: Flujo binario con el archivo (se lee solo a medida que se consume el iterador).
+        defaults (dict): Valores comunes (ver `solve_chunk`).
+        mapping (dict, optional): Asociaciones explícitas de encabezados (ver `map_columns`).
+        chunk_rows (int, optional): Filas por bloque.
+
+    Returns:
+        tuple: (iterador de bytes con el CSV de salida, su codificación: 'utf-8' o
+               'windows-1252', la misma de la entrada).
+
+    Raises:
+        ValueError: Si el archivo está vacío o sus encabezados no se pueden asociar.
+    """
+    sample = _read_sample(stream, SNIFF_BYTES)
+    encoding, delimiter, decimal_comma = _sniff_csv(sample)
+    text = io.TextIOWrapper(io.BufferedReader(_PrefixedStream(sample, stream)), encoding=encoding,
+                            errors='replace', newline='')
+    reader = csv.reader(text, delimiter=delimiter)
+    headers = next(reader, None)
+    if not headers or not any(cell.strip() for cell in headers):
+        raise ValueError('El archivo CSV está vacío o no tiene encabezados.')
+    headers = [header.strip() for header in headers]
+    targets = map_columns(headers, mapping)
+    if not targets:
+        raise ValueError('Ninguna columna del archivo corresponde a una variable de cálculo.')
+    names = _result_names(targets, defaults)
+    positions = _output_positions(headers, targets, names)
+    width = max(len(headers), *(position + 1 for position in positions.values()))
+    output_headers = headers + [''] * (width - len(headers))
+    for name, position in positions.items():
+        output_headers[position] = name
+
+    charset = 'windows-1252' if encoding == 'cp1252' else 'utf-8'
+
+    def encode_rows(rows):
+        buffer = io.StringIO()
+        csv.writer(buffer, delimiter=delimiter, lineterminator='\r\n').writerows(rows)
+        return buffer.getvalue().encode(charset, errors='replace')
+
+    def solve_rows(rows):
+        values = {}
+        for position, target in targets.items():
+            column = [row[position].strip() for row in rows]
+            if target not in CONTROL_COLUMNS and decimal_comma:
+                column = [cell.replace(',', '.') for cell in column]
+            values[target] = column
+        solved = solve_chunk(values, len(rows), defaults)
+        cells = {
+            'h': [_format_number(value, decimal_comma) for value in solved['h']],
+            'regime': solved['regime'],
+            'error': [error or '' for error in solved['errors']],
+            names[0]: [_format_number(value, decimal_comma) for value in solved['result']],
+        }
+        for name, position in positions.items():
+            for row, cell in zip(rows, cells[name]):
+                row[position] = cell
+        return encode_rows(rows)
+
+    def generate():
+        try:
+            # La salida conserva el BOM de la entrada (Excel lo usa para reconocer UTF-8)
+            yield (codecs.BOM_UTF8 if encoding == 'utf-8-sig' else b'') + encode_rows([output_headers])
+            rows = []
+            for row in reader:
+                if not any(cell.strip() for cell in row):
+                    continue
+                rows.append((row + [''] * width)[:width])
+                if len(rows) == chunk_rows:
+                    yield solve_rows(rows)
+                    rows = []
+            if rows:
+                yield solve_rows(rows)
+        finally:
+            stream.close()
+
+    return generate(), charset
+
+
+class _DrainableSink:
+    """Destino de escritura para `pyarrow` cuyo contenido se retira por partes."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def writable(self) -> bool:
+        return True
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        """Devuelve lo escrito desde la última llamada."""
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def parquet_results(source, defaults: dict, mapping: dict = None, chunk_rows: int = BULK_CHUNK_ROWS):
+    """
+    Procesa un archivo Parquet de casos y devuelve los bloques del Parquet de salida.
+
+    Args:
+        source: Archivo binario con el Parquet (se cierra al terminar); si no es
+                posicionable (por ejemplo, el cuerpo de la solicitud) se copia antes a
+                un archivo temporal.
+        defaults (dict): Valores comunes (ver `solve_chunk`).
+        mapping (dict, optional): Asociaciones explícitas de encabezados (ver `map_columns`).
+        chunk_rows (int, optional): Filas por bloque (y por grupo de filas de la salida).
+
+    Returns:
+        iterator[bytes]: El archivo Parquet de salida por partes.
+
+    Raises:
+        ImportError: Si `pyarrow` no está instalado.
+        ValueError: Si el archivo no es un Parquet válido o sus columnas no se pueden asociar.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if not (hasattr(source, 'seekable') and source.seekable()):
+        spooled = tempfile.TemporaryFile()
+        shutil.copyfileobj(source, spooled)
+        spooled.seek(0)
+        source = spooled
+    try:
+        parquet = pq.ParquetFile(source)
+    except (pa.ArrowInvalid, OSError) as e:
+        raise ValueError(f'El archivo no es un Parquet válido: {e}') from e
+    headers = parquet.schema_arrow.names
+    targets = map_columns(headers, mapping)
+    if not targets:
+        raise ValueError('Ninguna columna del archivo corresponde a una variable de cálculo.')
+    names = _result_names(targets, defaults)
+    positions = _output_positions(headers, targets, names)
+
+    def solve_table(table):
+        values = {}
+        for position, target in targets.items():
+            column = table.column(position)
+            values[target] = column.to_pylist() if target in CONTROL_COLUMNS else column.to_numpy()
+        solved = solve_chunk(values, table.num_rows, defaults)
+        arrays = {
+            'h': pa.array(solved['h'], type=pa.float64(), from_pandas=True),
+            'regime': pa.array([regime or None for regime in solved['regime']], type=pa.string()),
+            'error': pa.array(solved['errors'], type=pa.string()),
+            names[0]: pa.array(solved['result'], type=pa.float64(), from_pandas=True),
+        }
+        for name, position in sorted(positions.items(), key=lambda item: item[1]):
+            if position < len(headers):
+                table = table.set_column(position, name, arrays[name])
+            else:
+                table = table.append_column(name, arrays[name])
+        return table
+
+    def generate():
+        sink = _DrainableSink()
+        writer = None
+        try:
+            batches = parquet.iter_batches(batch_size=chunk_rows)
+            for batch in batches:
+                table = solve_table(pa.Table.from_batches([batch]))
+                if writer is None:
+                    writer = pq.ParquetWriter(pa.PythonFile(sink, mode='w'), table.schema)
+                writer.write_table(table)
+                yield sink.drain()
+            if writer is None:
+                table = solve_table(parquet.schema_arrow.empty_table())
+                writer = pq.ParquetWriter(pa.PythonFile(sink, mode='w'), table.schema)
+            writer.close()
+            yield sink.drain()
+        finally:
+            source.close()
+
+    return generate()
@@ -0,0 +1,231 @@
+"""
+Formatos binarios columnares para resultados numéricos grandes (barridos, mallas y lotes).
+
+Un resultado se describe como una lista de columnas con nombre: un arreglo de NumPy
+(float64 o int64) y, opcionalmente, su máscara de validez (False donde no hay valor,
+por ejemplo en los puntos sin solución). Los metadatos (forma de la malla, iteraciones,
+mensajes de error, ...) van aparte como un diccionario serializable a JSON.
+
+Formatos:
+- 'columns' (`application/vnd.calc-columns`): formato propio, sin dependencias.
+  Los datos de cada columna van en crudo (little-endian) y alineados a 8 bytes, de modo
+  que se leen sin copiar (`np.frombuffer`, `Float64Array` en JavaScript). Estructura:
+    1. 8 bytes: firma `CALCCOL` seguida del byte de versión (1).
+    2. 4 bytes: longitud de la cabecera JSON (uint32, little-endian).
+    3. Cabecera JSON (UTF-8, rellenada con espacios hasta que el cuerpo empiece en un
+       múltiplo de 8): 'length' (filas), 'columns' (por columna, 'name', 'dtype',
+       'offset' y 'validity', con los desplazamientos medidos desde el inicio del
+       cuerpo) y 'metadata'.
+    4. Cuerpo: los datos de cada columna y sus mapas de validez. El mapa de validez
+       tiene un bit por fila, el menos significativo primero (como en Arrow): 1 si hay
+       valor. Es null si todas las filas tienen valor.
+- 'npy' (`application/x-npy`): un arreglo estructurado de NumPy con un campo float64 por
+  columna (NaN donde no hay valor) y la forma indicada (por ejemplo, la de la malla).
+  Se lee con `np.load`; no lleva metadatos ni mapas de validez.
+- 'arrow' (`application/vnd.apache.arrow.stream`): formato IPC (stream) de Apache Arrow,
+  con valores nulos según la máscara de validez y los metadatos en el esquema (clave
+  'calc'). Requiere `pyarrow`, que es opcional.
+
+Funciones principales:
+- available_formats: Formatos que se pueden generar en este entorno.
+- encode: Codifica columnas y metadatos en el formato indicado.
+- decode_columns: Lee el formato 'columns' sin copiar los datos.
+"""
+import io
+import json
+import struct
+
+import numpy as np
+
+MAGIC = b'CALCCOL\x01'
+ALIGNMENT = 8
+
+FORMAT_MIMETYPES = {
+    'columns': 'application/vnd.calc-columns',
+    'npy': 'application/x-npy',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+
+
+def arrow_available() -> bool:
+    """True si `pyarrow` está instalado."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def available_formats() -> list:
+    """
+    Formatos que se pueden generar en este entorno.
+
+    Returns:
+        list[str]: 'columns', 'npy' y, si `pyarrow` está instalado, 'arrow'.
+    """
+    formats = ['columns', 'npy']
+    if arrow_available():
+        formats.append('arrow')
+    return formats
+
+
+def _padding(size: int) -> int:
+    """Bytes de relleno para que `size` sea múltiplo de `ALIGNMENT`."""
+    return -size % ALIGNMENT
+
+
+def _normalize(columns: list) -> list:
+    """Convierte las columnas en (nombre, arreglo little-endian, validez o None)."""
+    normalized = []
+    for name, values, valid in columns:
+        values = np.asarray(values)
+        dtype = '<i8' if np.issubdtype(values.dtype, np.integer) else '<f8'
+        values = np.ascontiguousarray(values.ravel(), dtype=dtype)
+        if valid is not None:
+            valid = np.asarray(valid, dtype=bool).ravel()
+            if valid.all():
+                valid = None
+        normalized.append((name, values, valid))
+    return normalized
+
+
+def encode_columns(columns: list, metadata: dict = None) -> bytes:
+    """
+    Codifica columnas en el formato 'columns' (ver la descripción del módulo).
+
+    Args:
+        columns (list[tuple[str, numpy.ndarray, numpy.ndarray | None]]): Columnas como
+            (nombre, valores, máscara de validez o None), todas de igual longitud.
+        metadata (dict, optional): Metadatos serializables a JSON.
+
+    Returns:
+        bytes: El resultado codificado.
+    """
+    columns = _normalize(columns)
+    length = columns[0][1].size if columns else 0
+    parts, descriptors, offset = [], [], 0
+    for name, values, valid in columns:
+        descriptor = {'name': name, 'dtype': values.dtype.str, 'offset': offset, 'validity': None}
+        parts.append(values.tobytes())
+        offset += values.nbytes
+        if valid is not None:
+            bitmap = np.packbits(valid, bitorder='little').tobytes()
+            descriptor['validity'] = offset
+            parts.append(bitmap + b'\0' * _padding(len(bitmap)))
+            offset += len(bitmap) + _padding(len(bitmap))
+        descriptors.append(descriptor)
+
+    header = json.dumps({'length': length, 'columns': descriptors, 'metadata': metadata or {}},
+                        separators=(',', ':')).encode('utf-8')
+    header += b' ' * _padding(len(MAGIC) + 4 + len(header))
+    return b''.join([MAGIC, struct.pack('<I', len(header)), header] + parts)
+
+
+def decode_columns(buffer) -> tuple:
+    """
+    Lee un resultado en el formato 'columns' sin copiar los datos.
+
+    Args:
+        buffer (bytes | bytearray | memoryview): El resultado codificado.
+
+    Returns:
+        tuple[dict, dict]: Columnas por nombre, como pares (valores, máscara de validez),
+                           donde los valores son vistas sobre `buffer` y la máscara es
+                           None si todas las filas tienen valor; y los metadatos.
+
+    Raises:
+        ValueError: Si el contenido no tiene la firma del formato.
+    """
+    view = memoryview(buffer)
+    if bytes(view[:len(MAGIC)]) != MAGIC:
+        raise ValueError("El contenido no está en el formato 'columns'.")
+    (header_length,) = struct.unpack('<I', view[len(MAGIC):len(MAGIC) + 4])
+    body = len(MAGIC) + 4 + header_length
+    header = json.loads(bytes(view[len(MAGIC) + 4:body]))
+    length = header['length']
+    columns = {}
+    for descriptor in header['columns']:
+        values = np.frombuffer(view, dtype=descriptor['dtype'], count=length, offset=body + descriptor['offset'])
+        valid = None
+        if descriptor['validity'] is not None:
+            bitmap = np.frombuffer(view, dtype=np.uint8, count=-(-length // 8), offset=body + descriptor['validity'])
+            valid = np.unpackbits(bitmap, count=length, bitorder='little').astype(bool)
+        columns[descriptor['name']] = (values, valid)
+    return columns, header['metadata']
+
+
+def encode_npy(columns: list, shape: tuple = None) -> bytes:
+    """
+    Codifica columnas como un arreglo estructurado `.npy` con NaN donde no hay valor.
+
+    Args:
+        columns (list[tuple[str, numpy.ndarray, numpy.ndarray | None]]): Columnas como
+            en `encode_columns`.
+        shape (tuple, optional): Forma del arreglo (por defecto, una dimensión).
+
+    Returns:
+        bytes: El contenido del archivo `.npy`.
+    """
+    columns = _normalize(columns)
+    length = columns[0][1].size if columns else 0
+    table = np.empty(length, dtype=[(name, '<f8') for name, _, _ in columns])
+    for name, values, valid in columns:
+        table[name] = values
+        if valid is not None:
+            table[name][~valid] = np.nan
+    output = io.BytesIO()
+    np.save(output, table.reshape(shape or (length,)), allow_pickle=False)
+    return output.getvalue()
+
+
+def encode_arrow(columns: list, metadata: dict = None) -> bytes:
+    """
+    Codifica columnas en el formato IPC (stream) de Apache Arrow.
+
+    Args:
+        columns (list[tuple[str, numpy.ndarray, numpy.ndarray | None]]): Columnas como
+            en `encode_columns`.
+        metadata (dict, optional): Metadatos; se guardan en JSON en el esquema (clave 'calc').
+
+    Returns:
+        bytes: El flujo IPC.
+
+    Raises:
+        ImportError: Si `pyarrow` no está instalado.
+    """
+    import pyarrow as pa
+
+    columns = _normalize(columns)
+    arrays = [pa.array(values, mask=None if valid is None else ~valid) for _, values, valid in columns]
+    table = pa.Table.from_arrays(arrays, names=[name for name, _, _ in columns])
+    table = table.replace_schema_metadata({'calc': json.dumps(metadata or {})})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode(fmt: str, columns: list, metadata: dict = None, shape: tuple = None) -> bytes:
+    """
+    Codifica columnas y metadatos en el formato indicado.
+
+    Args:
+        fmt (str): 'columns', 'npy' o 'arrow'.
+        columns (list[tuple[str, numpy.ndarray, numpy.ndarray | None]]): Columnas como
+            (nombre, valores, máscara de validez o None).
+        metadata (dict, optional): Metadatos serializables a JSON (no se incluyen en 'npy').
+        shape (tuple, optional): Forma del arreglo en 'npy' (por ejemplo, la de la malla).
+
+    Returns:
+        bytes: El resultado codificado.
+
+    Raises:
+        ValueError: Si el formato no existe.
+    """
+    if fmt == 'columns':
+        return encode_columns(columns, metadata)
+    if fmt == 'npy':
+        return encode_npy(columns, shape)
+    if fmt == 'arrow':
+        return encode_arrow(columns, metadata)
+    raise ValueError(f"Formato binario no válido: '{fmt}'.")
@@ -0,0 +1,268 @@
+"""
+Selección del espesor comercial: de la solución continua a una configuración comprable.
+
+El espesor de mínimo costo es un número real, pero el aislamiento se compra en
+espesores fijos que pueden apilarse en capas. Este módulo construye, para una lista de
+espesores disponibles, el índice ordenado de todas las configuraciones de una o dos
+capas (su espesor total, sin repetir totales: ante un empate se prefiere la de menos
+capas) y, para cada caso, busca con `np.searchsorted` (O(log n)) las configuraciones
+vecinas del óptimo continuo de `services.economics.optimize_cost`, evalúa el costo total
+de cada una y de la superficie desnuda, y elige la más barata.
+
+Basta con las vecinas: por encima del radio crítico el costo tiene un único mínimo,
+así que la mejor opción discreta es una de las que rodean al óptimo continuo; por
+debajo, el costo crece desde la superficie desnuda hasta un máximo local antes del
+mínimo global, y a la izquierda de ese máximo ninguna opción mejora la superficie
+desnuda, que siempre se evalúa.
+
+Los índices se construyen una vez por lista de espesores y se reutilizan entre
+solicitudes. Los espesores disponibles se indican en la solicitud o se toman del
+catálogo de materiales (`services.materials`), caso por caso con 'material'.
+
+Funciones y clases principales:
+- ThicknessIndex: Configuraciones comerciales ordenadas por espesor total.
+- get_thickness_index: Devuelve el índice de una lista de espesores, construyéndolo la
+  primera vez.
+- select_commercial: Mejor configuración comercial de cada caso de un grupo.
+- format_commercial_result: Convierte el resultado de un caso a un diccionario
+  serializable a JSON.
+"""
+import threading
+
+import numpy as np
+
+from services.batch import column_array
+from services.economics import COST_BASIS, cost_breakdown, cost_inputs, heat_loss, insulation_volume, \
+    optimize_cost
+from services.materials import get_material_catalog
+
+# Máximo de capas apiladas admitido
+MAX_LAYERS = 2
+# Configuraciones vecinas del óptimo continuo que se evalúan a cada lado
+NEIGHBOR_OPTIONS = 2
+# Decimales (en m) con que se comparan los espesores totales
+TOTAL_DECIMALS = 9
+# Resultados por caso de `select_commercial` (arreglos float)
+COMMERCIAL_COLUMNS = ('e', 'layer_1', 'layer_2', 'e_continuous', 'cost_total_continuous', 'penalty')
+
+
+class ThicknessIndex:
+    """
+    Configuraciones comerciales (una o dos capas) ordenadas por espesor total.
+
+    Attributes:
+        totals (numpy.ndarray): Espesor total de cada configuración (m), creciente y sin
+                                repetidos.
+        layers (numpy.ndarray): Espesor de cada capa, forma (n, 2), la más gruesa primero
+                                y NaN en la segunda si la configuración es de una capa.
+    """
+
+    def __init__(self, thicknesses, max_layers: int = MAX_LAYERS):
+        single = np.unique(np.asarray(thicknesses, dtype=float))
+        single = single[np.isfinite(single) & (single > 0)]
+        if single.size == 0:
+            raise ValueError('Se necesita al menos un espesor comercial positivo.')
+        totals = [single]
+        layers = [np.column_stack([single, np.full(single.size, np.nan)])]
+        if max_layers >= 2:
+            first, second = np.triu_indices(single.size)
+            totals.append(single[first] + single[second])
+            layers.append(np.column_stack([single[second], single[first]]))
+        totals = np.round(np.concatenate(totals), TOTAL_DECIMALS)
+        layers = np.concatenate(layers)
+        # Orden por total y, ante un empate, primero la de menos capas
+        order = np.lexsort((~np.isnan(layers[:, 1]), totals))
+        totals, layers = totals[order], layers[order]
+        keep = np.concatenate([[True], np.diff(totals) > 0])
+        self.totals = totals[keep]
+        self.layers = layers[keep]
+
+    def __len__(self) -> int:
+        return self.totals.size
+
+    def neighbors(self, e, count: int = NEIGHBOR_OPTIONS) -> np.ndarray:
+        """
+        Posiciones de las configuraciones que rodean a cada espesor.
+
+        Args:
+            e (numpy.ndarray): Espesores continuos.
+            count (int, optional): Configuraciones a cada lado.
+
+        Returns:
+            numpy.ndarray: Posiciones en `totals`, forma (len(e), 2 * count), recortadas a
+                           los extremos del índice.
+        """
+        position = np.searchsorted(self.totals, e)
+        offsets = np.arange(-count, count)
+        return np.clip(position[:, None] + offsets, 0, len(self) - 1)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_thickness_index(thicknesses, max_layers: int = MAX_LAYERS) -> ThicknessIndex:
+    """
+    Devuelve el índice de configuraciones de una lista de espesores, construyéndolo la
+    primera vez.
+
+    Args:
+        thicknesses (Iterable[float]): Espesores comerciales disponibles (m).
+        max_layers (int, optional): 1 o 2 capas.
+
+    Returns:
+        ThicknessIndex: El índice (compartido; no debe modificarse).
+
+    Raises:
+        ValueError: Si no hay ningún espesor positivo.
+    """
+    key = (tuple(np.round(np.asarray(thicknesses, dtype=float), TOTAL_DECIMALS).tolist()), max_layers)
+    index = _indexes.get(key)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(key)
+            if index is None:
+                index = ThicknessIndex(key[0], max_layers)
+                _indexes[key] = index
+    return index
+
+
+def _material_defaults(columns: dict, size: int):
+    """
+    Resuelve la columna 'material': posiciones en el catálogo y, en los casos donde
+    faltan, 'C' y 'k' (evaluada en la temperatura media entre 'Ti' y 'Te', o 'Ta' si no
+    se indica).
+    """
+    columns = dict(columns)
+    materials = columns.pop('material')
+    if not isinstance(materials, (list, tuple)):
+        materials = [materials] * size
+    if len(materials) != size:
+        raise ValueError(f"Todas las columnas deben tener {size} valores (se recibieron {len(materials)}).")
+    catalog = get_material_catalog()
+    positions = catalog.positions(materials)
+    C = column_array(columns.get('C'), size)
+    columns['C'] = np.where(np.isnan(C), catalog.cost[positions], C)
+    k = column_array(columns.get('k'), size)
+    if np.isnan(k).any():
+        ti, ta, outer = (column_array(columns.get(name), size) for name in ('Ti', 'Ta', 'Te'))
+        outer = np.where(np.isnan(outer), ta, outer)
+        columns['k'] = np.where(np.isnan(k), catalog.conductivity(positions, 0.5 * (ti + outer)), k)
+    return columns, catalog, positions
+
+
+def select_commercial(equation_key: str, columns: dict, size: int, thicknesses=None,
+                      max_layers: int = MAX_LAYERS, flow_type: str = None, orientation: str = None) -> dict:
+    """
+    Elige la configuración comercial de mínimo costo total para `size` casos.
+
+    Args:
+        equation_key (str): Ecuación de óptimo económico (define la geometría).
+        columns (dict): Valores conocidos por variable, como en `optimize_cost`. Puede
+                        incluir 'material' (identificador o lista de identificadores del
+                        catálogo), que aporta los espesores si no se indica `thicknesses`,
+                        y 'C' y 'k' si faltan.
+        size (int): Número de casos.
+        thicknesses (Iterable[float], optional): Espesores comerciales disponibles (m),
+                                                 comunes a todos los casos.
+        max_layers (int, optional): 1 o 2 capas. Por defecto 2.
+        flow_type (str, optional): Tipo de flujo, necesario para calcular 'h'.
+        orientation (str, optional): Orientación, necesaria para calcular 'h'.
+
+    Returns:
+        dict: Arreglos (NaN donde no hay valor) 'e' (espesor total elegido, 0 si conviene
+              no aislar), 'layer_1' y 'layer_2' (espesor de cada capa; NaN si no hay),
+              'e_continuous' y 'cost_total_continuous' (el óptimo continuo), 'penalty'
+              (sobrecosto relativo de la opción comercial) y 'h', los de
+              `cost_breakdown` con el espesor elegido, 'basis' y 'errors'.
+
+    Raises:
+        ValueError: Si la ecuación no es de óptimo económico, `max_layers` no es 1 ni 2,
+                    no se indican espesores ni 'material', algún material no existe o
+                    alguna columna tiene una longitud distinta de `size`.
+    """
+    if max_layers not in (1, MAX_LAYERS):
+        raise ValueError(f"'max_layers' debe ser 1 o {MAX_LAYERS}.")
+    catalog = positions = None
+    if columns.get('material') is not None:
+        columns, catalog, positions = _material_defaults(columns, size)
+    if thicknesses is None and catalog is None:
+        raise ValueError("Indique los espesores comerciales ('thicknesses') o un 'material' del catálogo.")
+
+    inputs = cost_inputs(equation_key, columns, size, flow_type, orientation)
+    continuous = optimize_cost(equation_key, inputs['arrays'], size, flow_type, orientation, cross_check=False)
+    e_continuous = continuous['e']
+
+    # Grupos de casos con la misma lista de espesores
+    if thicknesses is not None:
+        groups = [(np.arange(size), get_thickness_index(thicknesses, max_layers))]
+    else:
+        groups = [(np.flatnonzero(positions == material),
+                   get_thickness_index(catalog.thicknesses[material], max_layers))
+                  for material in np.unique(positions)]
+
+    geometry = inputs['geometry']
+    e = np.full(size, np.nan)
+    layers = np.full((size, 2), np.nan)
+    for cases, index in groups:
+        cases = cases[np.isfinite(e_continuous[cases])]
+        if cases.size == 0:
+            continue
+        options = index.neighbors(e_continuous[cases])
+        option_e = np.concatenate([np.zeros((cases.size, 1)), index.totals[options]], axis=1)
+        C, k, h, delta_t, energy_factor = (inputs[name][cases, None] for name in
+                                           ('C', 'k', 'h', 'delta_t', 'energy_factor'))
+        r = None if inputs['r'] is None else inputs['r'][cases, None]
+        cost = C * insulation_volume(geometry, option_e, r) + energy_factor * heat_loss(
+            geometry, option_e, k, h, delta_t, r)
+        best = np.argmin(cost, axis=1)
+        rows = np.arange(cases.size)
+        e[cases] = option_e[rows, best]
+        insulated = best > 0
+        layers[cases[insulated]] = index.layers[options[rows[insulated], best[insulated] - 1]]
+
+    result = {
+        'e': e,
+        'layer_1': layers[:, 0],
+        'layer_2': layers[:, 1],
+        'e_continuous': e_continuous,
+        'cost_total_continuous': continuous['cost_total'],
+        'h': inputs['h'],
+        **cost_breakdown(inputs, e),
+        'basis': COST_BASIS[geometry],
+        'errors': inputs['errors'],
+    }
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result['penalty'] = result['cost_total'] / result['cost_total_continuous'] - 1.0
+    return result
+
+
+def format_commercial_result(result: dict, position: int) -> dict:
+    """
+    Devuelve el resultado de un caso de `select_commercial` como diccionario serializable a JSON.
+    """
+    def number(name):
+        value = float(result[name][position])
+        return None if np.isnan(value) else value
+
+    error = result['errors'][position]
+    if error:
+        return {'e': None, 'layers': [], 'h': number('h'), 'error': error}
+    return {
+        'e': number('e'),
+        'layers': [value for value in (number('layer_1'), number('layer_2')) if value is not None],
+        'e_continuous': number('e_continuous'),
+        'h': number('h'),
+        'cost': {
+            'insulation': number('cost_insulation'),
+            'energy': number('cost_energy'),
+            'total': number('cost_total'),
+            'annual': number('cost_annual'),
+        },
+        'cost_total_continuous': number('cost_total_continuous'),
+        'penalty': number('penalty'),
+        'heat_loss': number('heat_loss'),
+        'savings_annual': number('savings_annual'),
+        'payback_years': number('payback_years'),
+        'error': None,
+    }
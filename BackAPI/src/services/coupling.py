@@ -0,0 +1,301 @@
+"""
+Resolución acoplada del espesor con conductividad k(T) y temperatura de superficie.
+
+`solve_equation` trata 'k' como constante y calcula 'h' con la temperatura de
+superficie 'Te' que indica el usuario, pero ambas dependen del espesor: 'k' varía con
+la temperatura media del aislamiento, Tm = (Ti + Te) / 2, y 'Te' resulta del balance
+de calor a través del aislamiento y la capa de convección. Este módulo resuelve el
+sistema completo como un punto fijo sobre 'Te':
+
+    Te -> k(Tm), h(Te) -> e (ecuación del catálogo) -> Te' (balance de calor)
+
+con 'h' de las correlaciones de convección (`convection_coefficient_array`, las mismas
+de `calculate_convection_coefficient`) y Te' = Ta + q / (h · A), donde q es la pérdida
+de calor con el espesor obtenido (`services.economics.heat_loss`) y A la superficie
+exterior por unidad de instalación.
+
+El punto fijo de cada caso es escalar, por lo que se acelera con el método Δ² de
+Aitken (Steffensen): cada iteración evalúa el mapa dos veces y extrapola. Como
+f(Te) = Te' - Te es positiva en Ta y negativa en Ti, cada evaluación estrecha además un
+intervalo que contiene el punto fijo; una extrapolación fuera de él se descarta, y tras
+`ACCELERATED_ITERATIONS` se sigue por bisección. Así también terminan los casos sin
+punto fijo porque el mapa es discontinuo ('h' salta al cambiar de correlación
+laminar/turbulento, o la ecuación cambia de raíz): 'Te' queda en el salto y el caso se
+marca como discontinuo. Todo está
+vectorizado sobre los casos: cada evaluación resuelve a la vez los casos pendientes,
+partiendo del espesor de la evaluación anterior en las ecuaciones numéricas, y los
+casos que convergen dejan de evaluarse.
+
+k(Tm) = k0 + k1·Tm + k2·Tm² se indica con las variables 'k0', 'k1' y 'k2', o con
+'material' (identificador de `services.materials`, que aporta también 'C' si no se
+indica). Sin ellas, 'k' es constante y solo se acopla 'h'.
+
+Funciones principales:
+- surface_temperature: Temperatura de la superficie exterior del aislamiento.
+- solve_coupled: Punto fijo de 'e', 'Te', 'h' y k(Tm) para un grupo de casos.
+- format_coupled_result: Convierte el resultado de un caso a un diccionario serializable a JSON.
+"""
+import numpy as np
+
+from services.batch import H_INPUT_VARIABLES, column_array
+from services.economics import GEOMETRIES, heat_loss
+from services.materials import get_material_catalog
+from services.vectorized import STATUS_MENSAJES, STATUS_OK, convection_coefficient_array, solve_equation_array
+
+# Tolerancia absoluta (°C) sobre 'Te' y máximo de iteraciones
+DEFAULT_COUPLING_TOL = 1e-6
+DEFAULT_COUPLING_MAXITER = 50
+# Iteraciones aceleradas antes de seguir por bisección
+ACCELERATED_ITERATIONS = 8
+# Fracción de (Ti - Ta) con que se estima 'Te' cuando no se indica
+INITIAL_SURFACE_FRACTION = 0.1
+# Resultados por caso de `solve_coupled` (arreglos float)
+COUPLED_COLUMNS = ('e', 'Te', 'h', 'k', 'T_mean')
+
+
+def surface_temperature(geometry: str, e, k, h, Ti, Ta, r=None):
+    """
+    Temperatura de la superficie exterior del aislamiento según el balance de calor.
+
+    Args:
+        geometry (str): 'plano', 'cilindro' o 'esfera'.
+        e (numpy.ndarray): Espesor del aislamiento (m).
+        k (numpy.ndarray): Conductividad térmica del aislamiento.
+        h (numpy.ndarray): Coeficiente de convección exterior.
+        Ti (numpy.ndarray): Temperatura interna (°C).
+        Ta (numpy.ndarray): Temperatura ambiente (°C).
+        r (numpy.ndarray, optional): Radio interior (cilindro y esfera).
+
+    Returns:
+        numpy.ndarray: 'Te' en °C.
+    """
+    loss = heat_loss(geometry, e, k, h, Ti - Ta, r)
+    if geometry == 'plano':
+        area = 1.0
+    elif geometry == 'cilindro':
+        area = 2.0 * np.pi * (r + e)
+    else:
+        area = 4.0 * np.pi * (r + e) ** 2
+    return Ta + loss / (h * area)
+
+
+def _material_columns(columns: dict, size: int) -> dict:
+    """Sustituye 'material' por sus coeficientes de k(Tm) y, si falta, su costo 'C'."""
+    columns = dict(columns)
+    materials = columns.pop('material')
+    if not isinstance(materials, (list, tuple)):
+        materials = [materials] * size
+    if len(materials) != size:
+        raise ValueError(f"Todas las columnas deben tener {size} valores (se recibieron {len(materials)}).")
+    catalog = get_material_catalog()
+    positions = catalog.positions(materials)
+    for i, name in enumerate(('k0', 'k1', 'k2')):
+        columns[name] = catalog.k_coefficients[positions, i]
+    columns.setdefault('C', catalog.cost[positions])
+    return columns
+
+
+def solve_coupled(equation_key: str, columns: dict, size: int, flow_type: str = None,
+                  orientation: str = None, tol: float = DEFAULT_COUPLING_TOL,
+                  maxiter: int = DEFAULT_COUPLING_MAXITER) -> dict:
+    """
+    Resuelve 'e', 'Te', 'h' y k(Tm) de forma acoplada para `size` casos.
+
+    'h' se recalcula en cada iteración con las correlaciones de convección salvo en
+    los casos que lo indican; 'Te', si se indica, solo se usa como estimación inicial.
+
+    Args:
+        equation_key (str): Ecuación de óptimo económico ('optimo_economico_plano',
+                            'optimo_economico_cilindro' u 'optimo_economico_esfera').
+        columns (dict): Valores conocidos por variable: escalares o listas/arreglos de
+                        longitud `size`. Además de las variables de la ecuación admite
+                        'k0', 'k1' y 'k2' (k(Tm)) o 'material'.
+        size (int): Número de casos.
+        flow_type (str, optional): Tipo de flujo, necesario para calcular 'h'.
+        orientation (str, optional): Orientación, necesaria para calcular 'h'.
+        tol (float, optional): Tolerancia absoluta sobre 'Te' (°C).
+        maxiter (int, optional): Máximo de iteraciones (cada una evalúa el mapa una o
+                                 dos veces).
+
+    Returns:
+        dict: Arreglos (NaN donde no hay valor) 'e', 'Te', 'h', 'k' y 'T_mean';
+              'iterations' y 'evaluations' (iteraciones y evaluaciones del mapa por
+              caso), 'converged' y 'discontinuous' (bool por caso; el segundo indica que
+              no hay punto fijo porque el mapa salta y 'Te' quedó en el salto) y
+              'errors' (mensaje por caso o None).
+
+    Raises:
+        ValueError: Si la ecuación no es de óptimo económico, algún material no existe o
+                    alguna columna tiene una longitud distinta de `size`.
+    """
+    geometry = GEOMETRIES.get(equation_key)
+    if geometry is None:
+        raise ValueError(f"La resolución acoplada solo admite: {', '.join(GEOMETRIES)}.")
+
+    if columns.get('material') is not None:
+        columns = _material_columns(columns, size)
+    arrays = {
+        name: column_array(values, size)
+        for name, values in columns.items()
+        if name not in ('flow_type', 'orientation', 'material')
+    }
+    if geometry != 'plano' and 'r' not in arrays and 'diametro' in arrays:
+        arrays['r'] = arrays['diametro'] / 2
+    nan = np.full(size, np.nan)
+    Ti, Ta = arrays.get('Ti', nan), arrays.get('Ta', nan)
+    r = arrays.get('r') if geometry != 'plano' else None
+    temperature_dependent = 'k0' in arrays
+    if temperature_dependent:
+        k0 = arrays['k0']
+        k1, k2 = arrays.get('k1', np.zeros(size)), arrays.get('k2', np.zeros(size))
+    fixed_h = arrays.get('h', nan)
+    needs_h = np.isnan(fixed_h) | (fixed_h == 0)
+    # Igual que en /solve_equation, H toma el diámetro cuando no se indica
+    if 'diametro' in arrays:
+        arrays['H'] = np.where(np.isnan(arrays['H']), arrays['diametro'], arrays['H']) if 'H' in arrays \
+            else arrays['diametro']
+
+    errors = [None] * size
+    if needs_h.any() and (not flow_type or not orientation):
+        for i in np.flatnonzero(needs_h):
+            errors[i] = 'Faltan flow_type u orientation para calcular h'
+    k_known = arrays['k0'] if temperature_dependent else arrays.get('k', nan)
+    valid = np.isfinite(Ti) & np.isfinite(Ta) & (Ti != Ta) & np.isfinite(k_known)
+    if r is not None:
+        valid &= np.isfinite(r) & (r > 0)
+    for i in np.flatnonzero(~valid):
+        if errors[i] is None:
+            errors[i] = ("Datos no válidos: se necesitan Ti distinta de Ta, 'k' (o 'k0', 'k1', 'k2' o "
+                         "'material') y, en cilindro y esfera, 'r' o 'diametro' positivos.")
+    valid &= np.array([error is None for error in errors], dtype=bool)
+
+    low, high = np.minimum(Ti, Ta), np.maximum(Ti, Ta)
+    te_given = arrays.get('Te', nan)
+    te = np.where(np.isfinite(te_given) & (te_given >= low) & (te_given <= high),
+                  te_given, Ta + INITIAL_SURFACE_FRACTION * (Ti - Ta))
+
+    result = {name: np.full(size, np.nan) for name in COUPLED_COLUMNS}
+    iterations = np.zeros(size, dtype=int)
+    evaluations = np.zeros(size, dtype=int)
+    converged = np.zeros(size, dtype=bool)
+    discontinuous = np.zeros(size, dtype=bool)
+    failed = np.zeros(size, dtype=bool)
+
+    def evaluate(points, te_points):
+        """Evalúa el mapa de punto fijo en los casos `points`; devuelve el nuevo 'Te'."""
+        t_mean = 0.5 * (Ti[points] + te_points)
+        k = k0[points] + t_mean * (k1[points] + t_mean * k2[points]) if temperature_dependent \
+            else arrays['k'][points]
+        h = fixed_h[points].copy()
+        compute = needs_h[points]
+        if compute.any():
+            h_inputs = {name: arrays[name][points][compute] for name in H_INPUT_VARIABLES if name in arrays}
+            h_inputs['Te'] = te_points[compute]
+            h[compute] = convection_coefficient_array(h_inputs, flow_type, orientation, int(compute.sum()))
+        known_values = {name: values[points] for name, values in arrays.items()
+                        if name not in ('e', 'k0', 'k1', 'k2')}
+        known_values.update({'k': k, 'h': h})
+        previous = result['e'][points]
+        solution = solve_equation_array(equation_key, known_values, 'e', points.size,
+                                        x0=previous if np.isfinite(previous).all() else None)
+        e = np.where(solution['status'] == STATUS_OK, solution['values'], np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            te_new = surface_temperature(geometry, e, k, h, Ti[points], Ta[points],
+                                         None if r is None else r[points])
+        result['e'][points], result['h'][points], result['k'][points] = e, h, k
+        result['T_mean'][points], result['Te'][points] = t_mean, te_new
+        evaluations[points] += 1
+        bad = ~np.isfinite(te_new)
+        for position in np.flatnonzero(bad):
+            i = points[position]
+            if np.isnan(h[position]):
+                errors[i] = ('Error calculando h: no se encontró una correlación de convección aplicable '
+                             f"para flow_type='{flow_type}', orientation='{orientation}' con Te={te_points[position]:g}.")
+            else:
+                errors[i] = STATUS_MENSAJES.get(int(solution['status'][position]), 'No se pudo calcular e.')
+            failed[i] = True
+        return te_new
+
+    # f(Te) = G(Te) - Te es >= 0 en el extremo inferior y <= 0 en el superior: cada
+    # evaluación estrecha el intervalo que contiene el punto fijo
+    lower, upper = low.copy(), high.copy()
+
+    def narrow(points, x, x_new):
+        above = x_new > x
+        lower[points[above]] = x[above]
+        upper[points[~above]] = x[~above]
+
+    for _ in range(maxiter):
+        points = np.flatnonzero(valid & ~converged & ~failed)
+        if points.size == 0:
+            break
+        iterations[points] += 1
+        x0 = te[points]
+        x1 = evaluate(points, x0)
+        ok = np.isfinite(x1)
+        narrow(points[ok], x0[ok], x1[ok])
+        done = ok & (np.abs(x1 - x0) <= tol)
+        te[points] = np.where(ok, x1, x0)
+        converged[points[done]] = True
+
+        # Tras `ACCELERATED_ITERATIONS` sin converger (por ejemplo, cuando 'h' salta al
+        # cambiar de correlación y no hay punto fijo) se sigue por bisección
+        keep = ok & ~done
+        bisect = keep & (iterations[points] > ACCELERATED_ITERATIONS)
+        middle = points[bisect]
+        te[middle] = 0.5 * (lower[middle] + upper[middle])
+        keep &= ~bisect
+        points, x0, x1 = points[keep], x0[keep], x1[keep]
+        if points.size:
+            x2 = evaluate(points, x1)
+            ok = np.isfinite(x2)
+            narrow(points[ok], x1[ok], x2[ok])
+            done = ok & (np.abs(x2 - x1) <= tol)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                accelerated = x0 - (x1 - x0) ** 2 / (x2 - 2.0 * x1 + x0)
+            # Extrapolación fuera del intervalo o con denominador nulo: se toma la
+            # última evaluación o, si también queda fuera, el punto medio
+            a, b = lower[points], upper[points]
+            fallback = np.where((x2 > a) & (x2 < b), x2, 0.5 * (a + b))
+            te[points] = np.where(done, x2,
+                                  np.where((accelerated > a) & (accelerated < b), accelerated, fallback))
+            converged[points[done]] = True
+
+        # Intervalo agotado sin que 'Te' se repita: el mapa es discontinuo (cambio de
+        # correlación o de raíz) y el resultado queda en el salto
+        collapsed = valid & ~converged & ~failed & (upper - lower <= tol)
+        converged |= collapsed
+        discontinuous |= collapsed
+
+    # Casos agotados sin converger: se informa el último valor calculado
+    for i in np.flatnonzero(valid & ~converged & ~failed):
+        errors[i] = f'El acoplamiento no convergió en {maxiter} iteraciones.'
+    for name in COUPLED_COLUMNS:
+        result[name][failed | ~valid] = np.nan
+    result.update({
+        'iterations': iterations,
+        'evaluations': evaluations,
+        'converged': converged & ~failed,
+        'discontinuous': discontinuous & ~failed,
+        'errors': errors,
+    })
+    return result
+
+
+def format_coupled_result(result: dict, position: int) -> dict:
+    """
+    Devuelve el resultado de un caso de `solve_coupled` como diccionario serializable a JSON.
+    """
+    def number(name):
+        value = float(result[name][position])
+        return None if np.isnan(value) else value
+
+    formatted = {name: number(name) for name in COUPLED_COLUMNS}
+    formatted.update({
+        'iterations': int(result['iterations'][position]),
+        'evaluations': int(result['evaluations'][position]),
+        'converged': bool(result['converged'][position]),
+        'discontinuous': bool(result['discontinuous'][position]),
+        'error': result['errors'][position],
+    })
+    return formatted
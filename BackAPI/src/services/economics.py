@@ -0,0 +1,432 @@
+"""
+Optimización económica directa: minimiza el costo total del aislamiento.
+
+Las ecuaciones `optimo_economico_*` del catálogo son la condición de primer orden
+(derivada nula) del costo total durante la vida útil:
+
+    costo_total(e) = C * V(e) + B * q(e),   B = w * beta * vida_util * eta * 1e-3
+
+donde V(e) es el volumen de aislamiento y q(e) la pérdida de calor (W) por unidad de
+instalación: por m² en el plano, por metro de tubería en el cilindro y por esfera. B
+convierte vatios en costo de energía durante la vida útil con los mismos factores que
+las ecuaciones del catálogo ($/kWh, h/año, años y eta, 1e-3 de W a kW).
+
+En lugar de buscar la raíz de la condición (que falla cuando el residuo no cambia de
+signo en el intervalo de búsqueda), este módulo evalúa el costo y lo minimiza con un
+método acotado: el costo en e = 0 acota el óptimo (ningún espesor cuyo aislamiento
+cueste más que eso puede ser óptimo), el signo de la derivada del costo en unos
+espesores de ese intervalo encierra el mínimo y el mínimo se refina dentro del
+subintervalo, donde la derivada cambia de signo por construcción, con `bracketed_root`
+(Chandrupatla). En el plano, y en cilindros y esferas con radio mayor que 1.5 veces el
+radio crítico, la derivada cambia de signo una sola vez y bastan unos pocos espesores;
+con radios menores el costo puede tener un máximo local antes del mínimo y se barre el
+intervalo completo buscando dónde la derivada vuelve a ser positiva. Todo está
+vectorizado sobre los casos, sin intervalos de búsqueda que puedan quedar sin solución.
+
+Además del espesor, se informa el desglose del costo, la pérdida de calor con y sin
+aislamiento, el ahorro anual y el periodo de recuperación de la inversión. Como
+verificación cruzada se resuelve también la ecuación del catálogo con el motor
+vectorizado y se informa la diferencia relativa entre ambos espesores.
+
+La ecuación `optimo_economico_esfera` del catálogo no coincide con la derivada del
+costo de la esfera: en su denominador aparece (e + r)² donde la derivación da r². Por
+eso el motor de costo directo y la ecuación del catálogo difieren en la esfera (la
+verificación cruzada lo muestra); el motor de costo parte del modelo físico.
+
+Funciones principales:
+- insulation_volume: Volumen de aislamiento por unidad de instalación.
+- heat_loss: Pérdida de calor por unidad de instalación.
+- marginal_cost: Derivada del costo total respecto del espesor.
+- cost_inputs: Prepara y valida los datos del costo para un grupo de casos.
+- cost_breakdown: Desglose del costo, pérdidas, ahorro y recuperación con un espesor dado.
+- optimize_cost: Espesor de mínimo costo, desglose y recuperación para un grupo de casos.
+- format_cost_result: Convierte el resultado de un caso a un diccionario serializable a JSON.
+"""
+import numpy as np
+
+from services.batch import column_array, fill_convection_h
+from services.vectorized import STATUS_OK, bracketed_root, solve_equation_array
+
+# Geometría de cada ecuación de óptimo económico
+GEOMETRIES = {
+    'optimo_economico_plano': 'plano',
+    'optimo_economico_cilindro': 'cilindro',
+    'optimo_economico_esfera': 'esfera',
+}
+# Unidad de instalación a la que se refieren costos y pérdidas de cada geometría
+COST_BASIS = {'plano': 'm2', 'cilindro': 'm', 'esfera': 'unidad'}
+# Resultados por caso de `optimize_cost` (arreglos float)
+COST_COLUMNS = ('e', 'h', 'cost_insulation', 'cost_energy', 'cost_total', 'cost_annual',
+                'heat_loss', 'heat_loss_bare', 'savings_annual', 'payback_years')
+# Variables necesarias (además de 'h' y, en cilindro y esfera, 'r' o 'diametro')
+COST_VARIABLES = ('k', 'C', 'Ti', 'Ta', 'w', 'beta', 'vida_util', 'eta')
+
+# Radio crítico de cada geometría, en múltiplos de k/h
+CRITICAL_RADIUS_FACTOR = {'cilindro': 1.0, 'esfera': 2.0}
+# Por encima de este múltiplo del radio crítico el costo tiene un único mínimo
+UNIMODAL_RADIUS_FACTOR = 1.5
+# Fracciones del espesor máximo donde se evalúa el signo de la derivada del costo
+# cuando el costo tiene un único mínimo
+PROBE_FRACTIONS = np.geomspace(1e-2, 0.5, 4)
+# Fracciones del espesor máximo donde se evalúa el signo de la derivada del costo para
+# encerrar el mínimo en los demás casos: logarítmicas cerca de cero y lineales en el resto
+SCAN_FRACTIONS = np.concatenate([[0.0], np.geomspace(1e-3, 0.05, 5), np.linspace(0.1, 1.0, 10)])
+# Tolerancia (m) y máximo de iteraciones del refinamiento del mínimo
+MINIMIZE_XTOL = 1e-6
+MINIMIZE_MAXITER = 50
+
+
+def insulation_volume(geometry: str, e, r=None):
+    """
+    Volumen de aislamiento de espesor `e` por unidad de instalación.
+
+    Args:
+        geometry (str): 'plano', 'cilindro' o 'esfera'.
+        e (numpy.ndarray): Espesores (m).
+        r (numpy.ndarray, optional): Radios interiores (m), en cilindro y esfera.
+
+    Returns:
+        numpy.ndarray: m³ por m² (plano), por metro (cilindro) o por esfera.
+    """
+    if geometry == 'plano':
+        return e
+    if geometry == 'cilindro':
+        return np.pi * e * (2.0 * r + e)
+    return 4.0 / 3.0 * np.pi * e * (3.0 * r * r + 3.0 * r * e + e * e)
+
+
+def heat_loss(geometry: str, e, k, h, delta_t, r=None):
+    """
+    Pérdida de calor a través del aislamiento y la convección exterior.
+
+    Con `e` = 0 es la pérdida de la superficie desnuda.
+
+    Args:
+        geometry (str): 'plano', 'cilindro' o 'esfera'.
+        e (numpy.ndarray): Espesores (m).
+        k (numpy.ndarray): Conductividad del aislamiento (W/m°C).
+        h (numpy.ndarray): Coeficiente de convección exterior (W/m²K).
+        delta_t (numpy.ndarray): Ti - Ta (°C).
+        r (numpy.ndarray, optional): Radios interiores (m), en cilindro y esfera.
+
+    Returns:
+        numpy.ndarray: W por m² (plano), por metro (cilindro) o por esfera.
+    """
+    if geometry == 'plano':
+        return delta_t / (e / k + 1.0 / h)
+    outer = r + e
+    if geometry == 'cilindro':
+        return 2.0 * np.pi * delta_t / (np.log(outer / r) / k + 1.0 / (outer * h))
+    return 4.0 * np.pi * delta_t / ((1.0 / r - 1.0 / outer) / k + 1.0 / (outer * outer * h))
+
+
+def marginal_cost(geometry: str, e, C, k, h, delta_t, energy_factor, r=None):
+    """
+    Derivada del costo total respecto del espesor: C * V'(e) + B * q'(e).
+
+    Args:
+        geometry (str): 'plano', 'cilindro' o 'esfera'.
+        e (numpy.ndarray): Espesores (m).
+        C (numpy.ndarray): Costo del aislamiento ($/m³).
+        k (numpy.ndarray): Conductividad del aislamiento (W/m°C).
+        h (numpy.ndarray): Coeficiente de convección exterior (W/m²K).
+        delta_t (numpy.ndarray): Ti - Ta (°C).
+        energy_factor (numpy.ndarray): B, costo de 1 W durante la vida útil ($/W).
+        r (numpy.ndarray, optional): Radios interiores (m), en cilindro y esfera.
+
+    Returns:
+        numpy.ndarray: $ por metro de espesor, por unidad de instalación.
+    """
+    if geometry == 'plano':
+        resistance = e / k + 1.0 / h
+        return C - energy_factor * delta_t / (k * resistance * resistance)
+    outer = r + e
+    if geometry == 'cilindro':
+        resistance = np.log(outer / r) / k + 1.0 / (outer * h)
+        d_resistance = 1.0 / (k * outer) - 1.0 / (h * outer * outer)
+        return 2.0 * np.pi * (C * outer - energy_factor * delta_t * d_resistance / (resistance * resistance))
+    resistance = (1.0 / r - 1.0 / outer) / k + 1.0 / (outer * outer * h)
+    d_resistance = 1.0 / (k * outer * outer) - 2.0 / (h * outer * outer * outer)
+    return 4.0 * np.pi * (C * outer * outer - energy_factor * delta_t * d_resistance / (resistance * resistance))
+
+
+def _upper_bound(geometry: str, bare_cost, C, r):
+    """Espesor cuyo solo aislamiento cuesta lo mismo que la superficie desnuda."""
+    volume = bare_cost / C
+    if geometry == 'plano':
+        return volume
+    if geometry == 'cilindro':
+        return np.sqrt(r ** 2 + volume / np.pi) - r
+    return np.cbrt(r ** 3 + volume / (4.0 / 3.0 * np.pi)) - r
+
+
+def cost_inputs(equation_key: str, columns: dict, size: int, flow_type: str = None,
+                orientation: str = None) -> dict:
+    """
+    Prepara y valida los datos del costo total para `size` casos de una misma geometría.
+
+    'h' se calcula con las correlaciones de convección cuando no se indica, como en
+    `/solve_batch` (ver `services.batch.fill_convection_h`), y 'r' se toma de
+    'diametro' cuando no se indica.
+
+    Args:
+        equation_key (str): Ecuación de óptimo económico ('optimo_economico_plano',
+                            'optimo_economico_cilindro' u 'optimo_economico_esfera').
+        columns (dict): Valores conocidos por variable: escalares o listas/arreglos de
+                        longitud `size`.
+        size (int): Número de casos.
+        flow_type (str, optional): Tipo de flujo, necesario para calcular 'h'.
+        orientation (str, optional): Orientación, necesaria para calcular 'h'.
+
+    Returns:
+        dict: 'geometry', 'arrays' (todas las columnas como arreglos), los arreglos 'C',
+              'k', 'h', 'r' (None en el plano), 'delta_t', 'annual_factor' (de W a $/año),
+              'energy_factor' (de W a $ durante la vida útil) y 'vida_util'; 'valid'
+              (bool por caso) y 'errors' (mensaje por caso o None).
+
+    Raises:
+        ValueError: Si la ecuación no es de óptimo económico o alguna columna tiene
+                    una longitud distinta de `size`.
+    """
+    geometry = GEOMETRIES.get(equation_key)
+    if geometry is None:
+        raise ValueError(f"La optimización de costo solo admite: {', '.join(GEOMETRIES)}.")
+
+    arrays = {
+        name: column_array(values, size)
+        for name, values in columns.items()
+        if name not in ('flow_type', 'orientation')
+    }
+    errors = [None] * size
+    h = fill_convection_h(equation_key, arrays, size, flow_type, orientation, errors)
+    if geometry != 'plano' and 'r' not in arrays and 'diametro' in arrays:
+        arrays['r'] = arrays['diametro'] / 2
+
+    required = COST_VARIABLES + (() if geometry == 'plano' else ('r',))
+    values = {name: arrays.get(name, np.full(size, np.nan)) for name in required}
+    k, C, r = values['k'], values['C'], values.get('r')
+    delta_t = values['Ti'] - values['Ta']
+    annual_factor = values['w'] * values['beta'] * values['eta'] * 1e-3
+    energy_factor = annual_factor * values['vida_util']
+
+    valid = np.isfinite(h) & np.all([np.isfinite(values[name]) for name in required], axis=0)
+    for i in np.flatnonzero(~valid):
+        if errors[i] is None:
+            missing = [name for name in required if not np.isfinite(values[name][i])]
+            errors[i] = f"Faltan valores conocidos para calcular el costo: {', '.join(missing or ['h'])}."
+    positive = (k > 0) & (C > 0) & (h > 0) & (delta_t > 0) & (energy_factor > 0)
+    if geometry != 'plano':
+        positive &= r > 0
+    for i in np.flatnonzero(valid & ~positive):
+        errors[i] = 'Datos no válidos: k, C, h, r y los factores de energía deben ser positivos y Ti mayor que Ta.'
+    valid &= positive
+    return {
+        'geometry': geometry,
+        'arrays': arrays,
+        'C': C,
+        'k': k,
+        'h': h,
+        'r': r,
+        'delta_t': delta_t,
+        'annual_factor': annual_factor,
+        'energy_factor': energy_factor,
+        'vida_util': values['vida_util'],
+        'valid': valid,
+        'errors': errors,
+    }
+
+
+def cost_breakdown(inputs: dict, e) -> dict:
+    """
+    Desglose del costo total con un espesor dado.
+
+    Args:
+        inputs (dict): Datos de `cost_inputs`.
+        e (numpy.ndarray): Espesor de cada caso (m).
+
+    Returns:
+        dict: Arreglos 'cost_insulation', 'cost_energy', 'cost_total' (durante la vida
+              útil), 'cost_annual', 'heat_loss', 'heat_loss_bare' (W), 'savings_annual'
+              ($/año) y 'payback_years' (0 sin aislamiento).
+    """
+    geometry, C, k, h, r = inputs['geometry'], inputs['C'], inputs['k'], inputs['h'], inputs['r']
+    delta_t = inputs['delta_t']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cost_insulation = C * insulation_volume(geometry, e, r)
+        loss = heat_loss(geometry, e, k, h, delta_t, r)
+        loss_bare = heat_loss(geometry, np.zeros(np.shape(e)), k, h, delta_t, r)
+        cost_energy = inputs['energy_factor'] * loss
+        savings = (loss_bare - loss) * inputs['annual_factor']
+        payback = np.where(savings > 0, cost_insulation / savings, np.nan)
+    payback[e == 0] = 0.0
+    return {
+        'cost_insulation': cost_insulation,
+        'cost_energy': cost_energy,
+        'cost_total': cost_insulation + cost_energy,
+        'cost_annual': (cost_insulation + cost_energy) / inputs['vida_util'],
+        'heat_loss': loss,
+        'heat_loss_bare': loss_bare,
+        'savings_annual': savings,
+        'payback_years': payback,
+    }
+
+
+def optimize_cost(equation_key: str, columns: dict, size: int, flow_type: str = None,
+                  orientation: str = None, cross_check: bool = True) -> dict:
+    """
+    Calcula el espesor de mínimo costo total para `size` casos de una misma geometría.
+
+    Los datos se preparan con `cost_inputs` ('h' se calcula con las correlaciones de
+    convección cuando no se indica).
+
+    Args:
+        equation_key (str): Ecuación de óptimo económico ('optimo_economico_plano',
+                            'optimo_economico_cilindro' u 'optimo_economico_esfera').
+        columns (dict): Valores conocidos por variable: escalares o listas/arreglos de
+                        longitud `size`.
+        size (int): Número de casos.
+        flow_type (str, optional): Tipo de flujo, necesario para calcular 'h'.
+        orientation (str, optional): Orientación, necesaria para calcular 'h'.
+        cross_check (bool, optional): True para resolver también la ecuación del
+                                      catálogo y comparar. Por defecto es True.
+
+    Returns:
+        dict: Arreglos (NaN donde no hay valor) 'e', 'h', los de `cost_breakdown`,
+              'iterations', y si `cross_check`, 'e_equation' y 'discrepancy'
+              (diferencia relativa); además 'basis' (unidad de instalación) y 'errors'
+              (mensaje por caso o None).
+
+    Raises:
+        ValueError: Si la ecuación no es de óptimo económico o alguna columna tiene
+                    una longitud distinta de `size`.
+    """
+    inputs = cost_inputs(equation_key, columns, size, flow_type, orientation)
+    geometry = inputs['geometry']
+    k, C, h, r = inputs['k'], inputs['C'], inputs['h'], inputs['r']
+    delta_t, energy_factor = inputs['delta_t'], inputs['energy_factor']
+
+    points = np.flatnonzero(inputs['valid'])
+    e_opt = np.full(size, np.nan)
+    iterations = np.zeros(size, dtype=int)
+    if points.size:
+        p_C, p_k, p_h, p_dt, p_b = (array[points] for array in (C, k, h, delta_t, energy_factor))
+        p_r = None if r is None else r[points]
+
+        def cost(e, index):
+            r_index = None if p_r is None else p_r[index]
+            return (p_C[index] * insulation_volume(geometry, e, r_index)
+                    + p_b[index] * heat_loss(geometry, e, p_k[index], p_h[index], p_dt[index], r_index))
+
+        def marginal(e, index):
+            return marginal_cost(geometry, e, p_C[index], p_k[index], p_h[index], p_dt[index], p_b[index],
+                                 None if p_r is None else p_r[index])
+
+        rows = np.arange(points.size)
+        bare = cost(np.zeros(points.size), rows)
+        upper = _upper_bound(geometry, bare, p_C, p_r)
+        lower_e, upper_e = np.zeros(points.size), upper.copy()
+
+        # Con r > 1.5 veces el radio crítico (y siempre en el plano) la derivada del costo
+        # cambia de signo una sola vez: basta su signo en unos pocos espesores para
+        # acotar el mínimo
+        if geometry == 'plano':
+            unimodal = np.ones(points.size, dtype=bool)
+        else:
+            unimodal = p_r > UNIMODAL_RADIUS_FACTOR * CRITICAL_RADIUS_FACTOR[geometry] * p_k / p_h
+        index = np.flatnonzero(unimodal)
+        if index.size:
+            probe_e = upper[index, None] * PROBE_FRACTIONS
+            rising = marginal(probe_e, index[:, None]) >= 0
+            first = np.where(rising.any(axis=1), rising.argmax(axis=1), PROBE_FRACTIONS.size)
+            probe_e = np.concatenate([np.zeros((index.size, 1)), probe_e, upper[index, None]], axis=1)
+            lower_e[index] = probe_e[np.arange(index.size), first]
+            upper_e[index] = probe_e[np.arange(index.size), first + 1]
+
+        # Por debajo, el costo puede tener un máximo local antes del mínimo: un barrido
+        # del signo de la derivada encierra el mínimo, el primer punto donde vuelve a
+        # crecer tras haber decrecido (aunque el valle sea poco profundo)
+        index = np.flatnonzero(~unimodal)
+        if index.size:
+            scan_e = upper[index, None] * SCAN_FRACTIONS
+            falling = marginal(scan_e, index[:, None]) < 0
+            rising = np.logical_or.accumulate(falling, axis=1) & ~falling
+            found = rising.any(axis=1)
+            first = rising.argmax(axis=1)
+            scan_rows = np.arange(index.size)
+            # Sin cambio de signo el costo no tiene mínimo interior: queda e = 0
+            lower_e[index] = np.where(found, scan_e[scan_rows, np.maximum(first - 1, 0)], 0.0)
+            upper_e[index] = np.where(found, scan_e[scan_rows, first], 0.0)
+
+        # Si el costo crece desde el extremo inferior, el mínimo está en él; si no, la
+        # derivada cambia de signo dentro del intervalo
+        e_points = lower_e.copy()
+        descending = np.flatnonzero(marginal(lower_e, rows) < 0)
+        if descending.size:
+            roots, root_iterations, converged = bracketed_root(
+                lambda x, index: marginal(x, descending[index]),
+                lower_e[descending], upper_e[descending], xtol=MINIMIZE_XTOL, maxiter=MINIMIZE_MAXITER)
+            e_points[descending] = np.where(converged, roots, upper_e[descending])
+            iterations[points[descending]] = root_iterations
+        # Si aislar no compensa, el mínimo es la superficie desnuda
+        e_points[cost(e_points, rows) >= bare] = 0.0
+        e_opt[points] = e_points
+
+    result = {
+        'e': e_opt,
+        'h': h,
+        **cost_breakdown(inputs, e_opt),
+        'iterations': iterations,
+        'basis': COST_BASIS[geometry],
+        'errors': inputs['errors'],
+    }
+    if cross_check:
+        result.update(_cross_check(equation_key, inputs['arrays'], size, e_opt))
+    return result
+
+
+def _cross_check(equation_key: str, arrays: dict, size: int, e_opt) -> dict:
+    """Resuelve la ecuación del catálogo y la compara con el mínimo del costo."""
+    e_equation = np.full(size, np.nan)
+    try:
+        known_values = {name: value for name, value in arrays.items() if name != 'e'}
+        solution = solve_equation_array(equation_key, known_values, 'e', size)
+        e_equation = np.where(solution['status'] == STATUS_OK, solution['values'], np.nan)
+    except ValueError:
+        pass
+    with np.errstate(divide='ignore', invalid='ignore'):
+        discrepancy = np.abs(e_equation - e_opt) / np.maximum(np.abs(e_opt), MINIMIZE_XTOL)
+    return {'e_equation': e_equation, 'discrepancy': discrepancy}
+
+
+def format_cost_result(result: dict, position: int) -> dict:
+    """
+    Devuelve el resultado de un caso de `optimize_cost` como diccionario serializable a JSON.
+    """
+    def number(name):
+        if name not in result:
+            return None
+        value = float(result[name][position])
+        return None if np.isnan(value) else value
+
+    error = result['errors'][position]
+    if error:
+        return {'e': None, 'h': number('h'), 'error': error}
+    formatted = {
+        'e': number('e'),
+        'h': number('h'),
+        'cost': {
+            'insulation': number('cost_insulation'),
+            'energy': number('cost_energy'),
+            'total': number('cost_total'),
+            'annual': number('cost_annual'),
+        },
+        'heat_loss': number('heat_loss'),
+        'heat_loss_bare': number('heat_loss_bare'),
+        'savings_annual': number('savings_annual'),
+        'payback_years': number('payback_years'),
+        'iterations': int(result['iterations'][position]),
+        'error': None,
+    }
+    if 'e_equation' in result:
+        formatted['cross_check'] = {'e_equation': number('e_equation'), 'discrepancy': number('discrepancy')}
+    return formatted
@@ -0,0 +1,449 @@
+"""
+Registro de ecuaciones compiladas.
+
+Cada ecuación del catálogo `EQUATIONS` se analiza con SymPy una única vez por
+incógnita. El resultado (`CompiledEquation`) conserva:
+- La expresión simbólica (igualdad) ya interpretada.
+- Las soluciones de forma cerrada, si existen, convertidas a funciones NumPy.
+- El residuo `lhs - rhs` convertido a función NumPy, con los valores conocidos
+  como parámetros y la incógnita como último argumento.
+- Si no hay forma cerrada, el residuo junto con su primera y segunda derivada
+  analíticas respecto a la incógnita, para los métodos de Newton/Halley.
+
+De esta forma `solve_equation` solo tiene que buscar la ecuación compilada y
+evaluarla, en lugar de repetir `sympify`, `subs`, `solve` y `lambdify` en cada llamada.
+
+SymPy se importa solo al compilar. Si existe el módulo de kernels pregenerados
+(`services.equation_kernels`, generado en la construcción con `services.kernel_codegen`),
+las ecuaciones y restricciones que contiene se cargan desde él sin importar SymPy.
+
+Configuración (variables de entorno):
+- CALC_KERNELS: 0 ignora los kernels pregenerados y compila siempre con SymPy.
+  Por defecto 1.
+
+Funciones principales:
+- parse_equation: Convierte una ecuación en formato string a una igualdad de SymPy.
+- compile_equation: Compila una ecuación para una incógnita dada.
+- get_compiled_equation: Devuelve (compilando bajo demanda) la ecuación compilada del registro.
+- get_compiled_restriction: Devuelve (compilando bajo demanda) una restricción como predicado NumPy.
+- pregenerated_kernels: Devuelve el módulo de kernels pregenerados, si está disponible.
+- warm_registry: Precompila las combinaciones de ecuación e incógnita más utilizadas.
+- clear_registry: Vacía el registro (por ejemplo, para medir el arranque en frío).
+"""
+import importlib
+import logging
+import os
+import re
+import threading
+import time
+import warnings
+
+import numpy as np
+
+from services.equations import EQUATIONS, NUMERIC_ONLY_EQUATIONS
+from services.metrics import phase
+
+logger = logging.getLogger(__name__)
+
+# Nombres que no deben interpretarse como variables al analizar una ecuación
+RESERVED_NAMES = {
+    'log', 'sin', 'cos', 'tan', 'exp', 'sqrt', 'pi', 'E', 'Abs', 'min', 'max',
+    'and', 'or', 'not', 'True', 'False'
+}
+
+# Combinaciones (clave de ecuación, incógnita) que utiliza la interfaz
+DEFAULT_WARM_PAIRS = [
+    ("optimo_economico_plano", "e"),
+    ("optimo_economico_cilindro", "e"),
+    ("optimo_economico_esfera", "e"),
+    ("espesor_critico_plano", "e_c"),
+    ("radio_critico_cilindro", "r_c"),
+    ("radio_critico_esfera", "r_c"),
+] + [
+    (key, "h") for key, eq in EQUATIONS.items() if isinstance(eq, dict)
+]
+
+
+class CompiledEquation:
+    """
+    Forma precompilada de una ecuación para una incógnita concreta.
+
+    Attributes:
+        equation_str (str): Ecuación original en formato Python/SymPy.
+        variable (str): Nombre de la incógnita.
+        params (tuple[str, ...]): Nombres de las demás variables, en el orden en que
+                                  las reciben `residual` y las soluciones cerradas.
+        expr (sympy.Equality | None): Igualdad simbólica interpretada (None si la
+                                      ecuación se cargó de los kernels pregenerados).
+        residual (callable): Función NumPy `residual(*params, x)` que evalúa `lhs - rhs`.
+        solutions (list[callable]): Soluciones de forma cerrada `sol(*params)`, en el
+                                    orden devuelto por `sp.solve`. Vacía si no existen.
+        numeric_only (bool): True si la ecuación se resuelve solo numéricamente.
+        newton_terms (callable | None): Función NumPy `newton_terms(*params, x)` que devuelve
+                                        `(f, f', f'')` del residuo respecto a la incógnita.
+                                        Solo existe cuando no hay forma cerrada.
+    """
+
+    def __init__(self, equation_str, variable, params, expr, residual, solutions, numeric_only,
+                 newton_terms=None):
+        self.equation_str = equation_str
+        self.variable = variable
+        self.params = params
+        self.expr = expr
+        self.residual = residual
+        self.solutions = solutions
+        self.numeric_only = numeric_only
+        self.newton_terms = newton_terms
+
+    def parameter_values(self, known_values: dict) -> tuple:
+        """
+        Extrae de `known_values` los valores de los parámetros de la ecuación, en orden.
+
+        Args:
+            known_values (dict): Valores conocidos. Las claves que no son parámetros se ignoran.
+
+        Returns:
+            tuple[float, ...]: Valores de los parámetros en el orden de `self.params`.
+
+        Raises:
+            ValueError: Si falta algún parámetro o su valor no es numérico.
+        """
+        missing = [name for name in self.params if name not in known_values]
+        if missing:
+            raise ValueError(
+                f"Faltan valores conocidos para resolver '{self.variable}': {', '.join(missing)}."
+            )
+        try:
+            return tuple(float(known_values[name]) for name in self.params)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Valor no numérico en los valores conocidos: {e}")
+
+    def evaluate_solutions(self, args: tuple) -> list:
+        """
+        Evalúa las soluciones de forma cerrada para unos parámetros dados.
+
+        Args:
+            args (tuple[float, ...]): Valores de los parámetros (ver `parameter_values`).
+
+        Returns:
+            list[float]: Soluciones reales y finitas, en el orden de `self.solutions`.
+        """
+        values = []
+        with np.errstate(all='ignore'):
+            for solution in self.solutions:
+                try:
+                    value = complex(solution(*args))
+                except (ArithmeticError, TypeError, ValueError):
+                    continue
+                if value.imag == 0 and np.isfinite(value.real):
+                    values.append(value.real)
+        return values
+
+
+class CompiledRestriction:
+    """
+    Restricción del catálogo compilada como predicado NumPy.
+
+    Attributes:
+        restriction_str (str): Restricción original, ej: "v * H <= 8".
+        params (tuple[str, ...]): Variables de la restricción, en el orden en que las recibe `predicate`.
+        predicate (callable): Función NumPy `predicate(*params)` que devuelve un booleano
+                              (o un arreglo de booleanos si recibe arreglos).
+    """
+
+    def __init__(self, restriction_str, params, predicate):
+        self.restriction_str = restriction_str
+        self.params = params
+        self.predicate = predicate
+
+    def evaluate(self, known_values: dict):
+        """
+        Evalúa la restricción con los valores conocidos (escalares o arreglos).
+
+        Args:
+            known_values (dict): Valores conocidos; las claves ajenas a la restricción se ignoran.
+
+        Returns:
+            numpy.ndarray | None: Resultado booleano de la restricción, o None si falta
+                                  alguna de sus variables (la restricción no es evaluable).
+        """
+        if any(name not in known_values for name in self.params):
+            return None
+        with np.errstate(all='ignore'):
+            return np.asarray(
+                self.predicate(*(np.asarray(known_values[name], dtype=float) for name in self.params)),
+                dtype=bool
+            )
+
+
+def parse_equation(equation_str: str):
+    """
+    Convierte una ecuación en formato string Python/SymPy a una igualdad simbólica.
+
+    Args:
+        equation_str (str): Ecuación con un único '==' (ej. 'x**2 + y == 1').
+
+    Returns:
+        tuple[sympy.Equality, dict[str, sympy.Symbol]]: La igualdad y los símbolos encontrados.
+
+    Raises:
+        ValueError: Si la ecuación tiene más de un '==', no se puede convertir a
+                    simbólica o no es una igualdad.
+    """
+    import sympy as sp
+    from sympy.core.relational import Equality
+
+    var_names = set(re.findall(r'\b[a-zA-Z_]\w*\b', equation_str))
+    var_names = {name for name in var_names if not name.isnumeric() and name not in RESERVED_NAMES}
+    symbols_dict = {name: sp.symbols(name) for name in var_names}
+    # Forzar que '==' sea interpretado como Eq()
+    if '==' in equation_str:
+        partes = equation_str.split('==')
+        if len(partes) == 2:
+            eq_str = f"Eq({partes[0].strip()}, {partes[1].strip()})"
+        else:
+            raise ValueError("Ecuación con más de un '==' no soportada.")
+    else:
+        eq_str = equation_str
+    try:
+        expr = sp.sympify(eq_str, locals=symbols_dict)
+    except Exception as e:
+        raise ValueError(f"Error al convertir la ecuación a simbólica: {e}")
+    if not isinstance(expr, (sp.Equality, Equality)):
+        raise ValueError("La ecuación proporcionada no es una igualdad simbólica válida después de sympify.")
+    return expr, symbols_dict
+
+
+def compile_equation(equation_str: str, variable: str, numeric_only: bool = False) -> CompiledEquation:
+    """
+    Compila una ecuación para la incógnita indicada.
+
+    Args:
+        equation_str (str): Ecuación en formato Python/SymPy.
+        variable (str): Nombre de la incógnita.
+        numeric_only (bool, optional): Si es True no se intenta el despeje simbólico.
+                                       Por defecto es False.
+
+    Returns:
+        CompiledEquation: La ecuación compilada.
+
+    Raises:
+        ValueError: Si la ecuación no es válida o no depende de la incógnita.
+    """
+    import sympy as sp
+
+    with phase('sympify'):
+        expr, symbols_dict = parse_equation(equation_str)
+    var = symbols_dict.get(variable, sp.symbols(variable))
+    if not expr.has(var):
+        raise ValueError(f"La ecuación ya no depende de la variable '{variable}'. Revisa los valores conocidos.")
+    params = tuple(sorted(name for name in symbols_dict if name != variable))
+    param_symbols = [symbols_dict[name] for name in params]
+
+    try:
+        with phase('lambdify'):
+            residual = sp.lambdify(param_symbols + [var], expr.lhs - expr.rhs, "numpy")
+    except Exception as e:
+        raise ValueError(f"Error al crear la función numérica: {e}")
+
+    solutions = []
+    if not numeric_only:
+        try:
+            with phase('sympy_solve'), warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                symbolic_solutions = sp.solve(expr, var, dict=False)
+        except Exception:
+            symbolic_solutions = []
+        for solution in symbolic_solutions:
+            try:
+                with phase('lambdify'):
+                    solutions.append(sp.lambdify(param_symbols, solution, "numpy"))
+            except Exception:
+                continue
+
+    newton_terms = None
+    if not solutions:
+        # Derivadas analíticas para Newton/Halley, evaluadas juntas con subexpresiones comunes
+        residual_expr = expr.lhs - expr.rhs
+        try:
+            with phase('lambdify'):
+                first = sp.diff(residual_expr, var)
+                newton_terms = sp.lambdify(param_symbols + [var],
+                                           [residual_expr, first, sp.diff(first, var)],
+                                           "numpy", cse=True)
+        except Exception:
+            newton_terms = None
+
+    return CompiledEquation(equation_str, variable, params, expr, residual, solutions, numeric_only,
+                            newton_terms)
+
+
+def compile_restriction(restriction_str: str) -> CompiledRestriction:
+    """
+    Compila una restricción (desigualdad) como predicado NumPy.
+
+    Args:
+        restriction_str (str): Restricción en formato Python/SymPy, ej: "H**3 * (Te - Ta) <= 10".
+
+    Returns:
+        CompiledRestriction: La restricción compilada.
+
+    Raises:
+        ValueError: Si la restricción no se puede convertir a simbólica.
+    """
+    import sympy as sp
+
+    try:
+        with phase('sympify'):
+            expr = sp.sympify(restriction_str)
+    except Exception as e:
+        raise ValueError(f"Error al convertir la restricción '{restriction_str}' a simbólica: {e}")
+    params = tuple(sorted(str(symbol) for symbol in expr.free_symbols))
+    with phase('lambdify'):
+        predicate = sp.lambdify([sp.Symbol(name) for name in params], expr, "numpy")
+    return CompiledRestriction(restriction_str, params, predicate)
+
+
+_registry = {}
+_restrictions = {}
+_registry_lock = threading.Lock()
+
+# Módulo de kernels pregenerados: None = aún no se buscó; False = no disponible
+_kernels = None
+KERNELS_MODULE = 'services.equation_kernels'
+
+
+def pregenerated_kernels():
+    """
+    Devuelve el módulo de kernels pregenerados, importándolo la primera vez.
+
+    Returns:
+        module | None: `services.equation_kernels`, o None si no se ha generado o si
+                       CALC_KERNELS=0.
+    """
+    global _kernels
+    if _kernels is None:
+        if os.environ.get('CALC_KERNELS', '1').strip() == '0':
+            _kernels = False
+        else:
+            try:
+                _kernels = importlib.import_module(KERNELS_MODULE)
+            except ImportError:
+                _kernels = False
+            else:
+                logger.debug("Kernels pregenerados cargados: %d ecuaciones, %d restricciones.",
+                             len(_kernels.EQUATION_KERNELS), len(_kernels.RESTRICTION_KERNELS))
+    return _kernels or None
+
+
+def _load_pregenerated_equation(equation_str: str, variable: str, numeric_only: bool):
+    """Construye la ecuación compilada desde los kernels pregenerados, o None si no está en ellos."""
+    kernels = pregenerated_kernels()
+    entry = kernels.EQUATION_KERNELS.get((equation_str, variable)) if kernels else None
+    if entry is None or entry['numeric_only'] != numeric_only:
+        return None
+    return CompiledEquation(equation_str, variable, entry['params'], None, entry['residual'],
+                            list(entry['solutions']), numeric_only, entry['newton_terms'])
+
+
+def _resolve_equation(equation: str) -> tuple:
+    """Devuelve (equation_str, numeric_only) a partir de una clave del catálogo o de la ecuación misma."""
+    catalog_entry = EQUATIONS.get(equation)
+    if catalog_entry is not None:
+        key = equation
+        equation_str = catalog_entry['latex'] if isinstance(catalog_entry, dict) else catalog_entry
+    else:
+        equation_str = equation
+        key = next(
+            (k for k, eq in EQUATIONS.items()
+             if (eq['latex'] if isinstance(eq, dict) else eq) == equation_str),
+            None
+        )
+    return equation_str, key in NUMERIC_ONLY_EQUATIONS
+
+
+def get_compiled_equation(equation: str, variable: str) -> CompiledEquation:
+    """
+    Obtiene la ecuación compilada para una incógnita, compilándola la primera vez.
+
+    Args:
+        equation (str): Clave del catálogo `EQUATIONS` o ecuación en formato Python/SymPy.
+        variable (str): Nombre de la incógnita.
+
+    Returns:
+        CompiledEquation: La ecuación compilada (compartida; no debe modificarse).
+
+    Raises:
+        ValueError: Si la ecuación no puede compilarse para esa incógnita.
+    """
+    equation_str, numeric_only = _resolve_equation(equation)
+    cache_key = (equation_str, variable)
+    compiled = _registry.get(cache_key)
+    if compiled is None:
+        with _registry_lock:
+            compiled = _registry.get(cache_key)
+            if compiled is None:
+                started = time.perf_counter()
+                compiled = _load_pregenerated_equation(equation_str, variable, numeric_only)
+                if compiled is None:
+                    with phase('compile'):
+                        compiled = compile_equation(equation_str, variable, numeric_only)
+                _registry[cache_key] = compiled
+                logger.debug("Ecuación compilada para '%s' en %.1f ms: %s", variable,
+                             (time.perf_counter() - started) * 1e3, equation_str)
+    return compiled
+
+
+def get_compiled_restriction(restriction_str: str) -> CompiledRestriction:
+    """
+    Obtiene la restricción compilada, compilándola la primera vez.
+
+    Args:
+        restriction_str (str): Restricción en formato Python/SymPy.
+
+    Returns:
+        CompiledRestriction: La restricción compilada (compartida; no debe modificarse).
+    """
+    compiled = _restrictions.get(restriction_str)
+    if compiled is None:
+        with _registry_lock:
+            compiled = _restrictions.get(restriction_str)
+            if compiled is None:
+                kernels = pregenerated_kernels()
+                entry = kernels.RESTRICTION_KERNELS.get(restriction_str) if kernels else None
+                if entry is not None:
+                    compiled = CompiledRestriction(restriction_str, *entry)
+                else:
+                    with phase('compile'):
+                        compiled = compile_restriction(restriction_str)
+                _restrictions[restriction_str] = compiled
+    return compiled
+
+
+def warm_registry(pairs=None) -> int:
+    """
+    Precompila un conjunto de combinaciones (clave de ecuación, incógnita).
+
+    Args:
+        pairs (list[tuple[str, str]], optional): Combinaciones a compilar.
+                                                 Por defecto `DEFAULT_WARM_PAIRS`.
+
+    Returns:
+        int: Número de ecuaciones compiladas disponibles en el registro.
+    """
+    for equation_key, variable in (pairs if pairs is not None else DEFAULT_WARM_PAIRS):
+        get_compiled_equation(equation_key, variable)
+        eq = EQUATIONS.get(equation_key)
+        if isinstance(eq, dict):
+            for restriction in eq.get("restricciones", []):
+                get_compiled_restriction(restriction)
+    return len(_registry)
+
+
+def clear_registry():
+    """Elimina todas las ecuaciones y restricciones compiladas del registro."""
+    global _kernels
+    with _registry_lock:
+        _kernels = None
+        _registry.clear()
+        _restrictions.clear()
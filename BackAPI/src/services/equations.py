@@ -0,0 +1,109 @@
+"""
+Catálogo de ecuaciones y leyenda de variables de la calculadora.
+
+Define:
+- EQUATIONS: Un diccionario que cataloga las ecuaciones utilizadas en la aplicación,
+  incluyendo su forma LaTeX y las restricciones aplicables.
+- NUMERIC_ONLY_EQUATIONS: Claves de las ecuaciones que se resuelven únicamente por
+  métodos numéricos (su despeje simbólico no es práctico).
+- VARIABLES_LEYENDA: Un diccionario con la descripción de cada variable utilizada.
+
+Este módulo no importa SymPy ni NumPy, de modo que puede ser utilizado por cualquier
+otro módulo del servicio sin provocar importaciones circulares.
+"""
+
+# Diccionario de ecuaciones en formato Python/SymPy
+EQUATIONS = {
+    "optimo_economico_plano": "(e + k/h)**2 == (((Ti - Ta) * k * w * beta * vida_util * eta) / C) * 10**-3",
+    "optimo_economico_cilindro": "((e + r) * (h * (e + r) * log((e + r)/r) + k)**2) / (h * k * (h * (e + r) - k)) == (((Ti - Ta) * beta * vida_util * w * eta) / C) * 10**-3",
+    "optimo_economico_esfera": "((e + r) * (h * (e + r)**2 - h * r * (e + r) + k * r)**2) / ((e + r)**2 * h * k * (h * (e + r) - 2 * k)) == (((Ti - Ta) * beta * w * vida_util * eta) / C) * 10**-3",
+    "espesor_critico_plano": "e_c == k / h",
+    "radio_critico_cilindro": "r_c == k / h",
+    "radio_critico_esfera": "r_c == 2 * k / h",
+    "conv_interior_vertical_laminar": {
+        "latex": "h == 1.32 * ((Te - Ta) / H)**0.25",
+        "restricciones": [
+            "H**3 * (Te - Ta) <= 10",
+            "Te - Ta <= 100",
+            "H > 0"
+        ]
+    },
+    "conv_interior_vertical_turbulento": {
+        "latex": "h == 1.74 * (Te - Ta)**(1/3)",
+        "restricciones": [
+            "H**3 * (Te - Ta) >= 10",
+            "Te - Ta <= 100",
+            "H > 0"
+        ]
+    },
+    "conv_interior_horizontal_laminar": {
+        "latex": "h == 1.25 * ((Te - Ta) / H)**0.25",
+        "restricciones": [
+            "H**3 * (Te - Ta) <= 10",
+            "Te - Ta <= 100",
+            "H > 0"
+        ]
+    },
+    "conv_interior_horizontal_turbulento": {
+        "latex": "h == 1.21 * (Te - Ta)**(1/3)",
+        "restricciones": [
+            "H**3 * (Te - Ta) > 10",
+            "Te - Ta <= 100",
+            "H > 0"
+        ]
+    },
+    "conv_exterior_vertical_laminar": {
+        "latex": "h == 3.96 * (v / H)**0.5",
+        "restricciones": [
+            "v * H <= 8",
+            "v > 0",
+            "H > 0"
+        ]
+    },
+    "conv_exterior_vertical_turbulento": {
+        "latex": "h == 5.76 * (v**4 / H)**0.5",
+        "restricciones": [
+            "v * H > 8",
+            "v > 0",
+            "H > 0"
+        ]
+    },
+    "conv_exterior_horizontal_laminar": {
+        "latex": "h == (8.1 * 10**-3) / H + 3.14 * (v / H)**0.5",
+        "restricciones": [
+            "v * H <= 8.55",
+            "v > 0",
+            "H > 0"
+        ]
+    },
+    "conv_exterior_horizontal_turbulento": {
+        "latex": "h == 8.9 * v**0.9 / H**0.1",
+        "restricciones": [
+            "v * H > 8.55",
+            "v > 0",
+            "H > 0"
+        ]
+    }
+}
+
+# Ecuaciones que se resuelven solo numéricamente (sin intentar un despeje simbólico)
+NUMERIC_ONLY_EQUATIONS = ("optimo_economico_cilindro", "optimo_economico_esfera")
+
+# Leyenda de variables para ecuaciones
+VARIABLES_LEYENDA = {
+    "e": "Espesor del aislamiento en metros (m)",
+    "k": "Coeficiente de conductividad térmica del material aislante (W/m°C)", # Aclaración
+    "w": "Costo de la energía o combustible ($/kWh)", # kWh es más común
+    "beta": "Horas de operación por año (h/año)", # Singular
+    "vida_util": "Vida útil de la instalación o del aislamiento (años)", # Aclaración
+    "C": "Costo del material aislante instalado por unidad de volumen ($/m³)", # Aclaración y unidad
+    "h": "Coeficiente de transferencia de calor por convección (W/m²K)", # Unidad K o °C es similar para deltas
+    "Ti": "Temperatura del fluido caliente o superficie interna (°C)", # Aclaración
+    "Te": "Temperatura de la superficie externa del aislamiento (°C)", # Aclaración
+    "Ta": "Temperatura del ambiente circundante (°C)", # Aclaración
+    "eta": "Eficiencia de la planta o del sistema de generación de calor (% o fracción)", # Aclaración
+    "r": "Radio interior del aislamiento (para cilindros/esferas) (m)", # Aclaración
+    "rc": "Radio crítico de aislamiento (m)",
+    "H": "Dimensión característica (altura para placas, diámetro para cilindros/esferas) (m)", # Aclaración
+    "v": "Velocidad del fluido (aire/viento) (m/s)"
+}
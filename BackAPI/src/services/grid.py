@@ -0,0 +1,159 @@
+"""
+Barridos multidimensionales (mallas) del espesor óptimo.
+
+Evalúa el espesor 'e' (y 'h') sobre el producto cartesiano de varios ejes, por ejemplo
+`diametro × Ti` o `k × C × w`. La malla nunca se materializa completa: los puntos se
+generan y resuelven por bloques de índices planos (orden C, el último eje varía más
+rápido), de modo que la memoria adicional queda acotada por el tamaño del bloque.
+
+Funciones principales:
+- axis_values: Convierte la especificación de un eje en su arreglo de valores.
+- solve_grid_range: Resuelve un rango de índices planos de la malla.
+- iter_grid_chunks: Genera los resultados de la malla bloque a bloque.
+- sweep_grid: Resuelve la malla completa y devuelve arreglos planos con su forma.
+"""
+import numpy as np
+
+from services.parallel import chunk_bounds, map_chunks, parallel_chunk_size, should_parallelize
+from services.vectorized import solve_espesor_points
+
+# Número de puntos que se resuelven por bloque
+DEFAULT_CHUNK_SIZE = 65536
+
+
+def axis_values(axis: dict):
+    """
+    Convierte la especificación de un eje en su arreglo de valores.
+
+    Args:
+        axis (dict): Especificación del eje con 'variable' y, o bien 'values' (lista
+                     explícita de valores), o bien 'min', 'max' y 'step'.
+
+    Returns:
+        tuple[str, numpy.ndarray]: El nombre de la variable y sus valores.
+
+    Raises:
+        ValueError: Si la especificación está incompleta o no es numérica.
+    """
+    if not isinstance(axis, dict) or not axis.get('variable'):
+        raise ValueError("Cada eje debe ser un objeto con 'variable'.")
+    variable = axis['variable']
+    if axis.get('values') is not None:
+        try:
+            values = np.asarray(axis['values'], dtype=float)
+        except (TypeError, ValueError):
+            raise ValueError(f"Los valores del eje '{variable}' deben ser números.")
+        if values.ndim != 1 or values.size == 0:
+            raise ValueError(f"El eje '{variable}' debe tener una lista de valores no vacía.")
+        return variable, values
+    try:
+        min_val, max_val, step_val = (float(axis[name]) for name in ('min', 'max', 'step'))
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"El eje '{variable}' requiere 'values' o 'min', 'max' y 'step' numéricos.")
+    if step_val <= 0:
+        raise ValueError(f"El paso del eje '{variable}' debe ser positivo.")
+    if max_val < min_val:
+        raise ValueError(f"El máximo del eje '{variable}' debe ser mayor o igual que el mínimo.")
+    return variable, np.arange(min_val, max_val + step_val, step_val)
+
+
+def solve_grid_range(equation_key: str, axes: list, known_values: dict, flow_type: str,
+                     orientation: str, start: int, stop: int) -> dict:
+    """
+    Resuelve los puntos de la malla con índice plano en [start, stop).
+
+    Los puntos consecutivos en orden C solo difieren en el último eje, por lo que se
+    resuelven por continuación. Es una función de nivel de módulo para que los
+    procesos del pool puedan ejecutarla.
+
+    Returns:
+        dict: El resultado de `solve_espesor_points` para esos puntos.
+    """
+    shape = tuple(values.size for _, values in axes)
+    coordinates = np.unravel_index(np.arange(start, stop), shape)
+    point_values = {
+        variable: values[index]
+        for (variable, values), index in zip(axes, coordinates)
+    }
+    return solve_espesor_points(equation_key, point_values, stop - start,
+                                known_values, flow_type, orientation, continuation=True)
+
+
+def iter_grid_chunks(equation_key: str, axes: list, known_values: dict, flow_type: str = None,
+                     orientation: str = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Resuelve la malla por bloques de índices planos consecutivos.
+
+    Si la malla alcanza CALC_PARALLEL_MIN_POINTS y el paralelismo está activado (ver
+    `services.parallel`), los bloques se reparten entre los procesos del pool; si no,
+    se resuelven en el proceso actual. Los resultados se entregan siempre en orden.
+
+    Args:
+        equation_key (str): Clave de la ecuación en `EQUATIONS`.
+        axes (list[tuple[str, numpy.ndarray]]): Ejes como pares (variable, valores).
+        known_values (dict): Valores conocidos para las demás variables.
+        flow_type (str, optional): Tipo de flujo, necesario para calcular 'h'.
+        orientation (str, optional): Orientación, necesaria para calcular 'h'.
+        chunk_size (int, optional): Puntos por bloque. Por defecto `DEFAULT_CHUNK_SIZE`.
+
+    Yields:
+        tuple[int, dict]: El índice plano del primer punto del bloque y el resultado de
+                          `solve_espesor_points` para los puntos del bloque.
+    """
+    shape = tuple(values.size for _, values in axes)
+    total = int(np.prod(shape))
+    parallel = should_parallelize(total)
+    if parallel:
+        chunk_size = min(chunk_size, parallel_chunk_size(total))
+    bounds = chunk_bounds(total, chunk_size)
+    chunk_args = [
+        (equation_key, axes, known_values, flow_type, orientation, start, stop)
+        for start, stop in bounds
+    ]
+    if parallel:
+        results = map_chunks(solve_grid_range, chunk_args)
+    else:
+        # Las mallas pequeñas se resuelven en el proceso actual: enviarlas al pool cuesta más
+        results = (solve_grid_range(*args) for args in chunk_args)
+    for (start, _), result in zip(bounds, results):
+        yield start, result
+
+
+def sweep_grid(equation_key: str, axes: list, known_values: dict, flow_type: str = None,
+               orientation: str = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    """
+    Resuelve la malla completa y devuelve los resultados como arreglos planos.
+
+    Args:
+        equation_key (str): Clave de la ecuación en `EQUATIONS`.
+        axes (list[tuple[str, numpy.ndarray]]): Ejes como pares (variable, valores).
+        known_values (dict): Valores conocidos para las demás variables.
+        flow_type (str, optional): Tipo de flujo, necesario para calcular 'h'.
+        orientation (str, optional): Orientación, necesaria para calcular 'h'.
+        chunk_size (int, optional): Puntos por bloque. Por defecto `DEFAULT_CHUNK_SIZE`.
+
+    Returns:
+        dict: Diccionario con 'shape' (tupla), 'e' y 'h' (arreglos planos float64 en
+              orden C, NaN donde no hay valor), 'iterations' (total de iteraciones
+              numéricas) y 'h_calculado' (bool).
+    """
+    shape = tuple(values.size for _, values in axes)
+    total = int(np.prod(shape))
+    e_values = np.full(total, np.nan)
+    h_values = np.full(total, np.nan)
+    iterations = 0
+    h_calculado = False
+    for start, chunk in iter_grid_chunks(equation_key, axes, known_values, flow_type,
+                                         orientation, chunk_size):
+        stop = start + chunk['e'].size
+        e_values[start:stop] = chunk['e']
+        h_values[start:stop] = chunk['h']
+        iterations += int(chunk['iterations'].sum())
+        h_calculado = chunk['h_calculado']
+    return {
+        'shape': shape,
+        'e': e_values,
+        'h': h_values,
+        'iterations': iterations,
+        'h_calculado': h_calculado,
+    }
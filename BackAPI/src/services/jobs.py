@@ -0,0 +1,639 @@
+"""
+Trabajos asíncronos para mallas y lotes grandes, con progreso, resultados parciales y cancelación.
+
+Una malla de millones de puntos o el lote de una planta entera pueden tardar más que el
+tiempo de espera de HTTP (del proxy Nginx o de gunicorn). En lugar de resolverlos
+dentro de la solicitud, se envían como trabajos: la solicitud devuelve un identificador
+y los hilos de trabajo del proceso los resuelven por bloques. Tras cada bloque se
+guardan el progreso y el resultado parcial, y se comprueba si se pidió la cancelación.
+
+Los trabajos se guardan en SQLite: por defecto en una base de datos en memoria del
+proceso; con CALC_JOB_PATH, en un archivo compartido por los procesos del servidor
+(gunicorn), de modo que cualquiera de ellos puede informar el estado de un trabajo,
+cancelarlo o ejecutarlo; cada proceso empieza a tomar trabajos de la cola al arrancar.
+No se necesita un broker externo.
+
+Los resultados de los trabajos terminados se conservan hasta que caducan o hasta que
+superan los límites de tamaño, y entonces se desalojan primero los más antiguos.
+
+Configuración (variables de entorno):
+- CALC_JOB_WORKERS: Hilos de trabajo por proceso (por defecto 1).
+- CALC_JOB_MAX_PENDING: Trabajos en cola o en ejecución admitidos a la vez (por defecto 32).
+- CALC_JOB_MAX_BYTES: Bytes de resultados (JSON) que se conservan en total (por defecto 256 MiB).
+- CALC_JOB_MAX_JOBS: Número máximo de trabajos terminados que se conservan (por defecto 200).
+- CALC_JOB_TTL: Segundos que se conserva un trabajo terminado (por defecto 3600; 0 = sin caducidad).
+- CALC_JOB_PATH: Ruta del archivo SQLite compartido. Vacía = solo memoria del proceso (por defecto).
+
+Funciones y clases principales:
+- JobStore: Almacenamiento de trabajos, progreso y bloques de resultado en SQLite.
+- JobManager: Cola de trabajos, hilos de trabajo, cancelación y desalojo.
+- assemble_result: Reconstruye el resultado (completo o parcial) a partir de los bloques.
+- get_job_manager: Devuelve el gestor de trabajos del proceso, configurado desde el entorno.
+- start_shared_workers: Arranca los hilos de trabajo del proceso si la cola es compartida.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+
+from services.batch import format_result, solve_cases, solve_columns
+from services.grid import DEFAULT_CHUNK_SIZE, axis_values, iter_grid_chunks
+from services.parallel import chunk_bounds
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_WORKERS = 1
+DEFAULT_MAX_PENDING = 32
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_JOBS = 200
+DEFAULT_JOB_TTL = 3600
+# Segundos sin progreso tras los que un trabajo en ejecución se da por perdido
+# (por ejemplo, si terminó el proceso que lo ejecutaba)
+STALE_SECONDS = 600
+# Segundos entre consultas de la cola compartida por trabajos enviados a otros procesos
+POLL_SECONDS = 1.0
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+STATUS_CANCELLED = 'cancelled'
+ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+FINISHED_STATUSES = (STATUS_DONE, STATUS_FAILED, STATUS_CANCELLED)
+
+
+class JobQueueFull(RuntimeError):
+    """Se alcanzó el número máximo de trabajos pendientes (CALC_JOB_MAX_PENDING)."""
+
+
+def _env_number(name: str, default, cast=int):
+    """Lee un número de una variable de entorno, con valor por defecto si no es válido."""
+    try:
+        return cast(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _json_list(values) -> list:
+    """Convierte un arreglo float en lista para JSON, con None en lugar de NaN."""
+    return [None if value != value else value for value in np.asarray(values, dtype=float).tolist()]
+
+
+def _grid_task(params: dict):
+    """
+    Tarea de una malla (mismo cuerpo que `/plot_grid`, ya validado).
+
+    Returns:
+        tuple[dict, int, iterator]: Cabecera del resultado, número de puntos y bloques.
+    """
+    axes = [axis_values(axis) for axis in params['axes']]
+    total = int(np.prod([values.size for _, values in axes]))
+    header = {
+        'body': {
+            'axes': [{'variable': variable, 'values': values.tolist()} for variable, values in axes],
+            'shape': [values.size for _, values in axes],
+            'order': 'C',
+        },
+        'values': ['e', 'h_vals'],
+        'counters': ['iterations'],
+    }
+
+    def chunks():
+        for start, chunk in iter_grid_chunks(params['equation_key'], axes, params.get('known_values') or {},
+                                             params.get('flow_type'), params.get('orientation'),
+                                             params.get('chunk_size') or DEFAULT_CHUNK_SIZE):
+            yield start, {
+                'values': {'e': _json_list(chunk['e']), 'h_vals': _json_list(chunk['h'])},
+                'counters': {'iterations': int(chunk['iterations'].sum())},
+            }
+
+    return header, total, chunks()
+
+
+def _batch_task(params: dict):
+    """
+    Tarea de un lote (mismo cuerpo que `/solve_batch`, ya validado).
+
+    Returns:
+        tuple[dict, int, iterator]: Cabecera del resultado, número de casos y bloques.
+    """
+    if 'cases' in params:
+        cases = params['cases']
+        header = {'body': {}, 'values': ['results'], 'counters': []}
+
+        def chunks():
+            for start, stop in chunk_bounds(len(cases), DEFAULT_CHUNK_SIZE):
+                yield start, {'values': {'results': solve_cases(cases[start:stop])}}
+
+        return header, len(cases), chunks()
+
+    columns = params['columns']
+    size = params['size']
+    header = {'body': {}, 'values': ['result', 'h', 'iterations', 'error'], 'counters': []}
+
+    def chunks():
+        for start, stop in chunk_bounds(size, DEFAULT_CHUNK_SIZE):
+            chunk_columns = {
+                name: values[start:stop] if isinstance(values, list) else values
+                for name, values in columns.items()
+            }
+            group_result = solve_columns(params.get('equation_key'), params.get('variable_to_solve'),
+                                         chunk_columns, stop - start,
+                                         params.get('flow_type'), params.get('orientation'))
+            results = [format_result(group_result, i) for i in range(stop - start)]
+            yield start, {'values': {name: [r[name] for r in results] for name in header['values']}}
+
+    return header, size, chunks()
+
+
+# Tipos de trabajo: cada función recibe los parámetros y devuelve (cabecera, total, bloques)
+TASKS = {
+    'plot_grid': _grid_task,
+    'solve_batch': _batch_task,
+}
+
+
+def assemble_result(header: dict, total: int, chunks: list) -> dict:
+    """
+    Reconstruye el resultado de un trabajo a partir de los bloques terminados.
+
+    El resultado tiene el mismo formato que la respuesta de la ruta síncrona; los
+    elementos de los bloques que aún no se han resuelto son None.
+
+    Args:
+        header (dict): Cabecera de la tarea: 'body' (partes fijas del resultado),
+                       'values' (listas con un elemento por punto o caso) y
+                       'counters' (totales que se suman entre bloques).
+        total (int): Número de puntos o casos del trabajo.
+        chunks (list[tuple[int, str]]): Pares (inicio, bloque en JSON).
+
+    Returns:
+        dict: El resultado, completo o parcial.
+    """
+    result = dict(header['body'])
+    for name in header['values']:
+        result[name] = [None] * total
+    for name in header['counters']:
+        result[name] = 0
+    for start, payload in chunks:
+        chunk = json.loads(payload)
+        for name, items in chunk.get('values', {}).items():
+            result[name][start:start + len(items)] = items
+        for name, value in chunk.get('counters', {}).items():
+            result[name] += value
+    return result
+
+
+class JobStore:
+    """
+    Almacenamiento de trabajos en SQLite (en memoria o en un archivo compartido).
+
+    Cada trabajo guarda su estado, sus parámetros (hasta que termina), su progreso y los
+    bloques de resultado en JSON. Todas las operaciones usan una sola conexión protegida
+    por un candado; entre procesos, la coordinación la hacen los bloqueos de SQLite.
+    """
+
+    def __init__(self, path: str = ':memory:'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        if path != ':memory:':
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+        with self._transaction() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                'id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, params TEXT, header TEXT, '
+                'total INTEGER NOT NULL DEFAULT 0, done INTEGER NOT NULL DEFAULT 0, error TEXT, '
+                'cancel INTEGER NOT NULL DEFAULT 0, bytes INTEGER NOT NULL DEFAULT 0, '
+                'created REAL NOT NULL, started REAL, finished REAL, updated REAL NOT NULL)'
+            )
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS job_chunks ('
+                'job_id TEXT NOT NULL, start INTEGER NOT NULL, payload TEXT NOT NULL, '
+                'PRIMARY KEY (job_id, start))'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)')
+
+    @contextmanager
+    def _transaction(self):
+        """Ejecuta un bloque de sentencias como una transacción con escritura exclusiva."""
+        with self._lock:
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._connection
+            except BaseException:
+                self._connection.execute('ROLLBACK')
+                raise
+            self._connection.execute('COMMIT')
+
+    @staticmethod
+    def _row_to_job(row) -> dict:
+        """Convierte una fila de la tabla de trabajos en un diccionario."""
+        job_id, kind, status, total, done, error, cancel, size, created, started, finished = row
+        return {
+            'id': job_id,
+            'kind': kind,
+            'status': status,
+            'progress': {'done': done, 'total': total, 'fraction': done / total if total else 0.0},
+            'error': error,
+            'cancel_requested': bool(cancel),
+            'result_bytes': size,
+            'created': created,
+            'started': started,
+            'finished': finished,
+        }
+
+    _JOB_COLUMNS = 'id, kind, status, total, done, error, cancel, bytes, created, started, finished'
+
+    def insert(self, job_id: str, kind: str, params: dict, max_pending: int) -> None:
+        """
+        Añade un trabajo a la cola.
+
+        Raises:
+            JobQueueFull: Si ya hay `max_pending` trabajos en cola o en ejecución.
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            pending = connection.execute(
+                'SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)', ACTIVE_STATUSES).fetchone()[0]
+            if pending >= max_pending:
+                raise JobQueueFull(f'Hay {pending} trabajos pendientes; inténtalo más tarde.')
+            connection.execute(
+                'INSERT INTO jobs (id, kind, status, params, created, updated) VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, kind, STATUS_QUEUED, json.dumps(params), now, now),
+            )
+
+    def claim(self):
+        """
+        Toma el trabajo en cola más antiguo y lo marca en ejecución.
+
+        Returns:
+            tuple[str, str, dict] | None: Identificador, tipo y parámetros, o None si no hay.
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            row = connection.execute(
+                'SELECT id, kind, params FROM jobs WHERE status = ? ORDER BY created LIMIT 1',
+                (STATUS_QUEUED,)).fetchone()
+            if row is None:
+                return None
+            connection.execute('UPDATE jobs SET status = ?, started = ?, updated = ? WHERE id = ?',
+                               (STATUS_RUNNING, now, now, row[0]))
+        return row[0], row[1], json.loads(row[2])
+
+    def start(self, job_id: str, header: dict, total: int) -> None:
+        """Guarda la cabecera del resultado y el número de puntos o casos del trabajo."""
+        with self._transaction() as connection:
+            connection.execute('UPDATE jobs SET header = ?, total = ?, updated = ? WHERE id = ?',
+                               (json.dumps(header), total, time.time(), job_id))
+
+    def add_chunk(self, job_id: str, start: int, payload: str, count: int) -> bool:
+        """
+        Guarda un bloque de resultado y suma `count` al progreso.
+
+        Returns:
+            bool: True si se pidió cancelar el trabajo.
+        """
+        with self._transaction() as connection:
+            connection.execute('INSERT OR REPLACE INTO job_chunks (job_id, start, payload) VALUES (?, ?, ?)',
+                               (job_id, start, payload))
+            connection.execute('UPDATE jobs SET done = done + ?, bytes = bytes + ?, updated = ? WHERE id = ?',
+                               (count, len(payload), time.time(), job_id))
+            row = connection.execute('SELECT cancel FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return row is None or bool(row[0])
+
+    def cancel_requested(self, job_id: str) -> bool:
+        """True si se pidió cancelar el trabajo (o ya no existe)."""
+        with self._lock:
+            row = self._connection.execute('SELECT cancel FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return row is None or bool(row[0])
+
+    def finish(self, job_id: str, status: str, error: str = None) -> None:
+        """Marca el trabajo como terminado y descarta sus parámetros."""
+        now = time.time()
+        with self._transaction() as connection:
+            connection.execute(
+                'UPDATE jobs SET status = ?, error = ?, params = NULL, finished = ?, updated = ? WHERE id = ?',
+                (status, error, now, now, job_id))
+
+    def request_cancel(self, job_id: str) -> bool:
+        """
+        Pide cancelar un trabajo: si está en cola se cancela en el acto; si está en
+        ejecución, su hilo lo detiene al terminar el bloque en curso.
+
+        Returns:
+            bool: False si el trabajo no existe.
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            row = connection.execute('SELECT status FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if row is None:
+                return False
+            if row[0] == STATUS_QUEUED:
+                connection.execute(
+                    'UPDATE jobs SET status = ?, cancel = 1, params = NULL, finished = ?, updated = ? WHERE id = ?',
+                    (STATUS_CANCELLED, now, now, job_id))
+            elif row[0] == STATUS_RUNNING:
+                connection.execute('UPDATE jobs SET cancel = 1, updated = ? WHERE id = ?', (now, job_id))
+        return True
+
+    def delete(self, job_ids) -> None:
+        """Elimina trabajos y sus bloques de resultado."""
+        job_ids = list(job_ids)
+        if not job_ids:
+            return
+        marks = ', '.join('?' * len(job_ids))
+        with self._transaction() as connection:
+            connection.execute(f'DELETE FROM job_chunks WHERE job_id IN ({marks})', job_ids)
+            connection.execute(f'DELETE FROM jobs WHERE id IN ({marks})', job_ids)
+
+    def get(self, job_id: str):
+        """Estado de un trabajo (ver `_row_to_job`), o None si no existe."""
+        with self._lock:
+            row = self._connection.execute(
+                f'SELECT {self._JOB_COLUMNS} FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return None if row is None else self._row_to_job(row)
+
+    def list(self) -> list:
+        """Estado de todos los trabajos, del más reciente al más antiguo."""
+        with self._lock:
+            rows = self._connection.execute(
+                f'SELECT {self._JOB_COLUMNS} FROM jobs ORDER BY created DESC').fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def result_parts(self, job_id: str):
+        """
+        Cabecera, total y bloques de resultado de un trabajo.
+
+        Returns:
+            tuple[dict | None, int, list[tuple[int, str]]]: (None, 0, []) si la tarea aún no empezó.
+        """
+        with self._lock:
+            row = self._connection.execute('SELECT header, total FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            chunks = self._connection.execute(
+                'SELECT start, payload FROM job_chunks WHERE job_id = ? ORDER BY start', (job_id,)).fetchall()
+        if row is None or row[0] is None:
+            return None, 0, []
+        return json.loads(row[0]), row[1], chunks
+
+    def purge(self, ttl: float, max_jobs: int, max_bytes: int, keep: str = None) -> int:
+        """
+        Desaloja trabajos terminados y da por fallidos los que dejaron de avanzar.
+
+        Primero se eliminan los trabajos caducados; después, mientras se superen
+        `max_jobs` trabajos terminados o `max_bytes` de resultados, los terminados
+        más antiguos. El trabajo `keep` (el recién terminado) se conserva aunque por
+        sí solo supere los límites.
+
+        Returns:
+            int: Número de trabajos desalojados.
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            connection.execute(
+                'UPDATE jobs SET status = ?, error = ?, params = NULL, finished = ?, updated = ? '
+                'WHERE status = ? AND updated < ?',
+                (STATUS_FAILED, 'El trabajo dejó de avanzar (¿terminó el proceso que lo ejecutaba?).',
+                 now, now, STATUS_RUNNING, now - STALE_SECONDS))
+            rows = connection.execute(
+                'SELECT id, finished, bytes FROM jobs WHERE status IN (?, ?, ?) ORDER BY finished',
+                FINISHED_STATUSES).fetchall()
+            total_bytes = connection.execute('SELECT COALESCE(SUM(bytes), 0) FROM jobs').fetchone()[0]
+        evicted = []
+        remaining = len(rows)
+        for job_id, finished, size in rows:
+            expired = ttl and now - finished > ttl
+            if not expired and remaining <= max_jobs and total_bytes <= max_bytes:
+                continue
+            if job_id == keep and not expired:
+                continue
+            evicted.append(job_id)
+            remaining -= 1
+            total_bytes -= size
+        self.delete(evicted)
+        return len(evicted)
+
+    def counts(self) -> dict:
+        """Número de trabajos por estado y bytes de resultados guardados."""
+        with self._lock:
+            rows = self._connection.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+            size = self._connection.execute('SELECT COALESCE(SUM(bytes), 0) FROM jobs').fetchone()[0]
+        counts = {status: 0 for status in ACTIVE_STATUSES + FINISHED_STATUSES}
+        counts.update(dict(rows))
+        return {'jobs': counts, 'result_bytes': size}
+
+
+class JobManager:
+    """
+    Cola de trabajos con hilos de trabajo, cancelación y desalojo por tamaño.
+
+    Attributes:
+        store (JobStore): Almacenamiento de los trabajos.
+        workers (int): Hilos de trabajo de este proceso.
+        max_pending (int): Trabajos en cola o en ejecución admitidos a la vez.
+        max_bytes (int): Bytes de resultados que se conservan en total.
+        max_jobs (int): Número máximo de trabajos terminados que se conservan.
+        ttl (float): Segundos que se conserva un trabajo terminado (0 = sin caducidad).
+    """
+
+    def __init__(self, store: JobStore, workers: int = DEFAULT_JOB_WORKERS, max_pending: int = DEFAULT_MAX_PENDING,
+                 max_bytes: int = DEFAULT_MAX_BYTES, max_jobs: int = DEFAULT_MAX_JOBS, ttl: float = DEFAULT_JOB_TTL):
+        self.store = store
+        self.workers = max(workers, 1)
+        self.max_pending = max_pending
+        self.max_bytes = max_bytes
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+        self._threads = []
+        self._wakeup = threading.Condition()
+        self._started_lock = threading.Lock()
+
+    def submit(self, kind: str, params: dict) -> str:
+        """
+        Encola un trabajo.
+
+        Args:
+            kind (str): Tipo de trabajo (clave de `TASKS`).
+            params (dict): Parámetros de la tarea, serializables a JSON y ya validados.
+
+        Returns:
+            str: Identificador del trabajo.
+
+        Raises:
+            ValueError: Si el tipo de trabajo no existe.
+            JobQueueFull: Si se alcanzó el máximo de trabajos pendientes.
+        """
+        if kind not in TASKS:
+            raise ValueError(f"Tipo de trabajo no válido: '{kind}'. Opciones: {', '.join(TASKS)}.")
+        job_id = uuid.uuid4().hex
+        self.store.insert(job_id, kind, params, self.max_pending)
+        self.start_workers()
+        with self._wakeup:
+            self._wakeup.notify()
+        logger.info("Trabajo %s (%s) encolado.", job_id, kind)
+        return job_id
+
+    def status(self, job_id: str):
+        """Estado y progreso de un trabajo, o None si no existe (o fue desalojado)."""
+        return self.store.get(job_id)
+
+    def result(self, job_id: str):
+        """
+        Resultado de un trabajo, parcial si aún no terminó.
+
+        Returns:
+            dict | None: Estado del trabajo con 'complete' (bool) y 'result' (mismo formato
+                         que la ruta síncrona, o None si la tarea aún no empezó); None si
+                         el trabajo no existe.
+        """
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        header, total, chunks = self.store.result_parts(job_id)
+        job['complete'] = job['status'] == STATUS_DONE
+        job['result'] = None if header is None else assemble_result(header, total, chunks)
+        return job
+
+    def cancel(self, job_id: str):
+        """
+        Cancela un trabajo pendiente o en ejecución, o elimina uno terminado.
+
+        Returns:
+            dict | None: Estado del trabajo tras la solicitud (None si no existe o se eliminó).
+        """
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        if job['status'] in FINISHED_STATUSES:
+            self.store.delete([job_id])
+            return None
+        self.store.request_cancel(job_id)
+        return self.store.get(job_id)
+
+    def list_jobs(self) -> list:
+        """Estado de todos los trabajos conservados."""
+        return self.store.list()
+
+    def stats(self) -> dict:
+        """Contadores por estado, bytes guardados y límites configurados."""
+        stats = self.store.counts()
+        stats.update({'workers': self.workers, 'max_pending': self.max_pending, 'max_bytes': self.max_bytes,
+                      'max_jobs': self.max_jobs, 'ttl': self.ttl, 'shared': self.store.path != ':memory:'})
+        return stats
+
+    def start_workers(self):
+        """
+        Arranca los hilos de trabajo la primera vez (después del fork de gunicorn).
+
+        Se llama en cada acceso al gestor (`get_job_manager`) y, con una cola compartida,
+        al arrancar cada proceso (`start_shared_workers`), de modo que los trabajos en
+        cola de un proceso que terminó los retome cualquier otro.
+        """
+        if self._threads:
+            return
+        with self._started_lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker_loop, name=f'calc-job-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _worker_loop(self):
+        """Toma trabajos de la cola y los ejecuta, indefinidamente."""
+        while True:
+            try:
+                claimed = self.store.claim()
+            except sqlite3.Error as e:
+                logger.warning("No se pudo consultar la cola de trabajos: %s", e)
+                claimed = None
+            if claimed is None:
+                with self._wakeup:
+                    self._wakeup.wait(POLL_SECONDS)
+                continue
+            self.run_job(*claimed)
+
+    def run_job(self, job_id: str, kind: str, params: dict) -> str:
+        """
+        Ejecuta un trabajo ya marcado en ejecución, bloque a bloque.
+
+        Returns:
+            str: Estado final del trabajo.
+        """
+        started = time.perf_counter()
+        status, error = STATUS_DONE, None
+        try:
+            header, total, chunks = TASKS[kind](params)
+            self.store.start(job_id, header, total)
+            for start, chunk in chunks:
+                count = len(next(iter(chunk['values'].values()), []))
+                if self.store.add_chunk(job_id, start, json.dumps(chunk, separators=(',', ':')), count):
+                    status = STATUS_CANCELLED
+                    chunks.close()
+                    break
+        except Exception as e:
+            logger.exception("El trabajo %s (%s) falló.", job_id, kind)
+            status, error = STATUS_FAILED, str(e)
+        self.store.finish(job_id, status, error)
+        evicted = self.store.purge(self.ttl, self.max_jobs, self.max_bytes, keep=job_id)
+        logger.info("Trabajo %s (%s) terminado con estado '%s' en %.2f s (%d trabajo(s) desalojado(s)).",
+                    job_id, kind, status, time.perf_counter() - started, evicted)
+        return status
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """
+    Devuelve el gestor de trabajos del proceso, creándolo la primera vez desde el entorno.
+
+    Returns:
+        JobManager: El gestor configurado con CALC_JOB_WORKERS, CALC_JOB_MAX_PENDING,
+                    CALC_JOB_MAX_BYTES, CALC_JOB_MAX_JOBS, CALC_JOB_TTL y CALC_JOB_PATH.
+    """
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                path = os.environ.get('CALC_JOB_PATH', '').strip()
+                try:
+                    store = JobStore(path or ':memory:')
+                except sqlite3.Error as e:
+                    logger.warning("No se pudo abrir el almacén de trabajos '%s': %s. Se usa solo memoria.", path, e)
+                    store = JobStore()
+                _manager = JobManager(
+                    store,
+                    workers=_env_number('CALC_JOB_WORKERS', DEFAULT_JOB_WORKERS),
+                    max_pending=_env_number('CALC_JOB_MAX_PENDING', DEFAULT_MAX_PENDING),
+                    max_bytes=_env_number('CALC_JOB_MAX_BYTES', DEFAULT_MAX_BYTES),
+                    max_jobs=_env_number('CALC_JOB_MAX_JOBS', DEFAULT_MAX_JOBS),
+                    ttl=_env_number('CALC_JOB_TTL', DEFAULT_JOB_TTL, float),
+                )
+    _manager.start_workers()
+    return _manager
+
+
+def start_shared_workers() -> bool:
+    """
+    Arranca los hilos de trabajo de este proceso si la cola es compartida (CALC_JOB_PATH).
+
+    Con una cola solo en memoria, los trabajos de un proceso solo pueden llegar por una
+    solicitud a ese proceso, que ya arranca los hilos; con una compartida, un proceso
+    recién creado debe empezar a tomar los trabajos en cola sin esperar ninguna solicitud.
+
+    Returns:
+        bool: True si se arrancaron (o ya estaban arrancados) los hilos.
+    """
+    if not os.environ.get('CALC_JOB_PATH', '').strip():
+        return False
+    get_job_manager()
+    return True
@@ -0,0 +1,323 @@
+"""
+Generación de los kernels NumPy del catálogo de ecuaciones.
+
+Compila con SymPy (una sola vez, en la construcción) las combinaciones de ecuación e
+incógnita de `DEFAULT_WARM_PAIRS` y todas las restricciones de `EQUATIONS`, y escribe
+el módulo `services/equation_kernels.py` con una función NumPy con nombre por cada una:
+- `<clave>__<incógnita>__residual(*params, x)`: El residuo `lhs - rhs` de la ecuación.
+- `<clave>__<incógnita>` (o `<clave>__<incógnita>__0`, `__1`, ... si hay varias): Cada solución
+  cerrada, ej. `optimo_economico_plano__e__1` (e = sqrt(...) - k/h),
+  `radio_critico_esfera__r_c` (r_c = 2k/h) o `conv_exterior_vertical_laminar__h`
+  (cada correlación de convección).
+- `<clave>__<incógnita>__newton_terms(*params, x)`: El residuo y su primera y segunda
+  derivada, para las ecuaciones que solo se resuelven numéricamente.
+- `restriction_<n>(*params)`: Cada restricción de las correlaciones de convección.
+
+En ejecución, `services.equation_registry` carga ese módulo en lugar de compilar, de
+modo que una resolución típica no necesita importar SymPy.
+
+El módulo generado no se guarda en el repositorio: se genera al construir la imagen de
+Docker o el ejecutable de PyInstaller. Si el catálogo cambia y no se vuelve a generar,
+las ecuaciones modificadas simplemente no se encuentran en él y se compilan con SymPy.
+
+El modo `--check` comprueba el módulo generado contra la vía simbólica: evalúa cada
+kernel en puntos aleatorios y lo compara con la evaluación de SymPy (`evalf`) de la
+misma expresión, verifica que cada solución cerrada anule el residuo simbólico y que
+cada restricción coincida con la desigualdad simbólica.
+
+Uso (desde BackAPI/src):
+    python -m services.kernel_codegen [--output services/equation_kernels.py]
+    python -m services.kernel_codegen --check [--samples 40]
+
+Funciones principales:
+- generate_kernels_source: Devuelve el código fuente del módulo de kernels.
+- write_kernels: Genera y escribe el módulo de kernels.
+- check_kernels: Compara los kernels generados con la evaluación simbólica.
+"""
+import argparse
+import ast
+import builtins
+import importlib
+import importlib.util
+import inspect
+import os
+import re
+import sys
+
+import numpy as np
+
+from services.equation_registry import (
+    DEFAULT_WARM_PAIRS,
+    _resolve_equation,
+    compile_equation,
+    compile_restriction,
+    parse_equation,
+)
+from services.equations import EQUATIONS
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'equation_kernels.py')
+
+HEADER = '''"""
+Kernels NumPy del catálogo de ecuaciones.
+
+ARCHIVO GENERADO por `python -m services.kernel_codegen`; no editar a mano.
+"""
+'''
+
+# Rangos de muestreo de cada variable en el modo --check (valores físicamente plausibles)
+SAMPLE_RANGES = {
+    'Ti': (80.0, 400.0), 'Ta': (0.0, 30.0), 'Te': (35.0, 120.0), 'k': (0.02, 0.1),
+    'h': (2.0, 50.0), 'C': (50.0, 1000.0), 'w': (0.02, 0.3), 'beta': (1000.0, 8760.0),
+    'vida_util': (1.0, 30.0), 'eta': (0.5, 1.0), 'r': (0.005, 0.5), 'diametro': (0.01, 1.0),
+    'H': (0.05, 5.0), 'v': (0.1, 10.0), 'e': (0.001, 0.3), 'e_c': (0.001, 0.1), 'r_c': (0.001, 0.1),
+}
+DEFAULT_SAMPLES = 40
+# Tolerancia relativa entre un kernel y la evaluación simbólica
+CHECK_RTOL = 1e-9
+
+
+def _restrictions() -> list:
+    """Restricciones del catálogo, sin repetir y en orden estable."""
+    return sorted({r for eq in EQUATIONS.values() if isinstance(eq, dict)
+                   for r in eq.get('restricciones', [])})
+
+
+def _kernel_source(function, name: str, docstring: str) -> tuple:
+    """
+    Devuelve el código de una función generada por `lambdify`, renombrada y documentada.
+
+    Returns:
+        tuple[str, set[str]]: El código y los nombres globales (de NumPy) que utiliza.
+
+    Raises:
+        ValueError: Si el código utiliza nombres que no existen en NumPy ni en builtins.
+    """
+    source = re.sub(r'^def _lambdifygenerated\(', f'def {name}(', inspect.getsource(function), count=1)
+    tree = ast.parse(source)
+    local_names = {arg.arg for arg in tree.body[0].args.args}
+    local_names |= {node.id for node in ast.walk(tree)
+                    if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store)}
+    global_names = {node.id for node in ast.walk(tree)
+                    if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load)} - local_names
+    numpy_names = {n for n in global_names if hasattr(np, n)}
+    unknown = global_names - numpy_names - set(dir(builtins))
+    if unknown:
+        raise ValueError(f"El kernel '{name}' utiliza nombres desconocidos: {', '.join(sorted(unknown))}.")
+    signature, body = source.split('\n', 1)
+    return f'{signature}\n    {docstring!r}\n{body.rstrip()}\n', numpy_names
+
+
+def generate_kernels_source(pairs=None) -> str:
+    """
+    Compila las ecuaciones y restricciones del catálogo y devuelve el módulo de kernels.
+
+    Args:
+        pairs (list[tuple[str, str]], optional): Combinaciones (clave de ecuación, incógnita).
+                                                 Por defecto `DEFAULT_WARM_PAIRS`.
+
+    Returns:
+        str: Código fuente del módulo `services.equation_kernels`.
+    """
+    functions = []
+    numpy_names = set()
+    equation_entries = []
+
+    def emit(function, name, docstring):
+        source, names = _kernel_source(function, name, docstring)
+        functions.append(source)
+        numpy_names.update(names)
+        return name
+
+    for equation_key, variable in (pairs if pairs is not None else DEFAULT_WARM_PAIRS):
+        equation_str, numeric_only = _resolve_equation(equation_key)
+        compiled = compile_equation(equation_str, variable, numeric_only)
+        prefix = f'{equation_key}__{variable}'
+
+        residual_name = emit(compiled.residual, f'{prefix}__residual',
+                             f"Residuo (lhs - rhs) de '{equation_key}' respecto a '{variable}': {equation_str}")
+        solution_names = []
+        for position, solution in enumerate(compiled.solutions):
+            name = prefix if len(compiled.solutions) == 1 else f'{prefix}__{position}'
+            solution_names.append(emit(solution, name,
+                                       f"Solución cerrada {position} de '{equation_key}' para '{variable}'."))
+        newton_name = None
+        if compiled.newton_terms is not None:
+            newton_name = emit(compiled.newton_terms, f'{prefix}__newton_terms',
+                               f"Residuo de '{equation_key}' y sus derivadas 1.ª y 2.ª respecto a '{variable}'.")
+        equation_entries.append(
+            f"    ({equation_str!r}, {variable!r}): {{\n"
+            f"        'key': {equation_key!r},\n"
+            f"        'params': {compiled.params!r},\n"
+            f"        'numeric_only': {numeric_only!r},\n"
+            f"        'residual': {residual_name},\n"
+            f"        'solutions': ({''.join(name + ', ' for name in solution_names)}),\n"
+            f"        'newton_terms': {newton_name},\n"
+            f"    }},\n"
+        )
+
+    restriction_entries = []
+    for index, restriction_str in enumerate(_restrictions()):
+        compiled = compile_restriction(restriction_str)
+        name = emit(compiled.predicate, f'restriction_{index}', f"Restricción: {restriction_str}")
+        restriction_entries.append(f"    {restriction_str!r}: ({compiled.params!r}, {name}),\n")
+
+    imports = f"from numpy import {', '.join(sorted(numpy_names))}\n" if numpy_names else ''
+    return (
+        HEADER + imports + '\n\n'
+        + '\n\n'.join(functions) + '\n\n'
+        + '# (ecuación, incógnita) -> parámetros y funciones de `CompiledEquation`\n'
+        + 'EQUATION_KERNELS = {\n' + ''.join(equation_entries) + '}\n\n'
+        + '# restricción -> (parámetros, predicado) de `CompiledRestriction`\n'
+        + 'RESTRICTION_KERNELS = {\n' + ''.join(restriction_entries) + '}\n'
+    )
+
+
+def write_kernels(path: str = DEFAULT_OUTPUT, pairs=None) -> str:
+    """
+    Genera el módulo de kernels y lo escribe en `path`.
+
+    Args:
+        path (str, optional): Archivo de salida. Por defecto `services/equation_kernels.py`.
+        pairs (list[tuple[str, str]], optional): Combinaciones a generar.
+
+    Returns:
+        str: La ruta escrita.
+    """
+    source = generate_kernels_source(pairs)
+    compile(source, path, 'exec')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(source)
+    return path
+
+
+def _load_module(path: str):
+    """Importa el módulo de kernels desde un archivo."""
+    spec = importlib.util.spec_from_file_location('equation_kernels_check', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _symbolic_values(expr, symbols: dict, points: dict, size: int) -> np.ndarray:
+    """Evalúa `expr` con SymPy en cada punto; NaN donde el valor no es real y finito."""
+    values = np.full(size, np.nan)
+    names = [name for name in symbols if name in points]
+    for i in range(size):
+        value = complex(expr.evalf(30, subs={symbols[name]: points[name][i] for name in names}))
+        if abs(value.imag) <= 1e-12 * max(abs(value.real), 1.0) and np.isfinite(value.real):
+            values[i] = value.real
+    return values
+
+
+def _real_values(values, size: int) -> np.ndarray:
+    """Convierte la salida de un kernel a reales de longitud `size` (NaN si no es real)."""
+    values = np.broadcast_to(np.asarray(values, dtype=complex), (size,))
+    return np.where(values.imag != 0, np.nan, values.real)
+
+
+def _compare(label: str, kernel_values: np.ndarray, symbolic_values: np.ndarray, failures: list):
+    """Añade a `failures` un mensaje si el kernel y la evaluación simbólica difieren."""
+    scale = np.nanmax(np.abs(symbolic_values), initial=1.0)
+    close = np.isclose(kernel_values, symbolic_values, rtol=CHECK_RTOL, atol=CHECK_RTOL * scale)
+    bad = ~(close | (np.isnan(kernel_values) & np.isnan(symbolic_values)))
+    if bad.any():
+        i = int(np.argmax(bad))
+        failures.append(f"{label}: difiere en {int(bad.sum())} punto(s) "
+                        f"(ej. kernel={kernel_values[i]!r}, simbólico={symbolic_values[i]!r}).")
+
+
+def check_kernels(path: str = DEFAULT_OUTPUT, samples: int = DEFAULT_SAMPLES, seed: int = 0) -> tuple:
+    """
+    Compara el módulo de kernels generado con la evaluación simbólica de SymPy.
+
+    En puntos aleatorios de `SAMPLE_RANGES`: el residuo de cada ecuación (y, si existen,
+    su primera y segunda derivada) se compara con `evalf` de la expresión simbólica;
+    cada solución cerrada se sustituye en la ecuación simbólica y debe cumplirla; cada
+    restricción se compara con la desigualdad simbólica.
+
+    Args:
+        path (str, optional): Archivo del módulo a comprobar. Por defecto `services/equation_kernels.py`.
+        samples (int, optional): Puntos aleatorios por ecuación. Por defecto `DEFAULT_SAMPLES`.
+        seed (int, optional): Semilla del generador aleatorio. Por defecto 0.
+
+    Returns:
+        tuple[int, list[str]]: Número de kernels comprobados y descripción de cada fallo.
+    """
+    import sympy as sp
+
+    module = _load_module(path)
+    rng = np.random.default_rng(seed)
+
+    def random_points(names):
+        return {name: rng.uniform(*SAMPLE_RANGES.get(name, (0.1, 10.0)), samples) for name in names}
+
+    checked = 0
+    failures = []
+    with np.errstate(all='ignore'):
+        for (equation_str, variable), entry in module.EQUATION_KERNELS.items():
+            label = f"{entry['key']} ({variable})"
+            expr, symbols = parse_equation(equation_str)
+            residual_expr = expr.lhs - expr.rhs
+            points = random_points(entry['params'] + (variable,))
+            args = [points[name] for name in entry['params']]
+
+            _compare(f"{label} residuo", _real_values(entry['residual'](*args, points[variable]), samples),
+                     _symbolic_values(residual_expr, symbols, points, samples), failures)
+            checked += 1
+            if entry['newton_terms'] is not None:
+                terms = entry['newton_terms'](*args, points[variable])
+                derivative = residual_expr
+                for order, term in enumerate(terms):
+                    _compare(f"{label} derivada {order}", _real_values(term, samples),
+                             _symbolic_values(derivative, symbols, points, samples), failures)
+                    derivative = sp.diff(derivative, symbols[variable])
+                checked += 1
+            for position, solution in enumerate(entry['solutions']):
+                roots = _real_values(solution(*args), samples)
+                solved = dict(points, **{variable: roots})
+                lhs = _symbolic_values(expr.lhs, symbols, solved, samples)
+                rhs = _symbolic_values(expr.rhs, symbols, solved, samples)
+                valid = np.isfinite(roots)
+                bad = valid & ~np.isclose(lhs, rhs, rtol=1e-8, atol=1e-12)
+                if not valid.any():
+                    failures.append(f"{label} solución {position}: ningún punto con solución real.")
+                elif bad.any():
+                    failures.append(f"{label} solución {position}: no cumple la ecuación en {int(bad.sum())} punto(s).")
+                checked += 1
+
+        for restriction_str, (params, predicate) in module.RESTRICTION_KERNELS.items():
+            relation = sp.sympify(restriction_str)
+            symbols = {str(symbol): symbol for symbol in relation.free_symbols}
+            points = random_points(params)
+            kernel_values = np.broadcast_to(predicate(*(points[name] for name in params)), (samples,))
+            symbolic_values = np.array([bool(relation.subs({symbols[name]: points[name][i] for name in params}))
+                                        for i in range(samples)])
+            differ = int((kernel_values != symbolic_values).sum())
+            if differ:
+                failures.append(f"Restricción '{restriction_str}': difiere en {differ} punto(s).")
+            checked += 1
+    return checked, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Genera (o comprueba) los kernels NumPy del catálogo.')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help='Archivo de salida (o archivo a comprobar con --check).')
+    parser.add_argument('--check', action='store_true',
+                        help='Comprueba el módulo generado contra la evaluación simbólica, sin regenerarlo.')
+    parser.add_argument('--samples', type=int, default=DEFAULT_SAMPLES, help='Puntos aleatorios por ecuación.')
+    args = parser.parse_args()
+    if not args.check:
+        path = write_kernels(args.output)
+        print(f"Kernels generados en {path}")
+        return
+    checked, failures = check_kernels(args.output, args.samples)
+    for failure in failures:
+        print(f"FALLO: {failure}")
+    print(f"{checked} kernels comprobados, {len(failures)} fallo(s).")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Configuración del registro (logging) de la aplicación.
+
+Cada módulo usa su propio logger (`logging.getLogger(__name__)`) con formateo diferido
+(`logger.debug("... %s", valor)`), de modo que los mensajes de depuración no cuestan
+nada cuando el nivel configurado es superior a DEBUG.
+
+Además del nivel DEBUG, que registra el detalle de todos los cálculos, existe un modo
+de traza muestreada: solo una fracción de los cálculos registra su detalle (en el
+logger `calc.trace`), para diagnosticar en producción sin que el rendimiento quede
+limitado por la escritura de los registros.
+
+Configuración (variables de entorno):
+- LOG_LEVEL: Nivel de registro (DEBUG, INFO, WARNING, ERROR). Por defecto INFO.
+- LOG_TRACE_SAMPLE: Fracción (0 a 1) de cálculos cuya traza se registra aunque el nivel
+  sea superior a DEBUG. Por defecto 0 (desactivado).
+
+Funciones principales:
+- configure_logging: Configura el registro a partir de las variables de entorno.
+- tracer: Devuelve el logger con que un cálculo debe registrar su detalle, o None.
+"""
+import logging
+import os
+import random
+
+LOG_FORMAT = '%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s'
+
+# Logger de las trazas muestreadas; siempre acepta DEBUG cuando el muestreo está activo
+_trace_logger = logging.getLogger('calc.trace')
+
+
+def _trace_sample_from_env() -> float:
+    """Lee LOG_TRACE_SAMPLE, acotado a [0, 1] (0 si no es válido)."""
+    try:
+        return min(max(float(os.environ.get('LOG_TRACE_SAMPLE', '0')), 0.0), 1.0)
+    except ValueError:
+        return 0.0
+
+
+_trace_sample = _trace_sample_from_env()
+
+
+def configure_logging():
+    """
+    Configura el registro de la aplicación a partir de LOG_LEVEL y LOG_TRACE_SAMPLE.
+
+    Debe llamarse una vez al iniciar, después de cargar las variables de entorno.
+    """
+    global _trace_sample
+    level_name = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    level = logging.getLevelName(level_name)
+    if not isinstance(level, int):
+        level = logging.INFO
+    logging.basicConfig(level=level, format=LOG_FORMAT)
+    logging.getLogger().setLevel(level)
+    _trace_sample = _trace_sample_from_env()
+    if _trace_sample > 0:
+        _trace_logger.setLevel(logging.DEBUG)
+
+
+def tracer(logger: logging.Logger):
+    """
+    Devuelve el logger con que un cálculo debe registrar su detalle.
+
+    Args:
+        logger (logging.Logger): Logger del módulo que realiza el cálculo.
+
+    Returns:
+        logging.Logger | None: `logger` si tiene DEBUG activo; el logger de trazas si el
+                               cálculo resulta elegido por el muestreo; None en otro caso
+                               (el cálculo no registra su detalle).
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        return logger
+    if _trace_sample > 0 and random.random() < _trace_sample:
+        return _trace_logger
+    return None
@@ -0,0 +1,559 @@
+"""
+Tablas precalculadas del espesor 'e' y de 'h' para las consultas interactivas.
+
+La interfaz casi siempre varía uno o dos parámetros alrededor de los valores por
+defecto (`valoresBase` del frontend). Este módulo permite precalcular, por geometría,
+tipo de flujo y orientación, tablas densas de 'e' y 'h' sobre una malla regular de uno
+a tres ejes, con el resto de las variables fijas, y responder por interpolación
+multilineal los puntos de `services.vectorized.solve_espesor_points` (barridos de
+`/plot_espesor` y mallas de `/plot_grid`) que caen dentro de una tabla.
+
+Cota de error: al construir una tabla se resuelve con el método exacto la malla
+refinada a medio paso (los nodos y los puntos medios de cada arista, cara y celda) y,
+en cada celda, se compara la interpolación con la solución exacta en esos puntos. La
+interpolación multilineal de una función suave tiene su mayor error, a primer orden,
+en los puntos medios; una celda solo se usa si ese error, multiplicado por
+`ERROR_SAFETY`, no supera el error relativo máximo de la tabla en 'e' ni en 'h', si
+todos sus puntos tienen solución y si la correlación de convección (laminar o
+turbulenta) es la misma en todos ellos. Fuera del dominio de la tabla, en las celdas
+descartadas (por ejemplo, cerca del cambio de régimen, donde 'h' es discontinua) o si
+alguna variable fija no coincide, el punto se resuelve con el método exacto.
+`python -m services.lookup --check` comprueba la cota en puntos aleatorios.
+
+Las tablas se guardan como archivos `.npy` en un directorio (con un índice
+`index.json`) y se abren con `np.load(..., mmap_mode='r')`: el sistema operativo
+comparte sus páginas entre todos los procesos del servidor y solo se leen las celdas
+consultadas. Las tablas no se guardan en el repositorio; el modo es opcional y se
+activa con CALC_LOOKUP_DIR.
+
+Configuración (variables de entorno):
+- CALC_LOOKUP_DIR: Directorio con las tablas generadas. Vacía = sin tablas (por defecto).
+
+Uso (desde BackAPI/src):
+    python -m services.lookup [--config tablas.json] [--output services/lookup_tables]
+    python -m services.lookup --check [--output services/lookup_tables] [--samples 2000]
+
+Funciones y clases principales:
+- LookupTable: Una tabla abierta en memoria mapeada, con interpolación y validación de puntos.
+- build_table: Resuelve y valida la malla de una tabla.
+- write_tables: Genera las tablas de una configuración en un directorio.
+- check_tables: Compara las tablas generadas con el método exacto en puntos aleatorios.
+- load_tables: Abre las tablas de un directorio.
+- get_lookup_tables: Devuelve las tablas del proceso, configuradas desde el entorno.
+- lookup_espesor: Responde con las tablas los puntos que caen dentro de alguna.
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+
+import numpy as np
+
+from services.equations import EQUATIONS
+from services.equation_registry import get_compiled_equation
+from services.metrics import phase
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lookup_tables')
+INDEX_FILE = 'index.json'
+# Error relativo máximo por defecto de 'e' y 'h' en las celdas que se usan
+DEFAULT_MAX_ERROR = 1e-4
+# Factor con que se multiplica el error medido en los puntos medios de cada celda
+ERROR_SAFETY = 2.0
+# Tolerancia relativa con que una variable fija de la consulta coincide con la de la tabla
+FIXED_RTOL = 1e-9
+# Máximo de ejes por tabla y de nodos (producto de los ejes) por tabla
+MAX_AXES = 3
+MAX_TABLE_NODES = 2000000
+# Puntos aleatorios por tabla en --check
+DEFAULT_SAMPLES = 2000
+# Variables de las que depende 'h' (con 'H' tal como llega; ver `solve_espesor_points`)
+H_VARIABLES = ('Te', 'Ta', 'H', 'v')
+# Valores por defecto de la interfaz (`valoresBase` del frontend, con H = diametro)
+DEFAULT_VALUES = {
+    'vida_util': 15, 'w': 0.04, 'beta': 7968, 'C': 2205.48, 'k': 0.049, 'Ta': 28, 'Te': 50,
+    'Ti': 180, 'v': 2.1, 'eta': 85, 'diametro': 0.1016, 'H': 0.1016,
+}
+# Ejes de las tablas por defecto: (mínimo, máximo, nodos), alineados con los rangos por
+# defecto de /plot_espesor para que sus barridos caigan en los nodos
+DEFAULT_AXES = {'Ti': (20, 300, 225), 'v': (0.1, 10.1, 401)}
+# Ecuaciones que se resuelven numéricamente (la del plano tiene solución cerrada, tan
+# rápida de evaluar como la interpolación)
+DEFAULT_EQUATIONS = ('optimo_economico_cilindro', 'optimo_economico_esfera')
+DEFAULT_FLOWS = (('interior', 'horizontal'), ('interior', 'vertical'),
+                 ('exterior', 'horizontal'), ('exterior', 'vertical'))
+
+
+def table_variables(equation_key: str) -> tuple:
+    """
+    Variables de las que depende el espesor de una ecuación de óptimo económico con 'h'
+    calculada: sus parámetros (salvo 'h') y las de la correlación de convección. 'r' se
+    representa por 'diametro' (r = diametro / 2, como en `solve_equation_array`).
+    """
+    params = set(get_compiled_equation(equation_key, 'e').params) - {'h'}
+    params.update(H_VARIABLES)
+    if 'r' in params:
+        params.discard('r')
+        params.add('diametro')
+    return tuple(sorted(params))
+
+
+def _default_specs() -> list:
+    """Tablas por defecto: Ti × v por geometría (cilindro y esfera), tipo de flujo y orientación."""
+    return [{'equation_key': equation_key, 'flow_type': flow_type, 'orientation': orientation,
+             'axes': dict(DEFAULT_AXES)}
+            for equation_key in DEFAULT_EQUATIONS for flow_type, orientation in DEFAULT_FLOWS]
+
+
+def _table_spec(spec: dict) -> dict:
+    """
+    Valida la definición de una tabla y completa sus valores fijos y su nombre.
+
+    Los valores fijos que no se indican se toman de `DEFAULT_VALUES`; solo se guardan
+    los de las variables de `table_variables`.
+
+    Raises:
+        ValueError: Si la ecuación no es de óptimo económico o tiene solución cerrada,
+                    faltan el tipo de flujo o la orientación o no tienen correlaciones de
+                    convección, algún eje no es válido o falta algún valor fijo.
+    """
+    equation_key = spec.get('equation_key')
+    if not isinstance(equation_key, str) or not equation_key.startswith('optimo_economico'):
+        raise ValueError("'equation_key' debe ser una ecuación de óptimo económico.")
+    if get_compiled_equation(equation_key, 'e').solutions:
+        raise ValueError(f"'{equation_key}' tiene solución cerrada: no gana nada con una tabla.")
+    flow_type, orientation = spec.get('flow_type'), spec.get('orientation')
+    if not flow_type or not orientation:
+        raise ValueError(f"La tabla de '{equation_key}' necesita 'flow_type' y 'orientation'.")
+    if not any(key.startswith(f'conv_{flow_type}_{orientation}_') for key in EQUATIONS):
+        raise ValueError(f"No hay correlaciones de convección para '{flow_type}' / '{orientation}' "
+                         "(use 'interior' o 'exterior' y 'horizontal' o 'vertical').")
+    variables = table_variables(equation_key)
+    axes = spec.get('axes') or {}
+    if not isinstance(axes, dict) or not 1 <= len(axes) <= MAX_AXES:
+        raise ValueError(f"'axes' debe tener entre 1 y {MAX_AXES} variables.")
+    checked_axes = {}
+    for name, bounds in axes.items():
+        if name not in variables:
+            raise ValueError(f"'{name}' no interviene en '{equation_key}' (variables: {', '.join(variables)}).")
+        try:
+            low, high, nodes = float(bounds[0]), float(bounds[1]), int(bounds[2])
+        except (TypeError, ValueError, IndexError):
+            raise ValueError(f"El eje '{name}' debe ser [mínimo, máximo, nodos].")
+        if not low < high or nodes < 2:
+            raise ValueError(f"El eje '{name}' necesita mínimo < máximo y al menos 2 nodos.")
+        checked_axes[name] = (low, high, nodes)
+    if np.prod([nodes for _, _, nodes in checked_axes.values()]) > MAX_TABLE_NODES:
+        raise ValueError(f"La tabla supera el máximo de {MAX_TABLE_NODES} nodos.")
+
+    fixed_values = {**DEFAULT_VALUES, **(spec.get('fixed') or {})}
+    fixed = {}
+    for name in variables:
+        if name in checked_axes:
+            continue
+        if fixed_values.get(name) is None:
+            raise ValueError(f"Falta el valor fijo de '{name}' en la tabla de '{equation_key}'.")
+        fixed[name] = float(fixed_values[name])
+    max_error = float(spec.get('max_relative_error', DEFAULT_MAX_ERROR))
+    name = spec.get('name') or '_'.join([equation_key.replace('optimo_economico_', ''), flow_type,
+                                         orientation, *checked_axes])
+    return {
+        'name': name, 'equation_key': equation_key, 'flow_type': flow_type, 'orientation': orientation,
+        'axes': checked_axes, 'fixed': fixed, 'max_relative_error': max_error,
+    }
+
+
+def _cell_max(values: np.ndarray) -> np.ndarray:
+    """
+    Máximo de cada celda de la malla refinada a medio paso (ventanas de 3 puntos con
+    paso 2 en cada eje), de forma (n1 - 1, n2 - 1, ...).
+    """
+    for axis in range(values.ndim):
+        count = values.shape[axis]
+        windows = [np.take(values, np.arange(offset, count - 2 + offset, 2), axis=axis) for offset in range(3)]
+        values = np.maximum.reduce(windows)
+    return values
+
+
+def _element_strides(shape: tuple) -> list:
+    """Desplazamiento, en elementos, de un paso en cada eje de un arreglo contiguo."""
+    return [int(np.prod(shape[axis + 1:])) for axis in range(len(shape))]
+
+
+def _cells(positions: list, shape: tuple) -> tuple:
+    """
+    Celda de cada punto y su posición dentro de ella.
+
+    Args:
+        positions (list[numpy.ndarray]): Posición de los puntos en cada eje (en nodos),
+                                         dentro de [0, n - 1].
+        shape (tuple): Nodos por eje.
+
+    Returns:
+        tuple: (índice de la celda en cada eje, fracción en [0, 1] en cada eje).
+    """
+    cells = [np.minimum(position.astype(np.intp), nodes - 2) for position, nodes in zip(positions, shape)]
+    return cells, [position - cell for position, cell in zip(positions, cells)]
+
+
+def _interpolate(flat_nodes: np.ndarray, shape: tuple, cells: list, fractions: list) -> np.ndarray:
+    """
+    Interpolación multilineal de los valores en los nodos (ver `_cells`).
+
+    Args:
+        flat_nodes (numpy.ndarray): Valores en los nodos, aplanados en orden C.
+        shape (tuple): Nodos por eje.
+        cells (list[numpy.ndarray]): Índice de la celda de cada punto en cada eje.
+        fractions (list[numpy.ndarray]): Posición de cada punto dentro de su celda.
+
+    Returns:
+        numpy.ndarray: El valor interpolado en cada punto.
+    """
+    strides = _element_strides(shape)
+    base = sum(cell * stride for cell, stride in zip(cells, strides))
+    complements = [1.0 - fraction for fraction in fractions]
+    result = 0.0
+    for corner in itertools.product((0, 1), repeat=len(shape)):
+        weight = 1.0
+        for bit, fraction, complement in zip(corner, fractions, complements):
+            weight = weight * (fraction if bit else complement)
+        offset = sum(stride for bit, stride in zip(corner, strides) if bit)
+        result = result + weight * flat_nodes[base + offset]
+    return result
+
+
+def build_table(spec: dict) -> tuple:
+    """
+    Resuelve y valida la malla de una tabla.
+
+    Args:
+        spec (dict): Definición de la tabla: 'equation_key', 'flow_type', 'orientation',
+                     'axes' ({variable: [mínimo, máximo, nodos]}) y, opcionalmente,
+                     'fixed' (valores de las demás variables; por defecto
+                     `DEFAULT_VALUES`), 'max_relative_error' y 'name'.
+
+    Returns:
+        tuple: (metadatos, {'e': ..., 'h': ..., 'safe': ...}) con 'e' y 'h' en los
+               nodos y 'safe' (bool) por celda.
+
+    Raises:
+        ValueError: Si la definición no es válida (ver `_table_spec`).
+    """
+    # Solo se necesitan al construir; `services.vectorized` usa este módulo en ejecución
+    from services.vectorized import convection_regime_index, solve_espesor_points
+
+    spec = _table_spec(spec)
+    refined_axes = [np.linspace(low, high, 2 * nodes - 1) for low, high, nodes in spec['axes'].values()]
+    refined_shape = tuple(axis.size for axis in refined_axes)
+    mesh = np.meshgrid(*refined_axes, indexing='ij')
+    size = int(np.prod(refined_shape))
+    point_values = {name: values.ravel() for name, values in zip(spec['axes'], mesh)}
+    known_values = {**spec['fixed'], **point_values}
+
+    exact = solve_espesor_points(spec['equation_key'], point_values, size, spec['fixed'], spec['flow_type'],
+                                 spec['orientation'], use_lookup=False)
+    regimes = convection_regime_index(known_values, spec['flow_type'], spec['orientation'], size)
+
+    arrays = {}
+    error = np.zeros(refined_shape)
+    shape = tuple(nodes for _, _, nodes in spec['axes'].values())
+    cells, fractions = _cells([values.ravel() / 2.0 for values in np.meshgrid(
+        *[np.arange(n) for n in refined_shape], indexing='ij')], shape)
+    for name in ('e', 'h'):
+        refined = np.asarray(exact[name], dtype=float).reshape(refined_shape)
+        nodes = np.ascontiguousarray(refined[tuple(slice(None, None, 2) for _ in refined_shape)])
+        interpolated = _interpolate(nodes.ravel(), shape, cells, fractions).reshape(refined_shape)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            relative = np.abs(interpolated - refined) / np.maximum(np.abs(refined), np.finfo(float).tiny)
+        error = np.fmax(error, np.where(np.isfinite(relative), relative, np.inf))
+        arrays[name] = nodes
+
+    regimes = regimes.reshape(refined_shape).astype(float)
+    highest, lowest = _cell_max(regimes), -_cell_max(-regimes)
+    same_regime = (highest == lowest) & (lowest >= 0)
+    cell_error = _cell_max(error)
+    arrays['safe'] = same_regime & (ERROR_SAFETY * cell_error <= spec['max_relative_error'])
+    measured = cell_error[arrays['safe']]
+
+    metadata = {
+        **spec,
+        'axes': [{'name': name, 'min': low, 'max': high, 'nodes': nodes}
+                 for name, (low, high, nodes) in spec['axes'].items()],
+        'coverage': float(arrays['safe'].mean()),
+        'measured_error': float(measured.max()) if measured.size else None,
+    }
+    return metadata, arrays
+
+
+def write_tables(specs: list = None, output: str = DEFAULT_OUTPUT) -> list:
+    """
+    Genera las tablas de una configuración en un directorio.
+
+    Args:
+        specs (list[dict], optional): Definiciones de las tablas (ver `build_table`). Por
+                                      defecto, Ti × v para el cilindro y la esfera con cada
+                                      tipo de flujo y orientación, con los valores por
+                                      defecto de la interfaz.
+        output (str, optional): Directorio de salida. Por defecto `services/lookup_tables`.
+
+    Returns:
+        list[dict]: Los metadatos de cada tabla (los de `index.json`).
+
+    Raises:
+        ValueError: Si alguna definición no es válida o hay nombres repetidos.
+    """
+    specs = _default_specs() if specs is None else specs
+    os.makedirs(output, exist_ok=True)
+    index = []
+    for spec in specs:
+        metadata, arrays = build_table(spec)
+        if any(table['name'] == metadata['name'] for table in index):
+            raise ValueError(f"Nombre de tabla repetido: '{metadata['name']}'.")
+        for name, values in arrays.items():
+            np.save(os.path.join(output, f"{metadata['name']}.{name}.npy"), values)
+        index.append(metadata)
+    with open(os.path.join(output, INDEX_FILE), 'w', encoding='utf-8') as index_file:
+        json.dump({'tables': index}, index_file, indent=2)
+    return index
+
+
+class LookupTable:
+    """
+    Una tabla abierta en memoria mapeada.
+
+    Attributes:
+        metadata (dict): Los metadatos de la tabla (ver `build_table`).
+        variables (frozenset): Variables de las que depende el espesor de la ecuación.
+        e, h (numpy.memmap): Valores en los nodos.
+        safe (numpy.memmap): True en las celdas que cumplen la cota de error.
+    """
+
+    def __init__(self, metadata: dict, directory: str):
+        self.metadata = metadata
+        self.key = (metadata['equation_key'], metadata['flow_type'], metadata['orientation'])
+        self.variables = frozenset(table_variables(metadata['equation_key']))
+        # Un 'r' explícito reemplaza a diametro / 2, así que la tabla no aplica
+        self.uses_radius = 'r' in get_compiled_equation(metadata['equation_key'], 'e').params
+        self.axes = [(axis['name'], axis['min'], axis['max'], axis['nodes']) for axis in metadata['axes']]
+        self.fixed = metadata['fixed']
+        for name in ('e', 'h', 'safe'):
+            setattr(self, name, np.load(os.path.join(directory, f"{metadata['name']}.{name}.npy"), mmap_mode='r'))
+        self.shape = tuple(nodes for _, _, _, nodes in self.axes)
+        if self.e.shape != self.shape or self.h.shape != self.shape \
+                or self.safe.shape != tuple(n - 1 for n in self.shape):
+            raise ValueError(f"Los arreglos de la tabla '{metadata['name']}' no coinciden con sus ejes.")
+        # Vistas planas (sin copiar) de los archivos mapeados, para indexar sin la
+        # sobrecarga de `np.memmap`
+        self._flat = {name: np.asarray(getattr(self, name)).reshape(-1) for name in ('e', 'h', 'safe')}
+
+    def query(self, known_values: dict, size: int) -> tuple:
+        """
+        Interpola los puntos que caen en celdas válidas de la tabla.
+
+        Args:
+            known_values (dict): Valores conocidos (escalares o arreglos de longitud `size`).
+            size (int): Número de puntos.
+
+        Returns:
+            tuple: (máscara de los puntos respondidos, 'e' y 'h' en esos puntos), o None
+                   si las variables de la consulta no son las de la tabla.
+        """
+        present = {name for name in self.variables if known_values.get(name) is not None}
+        if present != self.variables or (self.uses_radius and known_values.get('r') is not None):
+            return None
+        served = np.ones(size, dtype=bool)
+        for name, value in self.fixed.items():
+            values = np.asarray(known_values[name], dtype=float)
+            if values.ndim == 0:
+                if not abs(float(values) - value) <= FIXED_RTOL * abs(value):
+                    return None
+                continue
+            served &= np.abs(values - value) <= FIXED_RTOL * abs(value)
+        positions = []
+        for name, low, high, nodes in self.axes:
+            values = np.broadcast_to(np.asarray(known_values[name], dtype=float), (size,))
+            position = (values - low) * ((nodes - 1) / (high - low))
+            # Los extremos del eje (con un margen de redondeo) pertenecen a la tabla
+            served &= (position >= -1e-9) & (position <= nodes - 1 + 1e-9)
+            positions.append(position)
+        if not served.any():
+            return served, None, None
+        positions = [np.clip(position[served], 0, nodes - 1)
+                     for position, (_, _, _, nodes) in zip(positions, self.axes)]
+        cells, fractions = _cells(positions, self.shape)
+        safe_strides = _element_strides(self.safe.shape)
+        safe = self._flat['safe'][sum(cell * stride for cell, stride in zip(cells, safe_strides))]
+        if not safe.all():
+            served[np.flatnonzero(served)[~safe]] = False
+            cells = [cell[safe] for cell in cells]
+            fractions = [fraction[safe] for fraction in fractions]
+        return served, *(_interpolate(self._flat[name], self.shape, cells, fractions) for name in ('e', 'h'))
+
+
+def load_tables(directory: str) -> dict:
+    """
+    Abre las tablas de un directorio generado con `write_tables`.
+
+    Args:
+        directory (str): Directorio con `index.json` y los archivos `.npy`.
+
+    Returns:
+        dict: {(equation_key, flow_type, orientation): [LookupTable, ...]}.
+
+    Raises:
+        OSError: Si no se pueden leer los archivos.
+        ValueError: Si el índice o los arreglos no son válidos.
+    """
+    with open(os.path.join(directory, INDEX_FILE), encoding='utf-8') as index_file:
+        index = json.load(index_file)
+    tables = {}
+    for metadata in index.get('tables', []):
+        table = LookupTable(metadata, directory)
+        tables.setdefault(table.key, []).append(table)
+    return tables
+
+
+_tables = None
+_tables_lock = threading.Lock()
+
+
+def get_lookup_tables() -> dict:
+    """
+    Devuelve las tablas del proceso, abriéndolas la primera vez.
+
+    Returns:
+        dict: Las tablas de CALC_LOOKUP_DIR (ver `load_tables`), o un diccionario vacío
+              si no se indica o no se pueden leer.
+    """
+    global _tables
+    if _tables is None:
+        with _tables_lock:
+            if _tables is None:
+                directory = os.environ.get('CALC_LOOKUP_DIR', '').strip()
+                tables = {}
+                if directory:
+                    try:
+                        tables = load_tables(directory)
+                    except (OSError, ValueError, KeyError) as e:
+                        logger.warning("No se pudieron abrir las tablas precalculadas de '%s': %s. "
+                                       "Se usa siempre el método exacto.", directory, e)
+                _tables = tables
+    return _tables
+
+
+def lookup_espesor(equation_key: str, known_values: dict, size: int, flow_type: str, orientation: str):
+    """
+    Responde con las tablas precalculadas los puntos que caen dentro de alguna.
+
+    Args:
+        equation_key (str): Clave de la ecuación.
+        known_values (dict): Valores conocidos (escalares o arreglos de longitud `size`).
+        size (int): Número de puntos.
+        flow_type (str): Tipo de flujo.
+        orientation (str): Orientación.
+
+    Returns:
+        dict | None: 'served' (máscara de los puntos respondidos), 'e' y 'h' (arreglos de
+                     longitud `size`, NaN en los demás puntos), o None si ningún punto cae
+                     en una tabla.
+    """
+    tables = get_lookup_tables().get((equation_key, flow_type, orientation))
+    if not tables:
+        return None
+    with phase('lookup'):
+        served = np.zeros(size, dtype=bool)
+        e_values = np.full(size, np.nan)
+        h_values = np.full(size, np.nan)
+        for table in tables:
+            answer = table.query(known_values, size)
+            if answer is None:
+                continue
+            mask, e_table, h_table = answer
+            new = mask & ~served
+            if not new.any():
+                continue
+            # Los valores de la tabla vienen en el orden de los puntos de `mask`
+            keep = new[mask]
+            e_values[new] = e_table[keep]
+            h_values[new] = h_table[keep]
+            served |= new
+    if not served.any():
+        return None
+    return {'served': served, 'e': e_values, 'h': h_values}
+
+
+def check_tables(directory: str = DEFAULT_OUTPUT, samples: int = DEFAULT_SAMPLES, seed: int = 0) -> tuple:
+    """
+    Compara las tablas generadas con el método exacto en puntos aleatorios de su dominio.
+
+    Args:
+        directory (str, optional): Directorio de las tablas.
+        samples (int, optional): Puntos aleatorios por tabla.
+        seed (int, optional): Semilla del generador aleatorio.
+
+    Returns:
+        tuple: (resumen por tabla, lista de fallos): un fallo es un punto respondido por
+               la tabla cuyo error relativo en 'e' o 'h' supera el máximo de la tabla.
+    """
+    from services.vectorized import solve_espesor_points
+
+    rng = np.random.default_rng(seed)
+    summary, failures = [], []
+    for tables in load_tables(directory).values():
+        for table in tables:
+            point_values = {name: rng.uniform(low, high, samples) for name, low, high, _ in table.axes}
+            known_values = {**table.fixed, **point_values}
+            served, e_table, h_table = table.query(known_values, samples)
+            exact = solve_espesor_points(table.metadata['equation_key'], point_values, samples, table.fixed,
+                                         table.metadata['flow_type'], table.metadata['orientation'],
+                                         use_lookup=False)
+            worst = 0.0
+            if served.any():
+                for name, values in (('e', e_table), ('h', h_table)):
+                    reference = exact[name][served]
+                    relative = np.abs(values - reference) / np.abs(reference)
+                    worst = max(worst, float(np.max(relative)))
+            name = table.metadata['name']
+            summary.append(f"{name}: {served.mean():.1%} de los puntos desde la tabla, "
+                           f"error máximo {worst:.2e} (máximo admitido {table.metadata['max_relative_error']:.0e})")
+            if worst > table.metadata['max_relative_error']:
+                failures.append(f"{name}: error {worst:.2e}")
+    return summary, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Genera (o comprueba) las tablas precalculadas de e y h.')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help='Directorio de salida (o directorio a comprobar con --check).')
+    parser.add_argument('--config', help="JSON con {'tables': [...]} (ver build_table). Por defecto, Ti × v "
+                                         "para el cilindro y la esfera con cada tipo de flujo y orientación.")
+    parser.add_argument('--check', action='store_true',
+                        help='Comprueba las tablas generadas contra el método exacto, sin regenerarlas.')
+    parser.add_argument('--samples', type=int, default=DEFAULT_SAMPLES, help='Puntos aleatorios por tabla.')
+    args = parser.parse_args()
+    if not args.check:
+        specs = None
+        if args.config:
+            with open(args.config, encoding='utf-8') as config_file:
+                specs = json.load(config_file)['tables']
+        for table in write_tables(specs, args.output):
+            print(f"{table['name']}: {table['coverage']:.1%} de las celdas dentro de la cota "
+                  f"(error medido {table['measured_error'] or 0:.2e})")
+        print(f"Tablas generadas en {args.output}")
+        return
+    summary, failures = check_tables(args.output, args.samples)
+    for line in summary:
+        print(line)
+    for failure in failures:
+        print(f"FALLO: {failure}")
+    print(f"{len(summary)} tablas comprobadas, {len(failures)} fallo(s).")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,318 @@
+"""
+Catálogo de materiales aislantes y comparación del espesor óptimo entre materiales.
+
+Hasta ahora 'k' y 'C' son números que se escriben a mano en cada catálogo del
+frontend. Este módulo mantiene en el servidor una tabla de productos aislantes con su
+conductividad en función de la temperatura, k(Tm) = k0 + k1·Tm + k2·Tm² (Tm, la
+temperatura media del aislamiento en °C), su costo por m³, su rango de temperatura de
+servicio y sus espesores comerciales.
+
+La tabla se guarda en disco como un CSV compacto (`materials.csv`, una fila por
+producto) y se carga una vez por proceso en arreglos de NumPy ordenados por la
+temperatura máxima de servicio: los materiales aptos para un caso se obtienen con
+`np.searchsorted` sobre esa columna y un filtro por la temperatura mínima, sin recorrer
+la tabla fila a fila.
+
+`rank_materials` evalúa k a la temperatura media de cada material apto y resuelve el
+espesor de mínimo costo de todos ellos en una sola pasada vectorizada de
+`services.economics.optimize_cost` (un caso por material), ordenando el resultado por
+costo total durante la vida útil.
+
+Los valores del catálogo incluido son orientativos (del orden de los de fichas técnicas
+de fabricantes); para cálculos de proyecto conviene reemplazarlos por los del proveedor
+con CALC_MATERIALS_PATH.
+
+Configuración (variables de entorno):
+- CALC_MATERIALS_PATH: Ruta de un CSV de materiales con las mismas columnas que
+  `materials.csv`. Vacía = el catálogo incluido (por defecto).
+
+Funciones y clases principales:
+- MaterialCatalog: Tabla de materiales en arreglos, con búsqueda por rango de temperatura.
+- load_catalog: Lee un catálogo de materiales desde un CSV.
+- get_material_catalog: Devuelve el catálogo del proceso, configurado desde el entorno.
+- rank_materials: Espesor de mínimo costo de cada material apto, ordenado por costo total.
+"""
+import csv
+import logging
+import os
+import threading
+
+import numpy as np
+
+from services.economics import COST_BASIS, GEOMETRIES, format_cost_result, optimize_cost
+
+logger = logging.getLogger(__name__)
+
+# Catálogo incluido con la aplicación
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'materials.csv')
+# Columnas del CSV de materiales
+CATALOG_COLUMNS = ('id', 'name', 't_min', 't_max', 'k0', 'k1', 'k2', 'cost', 'thicknesses')
+
+
+class MaterialCatalog:
+    """
+    Tabla de materiales aislantes en arreglos de NumPy, ordenada por 't_max'.
+
+    Attributes:
+        ids (list[str]): Identificador de cada material.
+        names (list[str]): Nombre descriptivo de cada material.
+        t_min (numpy.ndarray): Temperatura mínima de servicio (°C).
+        t_max (numpy.ndarray): Temperatura máxima de servicio (°C), en orden creciente.
+        k_coefficients (numpy.ndarray): Coeficientes (k0, k1, k2) de k(Tm), forma (n, 3).
+        cost (numpy.ndarray): Costo del aislamiento por m³ ($/m³), el 'C' de las ecuaciones.
+        thicknesses (list[numpy.ndarray]): Espesores comerciales (m) de cada material, en
+                                           orden creciente.
+    """
+
+    def __init__(self, rows: list):
+        rows = sorted(rows, key=lambda row: (row['t_max'], row['id']))
+        self.ids = [row['id'] for row in rows]
+        self.names = [row['name'] for row in rows]
+        self.t_min = np.array([row['t_min'] for row in rows], dtype=float)
+        self.t_max = np.array([row['t_max'] for row in rows], dtype=float)
+        self.k_coefficients = np.array([row['k'] for row in rows], dtype=float).reshape(len(rows), 3)
+        self.cost = np.array([row['cost'] for row in rows], dtype=float)
+        self.thicknesses = [np.sort(np.asarray(row['thicknesses'], dtype=float)) for row in rows]
+        self._positions = {material_id: i for i, material_id in enumerate(self.ids)}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def positions(self, ids) -> np.ndarray:
+        """
+        Posiciones en la tabla de los materiales indicados.
+
+        Raises:
+            ValueError: Si algún identificador no existe en el catálogo.
+        """
+        unknown = [material_id for material_id in ids if material_id not in self._positions]
+        if unknown:
+            raise ValueError(f"Materiales desconocidos: {', '.join(map(str, unknown))}.")
+        return np.array([self._positions[material_id] for material_id in ids], dtype=int)
+
+    def applicable(self, t_low: float, t_high: float) -> np.ndarray:
+        """
+        Materiales cuyo rango de servicio contiene el intervalo [t_low, t_high].
+
+        Args:
+            t_low (float): Temperatura más baja a la que estará el aislamiento (°C).
+            t_high (float): Temperatura más alta a la que estará el aislamiento (°C).
+
+        Returns:
+            numpy.ndarray: Posiciones de los materiales aptos, en orden de 't_max'.
+        """
+        start = int(np.searchsorted(self.t_max, t_high, side='left'))
+        positions = np.arange(start, len(self))
+        return positions[self.t_min[positions] <= t_low]
+
+    def conductivity(self, positions, t_mean) -> np.ndarray:
+        """
+        Conductividad térmica k(Tm) de los materiales indicados.
+
+        Args:
+            positions (numpy.ndarray): Posiciones de los materiales.
+            t_mean (float | numpy.ndarray): Temperatura media del aislamiento (°C).
+
+        Returns:
+            numpy.ndarray: k en W/(m·K) de cada material.
+        """
+        k0, k1, k2 = self.k_coefficients[positions].T
+        return k0 + t_mean * (k1 + t_mean * k2)
+
+    def describe(self, position: int) -> dict:
+        """Devuelve los datos de un material como diccionario serializable a JSON."""
+        return {
+            'id': self.ids[position],
+            'name': self.names[position],
+            't_min': float(self.t_min[position]),
+            't_max': float(self.t_max[position]),
+            'k_coefficients': self.k_coefficients[position].tolist(),
+            'C': float(self.cost[position]),
+            'thicknesses': self.thicknesses[position].tolist(),
+        }
+
+
+def _catalog_row(record: dict, line: int) -> dict:
+    """Convierte y valida una fila del CSV de materiales."""
+    try:
+        row = {
+            'id': record['id'].strip(),
+            'name': record['name'].strip(),
+            't_min': float(record['t_min']),
+            't_max': float(record['t_max']),
+            'k': [float(record['k0']), float(record['k1']), float(record['k2'])],
+            'cost': float(record['cost']),
+            'thicknesses': [float(value) / 1000 for value in record['thicknesses'].split()],
+        }
+    except (AttributeError, TypeError, ValueError) as e:
+        raise ValueError(f'Línea {line} del catálogo de materiales no válida: {e}') from e
+    if not row['id']:
+        raise ValueError(f'Línea {line} del catálogo de materiales: falta el identificador.')
+    if not row['t_min'] < row['t_max']:
+        raise ValueError(f"Material '{row['id']}': t_min debe ser menor que t_max.")
+    if not row['cost'] > 0:
+        raise ValueError(f"Material '{row['id']}': el costo debe ser positivo.")
+    k0, k1, k2 = row['k']
+    if min(k0 + t * (k1 + t * k2) for t in (row['t_min'], row['t_max'])) <= 0:
+        raise ValueError(f"Material '{row['id']}': k(T) debe ser positiva en su rango de servicio.")
+    if not row['thicknesses'] or min(row['thicknesses']) <= 0:
+        raise ValueError(f"Material '{row['id']}': los espesores comerciales deben ser positivos.")
+    return row
+
+
+def load_catalog(path: str = DEFAULT_CATALOG_PATH) -> MaterialCatalog:
+    """
+    Lee un catálogo de materiales desde un CSV.
+
+    Las líneas que empiezan con '#' son comentarios. Los espesores comerciales se
+    escriben en mm, separados por espacios, y se guardan en m.
+
+    Args:
+        path (str, optional): Ruta del CSV. Por defecto, el catálogo incluido.
+
+    Returns:
+        MaterialCatalog: El catálogo.
+
+    Raises:
+        OSError: Si no se puede leer el archivo.
+        ValueError: Si faltan columnas, hay valores no válidos o identificadores repetidos.
+    """
+    with open(path, newline='', encoding='utf-8') as file:
+        reader = csv.DictReader(line for line in file if not line.lstrip().startswith('#'))
+        missing = [name for name in CATALOG_COLUMNS if name not in (reader.fieldnames or ())]
+        if missing:
+            raise ValueError(f"Faltan columnas en el catálogo de materiales: {', '.join(missing)}.")
+        rows = [_catalog_row(record, line) for line, record in enumerate(reader, start=1)]
+    ids = [row['id'] for row in rows]
+    repeated = sorted({material_id for material_id in ids if ids.count(material_id) > 1})
+    if repeated:
+        raise ValueError(f"Materiales repetidos en el catálogo: {', '.join(repeated)}.")
+    return MaterialCatalog(rows)
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_material_catalog() -> MaterialCatalog:
+    """
+    Devuelve el catálogo de materiales del proceso, leyéndolo la primera vez.
+
+    Returns:
+        MaterialCatalog: El catálogo de CALC_MATERIALS_PATH o, si no se indica o no se
+                         puede leer, el incluido con la aplicación.
+    """
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                path = os.environ.get('CALC_MATERIALS_PATH', '').strip()
+                catalog = None
+                if path:
+                    try:
+                        catalog = load_catalog(path)
+                    except (OSError, ValueError) as e:
+                        logger.warning("No se pudo leer el catálogo de materiales '%s': %s. "
+                                       "Se usa el catálogo incluido.", path, e)
+                _catalog = catalog or load_catalog()
+    return _catalog
+
+
+def _temperature(known_values: dict, name: str):
+    """Temperatura de `known_values` como float, o None si no se indica."""
+    value = known_values.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' debe ser un número.")
+
+
+def rank_materials(equation_key: str, known_values: dict, flow_type: str = None,
+                   orientation: str = None, materials: list = None, limit: int = None,
+                   catalog: MaterialCatalog = None) -> dict:
+    """
+    Calcula el espesor de mínimo costo de cada material apto y los ordena por costo total.
+
+    El aislamiento trabaja entre la temperatura interna 'Ti' y la de la superficie 'Te'
+    (o la ambiente 'Ta' si no se indica 'Te'): un material es apto si su rango de
+    servicio contiene ese intervalo, y su 'k' se evalúa en la temperatura media. 'k' y
+    'C' de `known_values` se ignoran: los aporta cada material.
+
+    Args:
+        equation_key (str): Ecuación de óptimo económico (define la geometría).
+        known_values (dict): Valores conocidos del caso (Ti, Ta, w, beta, vida_util, eta,
+                             r o diametro, y h o las variables para calcularlo).
+        flow_type (str, optional): Tipo de flujo, necesario para calcular 'h'.
+        orientation (str, optional): Orientación, necesaria para calcular 'h'.
+        materials (list[str], optional): Identificadores de los materiales a comparar. Por
+                                         defecto, todos los del catálogo.
+        limit (int, optional): Máximo de materiales en la clasificación.
+        catalog (MaterialCatalog, optional): Catálogo; por defecto el del proceso.
+
+    Returns:
+        dict: 'basis' (unidad de instalación), 't_mean' (°C), 'temperature_range'
+              ([mínima, máxima] del aislamiento), 'candidates' (materiales aptos),
+              'ranking' (lista ordenada por costo total; cada elemento con 'rank',
+              'material', 'name', 'k', 'C', 'thicknesses' y el resultado de
+              `format_cost_result`, y los materiales sin solución al final con 'rank'
+              None) y 'excluded' (materiales descartados, con 'material' y 'reason').
+
+    Raises:
+        ValueError: Si la ecuación no es de óptimo económico, faltan 'Ti' y 'Ta'/'Te', o
+                    algún material no existe.
+    """
+    if equation_key not in GEOMETRIES:
+        raise ValueError(f"La comparación de materiales solo admite: {', '.join(GEOMETRIES)}.")
+    catalog = catalog or get_material_catalog()
+    ti = _temperature(known_values, 'Ti')
+    outer = _temperature(known_values, 'Te')
+    if outer is None:
+        outer = _temperature(known_values, 'Ta')
+    if ti is None or outer is None:
+        raise ValueError("Se necesitan 'Ti' y 'Te' o 'Ta' para elegir los materiales.")
+    t_low, t_high = min(ti, outer), max(ti, outer)
+    t_mean = 0.5 * (ti + outer)
+
+    requested = catalog.positions(materials) if materials else np.arange(len(catalog))
+    applicable = np.intersect1d(requested, catalog.applicable(t_low, t_high))
+    excluded = [
+        {'material': catalog.ids[i],
+         'reason': f'Rango de servicio [{catalog.t_min[i]:g}, {catalog.t_max[i]:g}] °C fuera de '
+                   f'[{t_low:g}, {t_high:g}] °C.'}
+        for i in np.setdiff1d(requested, applicable)
+    ]
+
+    ranking = []
+    if applicable.size:
+        k = catalog.conductivity(applicable, t_mean)
+        columns = {name: value for name, value in known_values.items() if name not in ('k', 'C')}
+        columns.update({'k': k, 'C': catalog.cost[applicable]})
+        result = optimize_cost(equation_key, columns, applicable.size, flow_type, orientation,
+                               cross_check=False)
+        # np.argsort deja los NaN (materiales sin solución) al final
+        order = np.argsort(result['cost_total'], kind='stable')
+        for position in order:
+            material = applicable[position]
+            entry = {
+                'rank': None,
+                'material': catalog.ids[material],
+                'name': catalog.names[material],
+                'k': float(k[position]),
+                'C': float(catalog.cost[material]),
+                'thicknesses': catalog.thicknesses[material].tolist(),
+                **format_cost_result(result, position),
+            }
+            if entry['error'] is None:
+                entry['rank'] = len(ranking) + 1
+            ranking.append(entry)
+
+    return {
+        'basis': COST_BASIS[GEOMETRIES[equation_key]],
+        't_mean': t_mean,
+        'temperature_range': [t_low, t_high],
+        'candidates': int(applicable.size),
+        'ranking': ranking[:limit] if limit else ranking,
+        'excluded': excluded,
+    }
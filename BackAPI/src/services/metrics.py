@@ -0,0 +1,327 @@
+"""
+Medición de tiempos por fase y métricas de la aplicación.
+
+Cuando una gráfica tarda, hace falta saber si el tiempo se fue en interpretar la
+ecuación (`sympify`), en el despeje simbólico, en `lambdify`, en el método numérico o
+en serializar la respuesta. Para ello los cálculos marcan sus fases con `phase(nombre)`;
+si la solicitud en curso se está midiendo (ver `start_request`), el tiempo de cada fase
+se acumula en su `RequestTimings`, y si no, `phase` no hace nada (su costo es
+despreciable).
+
+Las fases pueden anidarse (por ejemplo, `lambdify` ocurre dentro de la primera
+resolución de una ecuación); cada una registra su tiempo total, incluido el de las
+fases internas.
+
+Además se mantienen histogramas (duración por ruta, por clave de ecuación y por fase)
+que se exportan en el formato de texto de Prometheus con `render_prometheus`. Los
+histogramas son propios de cada proceso.
+
+Configuración (variables de entorno):
+- CALC_METRICS: 1 activa la medición por solicitud, la cabecera `Server-Timing` y los
+  histogramas de `/metrics`. Por defecto 0 (desactivado).
+- CALC_PROFILING: 1 permite `?profile=1` en las solicitudes para obtener el resumen de
+  cProfile del cálculo. Por defecto 0 (desactivado).
+
+Funciones y clases principales:
+- phase: Mide una fase del cálculo en curso (si se está midiendo).
+- RequestTimings: Tiempos acumulados por fase de una solicitud.
+- start_request / finish_request: Inician y terminan la medición de una solicitud.
+- resume_request: Reanuda la medición de una solicitud (respuestas en streaming).
+- Histogram: Histograma acumulativo con cubetas fijas, al estilo de Prometheus.
+- observe_request: Registra la duración de una solicitud en los histogramas.
+- render_prometheus: Exporta los histogramas en formato de texto de Prometheus.
+"""
+import contextvars
+import math
+import os
+import threading
+import time
+
+# Cubetas (segundos) de los histogramas de duración
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _env_flag(name: str) -> bool:
+    """True si la variable de entorno indica un valor activado (1, true, yes, on)."""
+    return os.environ.get(name, '0').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def metrics_enabled() -> bool:
+    """True si está activada la medición por solicitud (CALC_METRICS)."""
+    return _env_flag('CALC_METRICS')
+
+
+def profiling_enabled() -> bool:
+    """True si se permite `?profile=1` (CALC_PROFILING)."""
+    return _env_flag('CALC_PROFILING')
+
+
+class RequestTimings:
+    """
+    Tiempos acumulados por fase durante una solicitud.
+
+    Attributes:
+        started (float): Instante de inicio (`time.perf_counter`).
+        phases (dict): Por fase, `[segundos acumulados, número de veces]`, en el orden en
+                       que aparecieron por primera vez.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+
+    def add(self, name: str, seconds: float):
+        """Acumula `seconds` en la fase `name`."""
+        entry = self.phases.get(name)
+        if entry is None:
+            self.phases[name] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+    def elapsed(self) -> float:
+        """Segundos transcurridos desde el inicio de la solicitud."""
+        return time.perf_counter() - self.started
+
+    def as_dict(self) -> dict:
+        """Tiempos por fase en milisegundos: `{fase: {'ms': ..., 'count': ...}}`."""
+        return {name: {'ms': seconds * 1e3, 'count': count}
+                for name, (seconds, count) in self.phases.items()}
+
+    def server_timing(self, total: float = None) -> str:
+        """
+        Valor de la cabecera `Server-Timing` con la duración de cada fase.
+
+        Args:
+            total (float, optional): Duración total de la solicitud en segundos; se añade
+                                     como la métrica 'total'.
+
+        Returns:
+            str: Ej. 'sympify;dur=12.3, numeric;dur=4.1;desc="3x", total;dur=20.0'.
+        """
+        parts = []
+        for name, (seconds, count) in self.phases.items():
+            part = f"{name};dur={seconds * 1e3:.3f}"
+            if count > 1:
+                part += f';desc="{count}x"'
+            parts.append(part)
+        if total is not None:
+            parts.append(f"total;dur={total * 1e3:.3f}")
+        return ', '.join(parts)
+
+
+_current = contextvars.ContextVar('calc_request_timings', default=None)
+
+
+class _Phase:
+    """Contexto que mide una fase y la acumula en los tiempos de la solicitud."""
+
+    __slots__ = ('timings', 'name', 'started')
+
+    def __init__(self, timings: RequestTimings, name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timings.add(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class _NullPhase:
+    """Contexto vacío que se usa cuando la solicitud no se está midiendo."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+def phase(name: str):
+    """
+    Mide una fase del cálculo en curso.
+
+    Uso: `with phase('numeric'): ...`. Si la solicitud actual no se está midiendo
+    devuelve un contexto vacío.
+
+    Args:
+        name (str): Nombre de la fase (sin espacios, ej. 'lambdify').
+
+    Returns:
+        Un gestor de contexto.
+    """
+    timings = _current.get()
+    if timings is None:
+        return _NULL_PHASE
+    return _Phase(timings, name)
+
+
+def current_timings():
+    """Devuelve los `RequestTimings` de la solicitud en curso, o None si no se está midiendo."""
+    return _current.get()
+
+
+def start_request() -> RequestTimings:
+    """
+    Empieza a medir la solicitud en curso (en este hilo o contexto).
+
+    Returns:
+        RequestTimings: Los tiempos de la solicitud, que se irán acumulando.
+    """
+    timings = RequestTimings()
+    _current.set(timings)
+    return timings
+
+
+def resume_request(timings: RequestTimings):
+    """
+    Vuelve a medir en este contexto una solicitud ya iniciada.
+
+    Se usa con las respuestas en streaming: el cuerpo se genera después de que la vista
+    devolvió la respuesta, así que sus fases se acumulan reanudando la medición antes de
+    generar cada bloque (y terminándola con `finish_request` después).
+
+    Args:
+        timings (RequestTimings): Los tiempos de la solicitud (de `start_request`).
+    """
+    _current.set(timings)
+
+
+def finish_request():
+    """
+    Termina la medición de la solicitud en curso.
+
+    Returns:
+        RequestTimings | None: Los tiempos acumulados, o None si no se estaba midiendo.
+    """
+    timings = _current.get()
+    _current.set(None)
+    return timings
+
+
+class Histogram:
+    """
+    Histograma acumulativo de duraciones con etiquetas, al estilo de Prometheus.
+
+    Attributes:
+        name (str): Nombre de la métrica (ej. 'calc_request_duration_seconds').
+        help (str): Descripción de la métrica.
+        labelnames (tuple[str, ...]): Nombres de las etiquetas.
+        buckets (tuple[float, ...]): Límites superiores de las cubetas (segundos).
+    """
+
+    def __init__(self, name: str, help: str, labelnames: tuple, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        """
+        Registra una observación.
+
+        Args:
+            value (float): Valor observado (segundos).
+            *labels: Valores de las etiquetas, en el orden de `labelnames`.
+        """
+        labels = tuple(str(label) for label in labels)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Conteo por cubeta (más la de +Inf), suma y número de observaciones
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def clear(self):
+        """Elimina todas las observaciones."""
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> list:
+        """
+        Devuelve las líneas de texto de Prometheus del histograma.
+
+        Returns:
+            list[str]: Líneas HELP, TYPE y, por serie, las cubetas acumuladas, la suma y el conteo.
+        """
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, [list(counts), total, count])
+                            for labels, (counts, total, count) in self._series.items())
+        for labels, (counts, total, count) in series:
+            base = [f'{name}="{_escape_label(value)}"' for name, value in zip(self.labelnames, labels)]
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = 'le="{}"'.format('+Inf' if math.isinf(bound) else repr(bound))
+                lines.append(f"{self.name}_bucket{{{','.join(base + [le])}}} {cumulative}")
+            label_text = f"{{{','.join(base)}}}" if base else ''
+            lines.append(f"{self.name}_sum{label_text} {total!r}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+def _escape_label(value: str) -> str:
+    """Escapa un valor de etiqueta según el formato de texto de Prometheus."""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REQUEST_DURATION = Histogram(
+    'calc_request_duration_seconds', 'Duración de las solicitudes por ruta.',
+    ('route', 'method', 'status'))
+EQUATION_DURATION = Histogram(
+    'calc_equation_duration_seconds', 'Duración de las solicitudes por clave de ecuación.',
+    ('route', 'equation_key'))
+PHASE_DURATION = Histogram(
+    'calc_phase_duration_seconds', 'Tiempo acumulado por fase del cálculo en cada solicitud.',
+    ('route', 'phase'))
+
+HISTOGRAMS = (REQUEST_DURATION, EQUATION_DURATION, PHASE_DURATION)
+
+
+def observe_request(route: str, method: str, status: int, seconds: float, equation_key: str = None,
+                    timings: RequestTimings = None):
+    """
+    Registra una solicitud terminada en los histogramas.
+
+    Args:
+        route (str): Regla de la ruta (ej. '/plot_espesor').
+        method (str): Método HTTP.
+        status (int): Código de estado de la respuesta.
+        seconds (float): Duración total de la solicitud.
+        equation_key (str, optional): Clave de la ecuación calculada, si la hay.
+        timings (RequestTimings, optional): Tiempos por fase de la solicitud.
+    """
+    REQUEST_DURATION.observe(seconds, route, method, status)
+    if equation_key:
+        EQUATION_DURATION.observe(seconds, route, equation_key)
+    if timings is not None:
+        for name, (phase_seconds, _) in timings.phases.items():
+            PHASE_DURATION.observe(phase_seconds, route, name)
+
+
+def render_prometheus() -> str:
+    """
+    Exporta todos los histogramas en el formato de texto de Prometheus (versión 0.0.4).
+
+    Returns:
+        str: El texto de exposición, terminado en salto de línea.
+    """
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    return '\n'.join(lines) + '\n'
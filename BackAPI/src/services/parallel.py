@@ -0,0 +1,195 @@
+"""
+Ejecución en paralelo, con un pool de procesos, de lotes y mallas grandes.
+
+Cada solve es trabajo de CPU en NumPy que retiene el GIL, por lo que los lotes
+grandes se dividen en bloques que se resuelven en un `ProcessPoolExecutor`. Cada
+proceso del pool precompila el registro de ecuaciones una sola vez al iniciar y los
+resultados se combinan en el mismo orden en que se enviaron los bloques.
+
+Configuración (variables de entorno):
+- CALC_WORKERS: Número de procesos del pool. 0 o 1 desactiva el paralelismo (por defecto 0).
+- CALC_PARALLEL_MIN_POINTS: Tamaño mínimo de un lote para repartirlo entre procesos
+  (por defecto 20000); por debajo, el costo de comunicación supera la ganancia.
+
+Funciones principales:
+- worker_count: Número de procesos configurado.
+- should_parallelize: Indica si un lote de cierto tamaño debe repartirse.
+- chunk_bounds: Divide un rango de índices en bloques contiguos.
+- map_chunks: Ejecuta una función sobre una lista de bloques, en paralelo si corresponde.
+- shutdown_executor: Cierra el pool de procesos.
+"""
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from services.equation_registry import warm_registry
+
+logger = logging.getLogger(__name__)
+
+# Bloques enviados al pool y sin consumir que se admiten por proceso en `map_chunks`
+IN_FLIGHT_PER_WORKER = 2
+
+_executor = None
+_executor_lock = threading.Lock()
+# True dentro de los procesos del pool, para que nunca creen un pool propio
+_in_worker = False
+
+
+def worker_count() -> int:
+    """
+    Devuelve el número de procesos configurado en CALC_WORKERS.
+
+    Returns:
+        int: Número de procesos (0 si el paralelismo está desactivado o el valor no es válido).
+    """
+    try:
+        return max(int(os.environ.get('CALC_WORKERS', '0')), 0)
+    except ValueError:
+        return 0
+
+
+def min_parallel_points() -> int:
+    """
+    Devuelve el tamaño mínimo de lote configurado en CALC_PARALLEL_MIN_POINTS.
+
+    Returns:
+        int: Número mínimo de puntos para repartir un lote (20000 si el valor no es válido).
+    """
+    try:
+        return int(os.environ.get('CALC_PARALLEL_MIN_POINTS', '20000'))
+    except ValueError:
+        return 20000
+
+
+def should_parallelize(size: int) -> bool:
+    """
+    Indica si un lote de `size` puntos debe repartirse entre procesos.
+
+    Args:
+        size (int): Número de puntos o casos del lote.
+
+    Returns:
+        bool: True si hay más de un proceso configurado, el lote alcanza el tamaño
+              mínimo y no se está ya dentro de un proceso del pool.
+    """
+    return not _in_worker and worker_count() > 1 and size >= min_parallel_points()
+
+
+def _init_worker():
+    """Inicializa un proceso del pool: lo marca como tal y precompila el registro."""
+    global _in_worker
+    _in_worker = True
+    warm_registry()
+
+
+def _start_method() -> str:
+    """
+    Método de inicio de los procesos del pool: 'forkserver' si existe, 'spawn' si no.
+
+    Nunca 'fork': el servidor ya tiene otros hilos (Flask, gunicorn gthread, trabajos
+    asíncronos) y un proceso hijo copiado con un lock tomado por otro hilo (por ejemplo,
+    el del registro de ecuaciones en `_init_worker`) quedaría bloqueado.
+    """
+    return 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """
+    Devuelve el pool de procesos compartido, creándolo la primera vez.
+
+    Returns:
+        ProcessPoolExecutor: El pool con `worker_count()` procesos.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(max_workers=worker_count(), initializer=_init_worker,
+                                                mp_context=multiprocessing.get_context(_start_method()))
+                logger.info("Pool de cálculo iniciado con %d procesos.", worker_count())
+    return _executor
+
+
+def shutdown_executor():
+    """Cierra el pool de procesos si fue creado."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+def chunk_bounds(size: int, chunk_size: int) -> list:
+    """
+    Divide el rango [0, size) en bloques contiguos de a lo sumo `chunk_size` elementos.
+
+    Args:
+        size (int): Tamaño total.
+        chunk_size (int): Tamaño máximo de cada bloque.
+
+    Returns:
+        list[tuple[int, int]]: Pares (inicio, fin) de cada bloque, en orden.
+    """
+    return [(start, min(start + chunk_size, size)) for start in range(0, size, chunk_size)]
+
+
+def parallel_chunk_size(size: int) -> int:
+    """
+    Tamaño de bloque para repartir `size` puntos entre los procesos.
+
+    Se usan varios bloques por proceso para equilibrar la carga cuando unos bloques
+    tardan más que otros (por ejemplo, por el método numérico).
+
+    Args:
+        size (int): Tamaño total del lote.
+
+    Returns:
+        int: Tamaño de cada bloque.
+    """
+    chunks = max(worker_count(), 1) * 4
+    return max(-(-size // chunks), 1)
+
+
+def map_chunks(func, chunk_args: list):
+    """
+    Aplica `func` a cada bloque y devuelve los resultados en el mismo orden.
+
+    Usa el pool de procesos si el paralelismo está activado; en caso contrario
+    ejecuta los bloques en el proceso actual. En el pool se mantienen a lo sumo
+    `IN_FLIGHT_PER_WORKER` bloques por proceso enviados y sin consumir: el siguiente se
+    envía a medida que se entrega cada resultado, de modo que la memoria queda acotada
+    y, si se deja de consumir el iterador (por ejemplo, al cancelar un trabajo), los
+    bloques pendientes se cancelan.
+
+    Args:
+        func (callable): Función de nivel de módulo (serializable con pickle).
+        chunk_args (list[tuple]): Argumentos posicionales de cada bloque.
+
+    Returns:
+        iterator: Resultados de `func` para cada bloque, en orden.
+    """
+    if _in_worker or worker_count() <= 1:
+        return (func(*args) for args in chunk_args)
+    return _map_in_pool(func, chunk_args)
+
+
+def _map_in_pool(func, chunk_args: list):
+    """Generador de `map_chunks` con el pool: envía los bloques a medida que se consumen."""
+    executor = get_executor()
+    pending = deque()
+    chunk_args = iter(chunk_args)
+    try:
+        for args in itertools.islice(chunk_args, worker_count() * IN_FLIGHT_PER_WORKER):
+            pending.append(executor.submit(func, *args))
+        while pending:
+            result = pending.popleft().result()
+            for args in itertools.islice(chunk_args, 1):
+                pending.append(executor.submit(func, *args))
+            yield result
+    finally:
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,333 @@
+"""
+Caché de resultados (LRU con caducidad) para `solve_equation` y el cálculo de 'h'.
+
+Los catálogos y las gráficas vuelven a pedir una y otra vez los mismos cálculos; esta
+caché guarda los resultados ya obtenidos con una clave canónica: un hash SHA-256 de la
+operación, sus argumentos y los valores conocidos ordenados por nombre y redondeados a
+un número fijo de cifras significativas (valores que solo difieren más allá de esas
+cifras comparten resultado). Solo se guardan resultados correctos; los errores se
+vuelven a calcular siempre.
+
+Opcionalmente, los resultados se comparten entre procesos (workers del servidor o del
+pool de `services.parallel`) a través de un archivo SQLite, que actúa como segundo
+nivel detrás de la caché en memoria de cada proceso.
+
+Configuración (variables de entorno):
+- CALC_CACHE_SIZE: Número máximo de resultados en memoria (y en el archivo compartido).
+  0 desactiva la caché (por defecto 4096).
+- CALC_CACHE_TTL: Segundos de validez de cada resultado. 0 = sin caducidad (por defecto).
+- CALC_CACHE_DIGITS: Cifras significativas con que se redondean los valores de la clave
+  (por defecto 12).
+- CALC_CACHE_PATH: Ruta del archivo SQLite compartido. Vacía = solo memoria (por defecto).
+
+Funciones y clases principales:
+- ResultCache: Caché LRU con caducidad y contadores de aciertos, fallos y desalojos.
+- SQLiteBackend: Almacenamiento compartido en un archivo SQLite.
+- cache_key: Construye la clave canónica de un cálculo.
+- get_result_cache: Devuelve la caché del proceso, configurada desde el entorno.
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 4096
+DEFAULT_CACHE_DIGITS = 12
+
+# Marca de "no encontrado" (None puede ser un valor válido)
+MISSING = object()
+
+
+def _env_number(name: str, default, cast=int):
+    """Lee un número de una variable de entorno, con valor por defecto si no es válido."""
+    try:
+        return cast(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def canonical_value(value, digits: int = DEFAULT_CACHE_DIGITS):
+    """
+    Normaliza un valor para la clave: números redondeados a `digits` cifras significativas.
+
+    Args:
+        value: Valor conocido (número, cadena, None, ...).
+        digits (int, optional): Cifras significativas. Por defecto `DEFAULT_CACHE_DIGITS`.
+
+    Returns:
+        Un valor serializable a JSON equivalente para la clave.
+    """
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        number = float(value)
+        if not math.isfinite(number):
+            return repr(number)
+        return float(f"{number:.{digits}g}")
+    if isinstance(value, str):
+        try:
+            return canonical_value(float(value), digits)
+        except ValueError:
+            return value
+    return str(value)
+
+
+def cache_key(operation: str, known_values: dict, *args, digits: int = DEFAULT_CACHE_DIGITS) -> str:
+    """
+    Construye la clave canónica de un cálculo.
+
+    Args:
+        operation (str): Nombre de la operación (ej. 'solve_equation').
+        known_values (dict): Valores conocidos; el orden de las claves no importa.
+        *args: Demás argumentos que determinan el resultado (ecuación, incógnita, ...).
+        digits (int, optional): Cifras significativas para los valores numéricos.
+
+    Returns:
+        str: Hash SHA-256 hexadecimal de la representación canónica.
+    """
+    payload = [
+        operation,
+        [canonical_value(arg, digits) for arg in args],
+        sorted((str(name), canonical_value(value, digits)) for name, value in known_values.items()),
+    ]
+    encoded = json.dumps(payload, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class SQLiteBackend:
+    """
+    Almacenamiento de resultados en un archivo SQLite compartido por varios procesos.
+
+    Los valores se guardan como JSON. Se aplica la misma política LRU y de caducidad
+    que en memoria, usando la hora del último acceso de cada fila.
+    """
+
+    def __init__(self, path: str, max_size: int, ttl: float = 0):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+
+    def _connection(self) -> sqlite3.Connection:
+        """Conexión del hilo actual (sqlite3 no permite compartirlas entre hilos)."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str):
+        """
+        Busca un resultado.
+
+        Returns:
+            El valor guardado, o `MISSING` si no existe o ha caducado.
+        """
+        now = time.time()
+        with self._connection() as connection:
+            row = connection.execute('SELECT value, created FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return MISSING
+            if self.ttl and now - row[1] > self.ttl:
+                connection.execute('DELETE FROM results WHERE key = ?', (key,))
+                return MISSING
+            connection.execute('UPDATE results SET accessed = ? WHERE key = ?', (now, key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value) -> int:
+        """
+        Guarda un resultado y desaloja los menos usados si se supera `max_size`.
+
+        Returns:
+            int: Número de resultados desalojados.
+        """
+        now = time.time()
+        with self._connection() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO results (key, value, created, accessed) VALUES (?, ?, ?, ?)',
+                (key, json.dumps(value), now, now),
+            )
+            count = connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+            excess = count - self.max_size
+            if excess > 0:
+                connection.execute(
+                    'DELETE FROM results WHERE key IN '
+                    '(SELECT key FROM results ORDER BY accessed LIMIT ?)', (excess,)
+                )
+                return excess
+        return 0
+
+    def clear(self):
+        """Elimina todos los resultados del archivo."""
+        with self._connection() as connection:
+            connection.execute('DELETE FROM results')
+
+
+class ResultCache:
+    """
+    Caché LRU de resultados con caducidad opcional y almacenamiento compartido opcional.
+
+    Attributes:
+        max_size (int): Número máximo de resultados en memoria (0 desactiva la caché).
+        ttl (float): Segundos de validez de cada resultado (0 = sin caducidad).
+        digits (int): Cifras significativas con que se redondean los valores de la clave.
+        backend (SQLiteBackend | None): Segundo nivel compartido entre procesos.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE, ttl: float = 0,
+                 digits: int = DEFAULT_CACHE_DIGITS, backend: SQLiteBackend = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.digits = digits
+        self.backend = backend
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        """True si la caché guarda resultados."""
+        return self.max_size > 0
+
+    def key(self, operation: str, known_values: dict, *args) -> str:
+        """Clave canónica de un cálculo (ver `cache_key`)."""
+        return cache_key(operation, known_values, *args, digits=self.digits)
+
+    def get(self, key: str):
+        """
+        Busca un resultado, primero en memoria y después en el almacenamiento compartido.
+
+        Returns:
+            El valor guardado, o `MISSING` si no está o ha caducado.
+        """
+        if not self.enabled:
+            return MISSING
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires is None or expires > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+        if self.backend is not None:
+            try:
+                value = self.backend.get(key)
+            except sqlite3.Error:
+                value = MISSING
+            if value is not MISSING:
+                self._store(key, value)
+                with self._lock:
+                    self.hits += 1
+                    self.shared_hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return MISSING
+
+    def set(self, key: str, value):
+        """Guarda un resultado (serializable a JSON si hay almacenamiento compartido)."""
+        if not self.enabled:
+            return
+        self._store(key, value)
+        if self.backend is not None:
+            try:
+                evicted = self.backend.set(key, value)
+            except sqlite3.Error:
+                return
+            with self._lock:
+                self.evictions += evicted
+
+    def _store(self, key: str, value):
+        """Guarda en memoria y desaloja el resultado usado hace más tiempo si hace falta."""
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Vacía la caché (memoria y almacenamiento compartido) y reinicia los contadores."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.shared_hits = self.misses = self.evictions = self.expirations = 0
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self) -> dict:
+        """
+        Devuelve los contadores de la caché.
+
+        Returns:
+            dict: 'enabled', 'size', 'max_size', 'ttl', 'hits', 'shared_hits', 'misses',
+                  'evictions', 'expirations', 'hit_rate' y 'shared' (si hay archivo compartido).
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'shared': self.backend is not None,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """
+    Devuelve la caché de resultados del proceso, creándola la primera vez desde el entorno.
+
+    Returns:
+        ResultCache: La caché configurada con CALC_CACHE_SIZE, CALC_CACHE_TTL,
+                     CALC_CACHE_DIGITS y CALC_CACHE_PATH.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                max_size = _env_number('CALC_CACHE_SIZE', DEFAULT_CACHE_SIZE)
+                ttl = _env_number('CALC_CACHE_TTL', 0, float)
+                digits = _env_number('CALC_CACHE_DIGITS', DEFAULT_CACHE_DIGITS)
+                path = os.environ.get('CALC_CACHE_PATH', '').strip()
+                backend = None
+                if path and max_size > 0:
+                    try:
+                        backend = SQLiteBackend(path, max_size, ttl)
+                    except sqlite3.Error as e:
+                        logger.warning("No se pudo abrir la caché compartida '%s': %s. Se usa solo memoria.", path, e)
+                _cache = ResultCache(max_size, ttl, digits, backend)
+    return _cache
@@ -0,0 +1,246 @@
+"""
+Muestreo adaptativo de las curvas del espesor óptimo.
+
+En lugar de evaluar un rango con paso fijo (`np.arange`), que sobremuestrea las zonas
+casi rectas y puede saltarse los cambios de correlación de convección, la curva se
+construye por refinamiento: se parte de una malla uniforme gruesa y, en cada ronda, se
+evalúa el punto medio de los intervalos pendientes. Un intervalo se divide mientras la
+desviación del punto medio respecto de la recta entre sus extremos (proporcional a la
+curvatura de la curva) supere la tolerancia en 'e' o en 'h', medida en fracción del
+rango de valores de cada curva, es decir, en fracción de la altura de la gráfica.
+
+Los intervalos donde cambia la correlación de convección (laminar/turbulento, según
+las `restricciones`) se tratan aparte: el punto de cambio se localiza por bisección
+evaluando solo las restricciones, sin resolver 'e', y se añaden a la curva los dos
+puntos que lo rodean, de modo que el salto de 'h' queda representado con dos
+soluciones. Los intervalos donde la ecuación deja de tener solución se refinan hasta
+`MIN_WIDTH_FRACTION` del rango.
+
+Funciones principales:
+- regime_transitions: Localiza por bisección los cambios de correlación dentro de intervalos.
+- adaptive_sweep_espesor: Barrido adaptativo del espesor 'e' (y de 'h') con presupuesto
+  de puntos y tolerancia.
+"""
+import numpy as np
+
+from services.vectorized import CONVECTION_REGIMES, convection_regime_index, solve_espesor_points
+
+# Puntos de la malla uniforme inicial
+INITIAL_POINTS = 17
+# Tolerancia por defecto, en fracción del rango de valores de cada curva
+DEFAULT_TOLERANCE = 1e-3
+# Presupuesto de puntos por defecto
+DEFAULT_MAX_POINTS = 200
+# Ancho mínimo de un intervalo, en fracción del rango de la variable
+MIN_WIDTH_FRACTION = 1e-6
+# Ancho, en fracción del rango de la variable, con que se localiza un cambio de correlación
+TRANSITION_XTOL = 1e-10
+MAX_BISECTIONS = 60
+
+
+def regime_transitions(regime_of, lower, upper, xtol: float, maxiter: int = MAX_BISECTIONS):
+    """
+    Localiza por bisección un cambio de correlación dentro de cada intervalo.
+
+    Args:
+        regime_of (callable): Recibe un arreglo de valores de la variable y devuelve el
+                              índice de correlación de cada uno (ver `convection_regime_index`).
+        lower (numpy.ndarray): Extremos inferiores de los intervalos.
+        upper (numpy.ndarray): Extremos superiores; la correlación en `upper` difiere de
+                               la de `lower`.
+        xtol (float): Ancho final de los intervalos.
+        maxiter (int, optional): Máximo de bisecciones. Por defecto `MAX_BISECTIONS`.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: Los extremos de intervalos de ancho `xtol`
+                                             (o menor) que contienen un cambio de correlación.
+    """
+    lower = np.array(lower, dtype=float)
+    upper = np.array(upper, dtype=float)
+    regime_lower = regime_of(lower)
+    for _ in range(maxiter):
+        pending = (upper - lower) > xtol
+        if not pending.any():
+            break
+        middle = 0.5 * (lower[pending] + upper[pending])
+        same = regime_of(middle) == regime_lower[pending]
+        index = np.flatnonzero(pending)
+        lower[index[same]] = middle[same]
+        upper[index[~same]] = middle[~same]
+    return lower, upper
+
+
+def _deviation(values, left, right, middle, scale):
+    """Desviación del punto medio respecto de la recta entre los extremos, en fracción de `scale`."""
+    a, b, m = values[left], values[right], values[middle]
+    deviation = np.abs(m - 0.5 * (a + b)) / scale
+    # Un extremo con solución y el otro sin ella: frontera del dominio, se sigue refinando
+    boundary = np.isnan(a) != np.isnan(b)
+    boundary |= np.isnan(m) & ~(np.isnan(a) & np.isnan(b))
+    deviation[boundary] = np.inf
+    deviation[np.isnan(deviation)] = 0.0
+    return deviation
+
+
+def _scale(values):
+    """Rango de los valores de una curva, o su magnitud si es constante."""
+    finite = values[np.isfinite(values)]
+    if finite.size == 0:
+        return 1.0
+    span = float(finite.max() - finite.min())
+    return span if span > 0 else max(float(np.abs(finite).max()), 1.0)
+
+
+def adaptive_sweep_espesor(equation_key: str, variable: str, min_val: float, max_val: float,
+                           known_values: dict, flow_type: str = None, orientation: str = None,
+                           tol: float = DEFAULT_TOLERANCE, max_points: int = DEFAULT_MAX_POINTS) -> dict:
+    """
+    Calcula el espesor 'e' (y 'h') a lo largo de una variable con muestreo adaptativo.
+
+    Args:
+        equation_key (str): Clave de la ecuación en `EQUATIONS`.
+        variable (str): Variable que se barre.
+        min_val (float): Extremo inferior del rango.
+        max_val (float): Extremo superior del rango (mayor que `min_val`).
+        known_values (dict): Valores conocidos para las demás variables.
+        flow_type (str, optional): Tipo de flujo, necesario para calcular 'h'.
+        orientation (str, optional): Orientación, necesaria para calcular 'h'.
+        tol (float, optional): Tolerancia, en fracción del rango de valores de 'e' y de 'h'.
+        max_points (int, optional): Máximo de puntos resueltos (al menos 2).
+
+    Returns:
+        dict: Como `sweep_espesor` ('x', 'e', 'h', 'iterations', 'h_calculado'), con los
+              puntos ordenados por 'x'; además 'transitions' (lista de cambios de
+              correlación, cada uno con 'x', 'from', 'to', 'x_left', 'x_right', 'e_left',
+              'e_right', 'h_left' y 'h_right') y 'converged' (False si se agotó el
+              presupuesto antes de alcanzar la tolerancia).
+    """
+    span = max_val - min_val
+    min_width = span * MIN_WIDTH_FRACTION
+    max_points = max(int(max_points), 2)
+
+    def solve(x_values):
+        return solve_espesor_points(equation_key, {variable: x_values}, x_values.shape[0],
+                                    known_values, flow_type, orientation)
+
+    tracks_regime = (equation_key.startswith('optimo_economico') and variable != 'h'
+                     and bool(flow_type and orientation))
+
+    def regime_of(x_values):
+        if not tracks_regime:
+            return np.zeros(x_values.shape[0], dtype=int)
+        values = {k: v for k, v in known_values.items() if k != 'h'}
+        values[variable] = x_values
+        return convection_regime_index(values, flow_type, orientation, x_values.shape[0])
+
+    x = np.linspace(min_val, max_val, min(INITIAL_POINTS, max_points))
+    first = solve(x)
+    e, h, iterations = first['e'], np.asarray(first['h'], dtype=float), first['iterations']
+    regime = regime_of(x)
+    # Intervalos (i, i + 1) pendientes de revisar
+    active = np.ones(x.size - 1, dtype=bool)
+    transitions = []
+
+    def merge(after, new_x, new_solution, new_regime, active_left, active_right):
+        """
+        Inserta puntos nuevos dentro de los intervalos `after` (varios puntos en un mismo
+        intervalo, en el orden en que aparecen). `active_left`/`active_right` indican si
+        quedan pendientes los intervalos a la izquierda/derecha de cada punto nuevo.
+        """
+        nonlocal x, e, h, iterations, regime, active
+        size = x.size
+        order = np.argsort(np.concatenate([np.arange(size), after + 0.5]), kind='stable')
+        x = np.concatenate([x, new_x])[order]
+        e = np.concatenate([e, new_solution['e']])[order]
+        h = np.concatenate([h, new_solution['h']])[order]
+        iterations = np.concatenate([iterations, new_solution['iterations']])[order]
+        regime = np.concatenate([regime, new_regime])[order]
+        left, right = order[:-1], order[1:]
+        active = np.where(right >= size, active_left[np.maximum(right - size, 0)],
+                          np.where(left >= size, active_right[np.maximum(left - size, 0)],
+                                   active[np.minimum(left, size - 2)]))
+
+    while x.size < max_points and active.any():
+        budget = max_points - x.size
+
+        # 1) Cambios de correlación: se localizan sin resolver 'e' y se añaden los dos
+        #    puntos que rodean cada cambio
+        changed = np.flatnonzero(active & (regime[:-1] != regime[1:])
+                                 & (np.diff(x) > span * TRANSITION_XTOL * 4))
+        changed = changed[:budget // 2]
+        if changed.size:
+            left, right = regime_transitions(regime_of, x[changed], x[changed + 1], span * TRANSITION_XTOL)
+            pair_x = np.column_stack([left, right]).ravel()
+            pair = solve(pair_x)
+            pair_regime = regime_of(pair_x)
+            pair_h = np.broadcast_to(pair['h'], pair_x.shape)
+            for n in range(changed.size):
+                k_left, k_right = 2 * n, 2 * n + 1
+                transitions.append({
+                    'x': float(0.5 * (pair_x[k_left] + pair_x[k_right])),
+                    'from': _regime_name(pair_regime[k_left]), 'to': _regime_name(pair_regime[k_right]),
+                    'x_left': float(pair_x[k_left]), 'x_right': float(pair_x[k_right]),
+                    'e_left': _number(pair['e'][k_left]), 'e_right': _number(pair['e'][k_right]),
+                    'h_left': _number(pair_h[k_left]), 'h_right': _number(pair_h[k_right]),
+                })
+            # Cada intervalo queda como (x_i, izquierda), (izquierda, derecha) y
+            # (derecha, x_i+1); el del medio ya no se refina
+            pending = np.ones(changed.size, dtype=bool)
+            merge(np.concatenate([changed, changed]), np.concatenate([left, right]),
+                  {'e': np.concatenate([pair['e'][0::2], pair['e'][1::2]]),
+                   'h': np.concatenate([pair_h[0::2], pair_h[1::2]]),
+                   'iterations': np.concatenate([pair['iterations'][0::2], pair['iterations'][1::2]])},
+                  np.concatenate([pair_regime[0::2], pair_regime[1::2]]),
+                  np.concatenate([pending, ~pending]), np.concatenate([~pending, pending]))
+            continue
+
+        # 2) Curvatura: se evalúa el punto medio de los intervalos pendientes, empezando
+        #    por los más anchos si el presupuesto no alcanza para todos
+        candidates = np.flatnonzero(active)
+        widths = np.diff(x)[candidates]
+        too_narrow = widths <= min_width
+        active[candidates[too_narrow]] = False
+        candidates, widths = candidates[~too_narrow], widths[~too_narrow]
+        if candidates.size == 0:
+            break
+        if candidates.size > budget:
+            candidates = np.sort(candidates[np.argsort(-widths, kind='stable')[:budget]])
+        middle_x = 0.5 * (x[candidates] + x[candidates + 1])
+        middle = solve(middle_x)
+        middle_h = np.broadcast_to(middle['h'], middle_x.shape)
+        middle_regime = regime_of(middle_x)
+
+        values_e = np.concatenate([e, middle['e']])
+        values_h = np.concatenate([h, middle_h])
+        positions = x.size + np.arange(candidates.size)
+        deviation = _deviation(values_e, candidates, candidates + 1, positions, _scale(values_e))
+        if np.isfinite(values_h).any():
+            deviation = np.maximum(deviation, _deviation(values_h, candidates, candidates + 1,
+                                                         positions, _scale(values_h)))
+        refine = deviation > tol
+        # Un cambio de correlación dentro de una mitad la mantiene pendiente
+        active_left = refine | (middle_regime != regime[candidates])
+        active_right = refine | (middle_regime != regime[candidates + 1])
+        merge(candidates, middle_x, {'e': middle['e'], 'h': middle_h, 'iterations': middle['iterations']},
+              middle_regime, active_left, active_right)
+
+    return {
+        'x': x,
+        'e': e,
+        'h': h,
+        'iterations': iterations,
+        'h_calculado': first['h_calculado'],
+        'transitions': sorted(transitions, key=lambda t: t['x']),
+        'converged': not active.any(),
+    }
+
+
+def _regime_name(index):
+    """Nombre de la correlación de convección (None si ninguna es aplicable)."""
+    return CONVECTION_REGIMES[index] if 0 <= index < len(CONVECTION_REGIMES) else None
+
+
+def _number(value):
+    """Convierte un valor a float, o None si es NaN."""
+    value = float(value)
+    return None if np.isnan(value) else value
@@ -0,0 +1,794 @@
+"""
+Motor vectorizado para resolver muchas instancias de una ecuación en una sola pasada.
+
+A diferencia de `services.calculator`, que resuelve un caso por llamada, las funciones
+de este módulo reciben los valores conocidos como escalares o arreglos de NumPy de
+igual longitud y devuelven arreglos con un resultado por punto. Los puntos que no
+tienen solución quedan como NaN en lugar de interrumpir el cálculo completo.
+
+Funciones principales:
+- convection_regime_index: Elige con máscaras, para todos los puntos, la correlación
+  (laminar o turbulenta) cuyas restricciones se cumplen.
+- convection_coefficient_array: Calcula 'h' para todos los puntos con la correlación elegida.
+- solve_equation_array: Resuelve una ecuación del catálogo para todos los puntos, con la
+  forma cerrada cuando existe o con un buscador de raíces vectorizado en caso contrario.
+- bracketed_root: Método de Chandrupatla (familia de Brent) vectorizado sobre intervalos.
+- safeguarded_newton: Newton/Halley con derivadas analíticas, protegido por el intervalo.
+- expand_brackets: Amplía los intervalos de búsqueda que no contienen un cambio de signo.
+- numeric_root: Resuelve numéricamente una ecuación compilada con el método elegido.
+- continuation_root: Como `numeric_root`, pero usando las soluciones de los puntos
+  vecinos como estimación inicial e intervalo estrecho (barridos a lo largo de una variable).
+- solve_espesor_points: Espesor 'e' (y 'h') en un conjunto de puntos donde cambian una o más variables.
+- sweep_espesor: Barrido del espesor 'e' (y de 'h') a lo largo de una variable.
+- range_size: Número de puntos de un rango (min, max, paso), igual que `np.arange`.
+- iter_sweep_espesor: Barrido por bloques crecientes, sin materializar la serie completa.
+"""
+import numpy as np
+
+from services.equations import EQUATIONS
+from services.equation_registry import get_compiled_equation, get_compiled_restriction
+from services.lookup import lookup_espesor
+from services.metrics import phase
+
+# Correlaciones de convección, en el orden en que se prueban sus restricciones
+CONVECTION_REGIMES = ("laminar", "turbulento")
+
+# Valor que sustituye a NaN/inf en el residuo, igual que `safe_f_num` en `solve_equation`
+RESIDUAL_FALLBACK = 1e6
+
+# Métodos numéricos disponibles: Halley y Newton usan las derivadas analíticas del
+# registro; 'brentq' usa solo el residuo (Chandrupatla, de la familia de Brent)
+NUMERIC_METHODS = ('halley', 'newton', 'brentq')
+DEFAULT_NUMERIC_METHOD = 'halley'
+
+# Tamaño del primer bloque y tamaño máximo de los bloques de un barrido por bloques
+# (ver `iter_sweep_espesor`); son múltiplos de CONTINUATION_STRIDE
+STREAM_FIRST_CHUNK = 256
+STREAM_MAX_CHUNK = 16384
+
+# Ampliación del intervalo [0, r*10] cuando no contiene un cambio de signo
+BRACKET_EXPANSION_FACTOR = 10.0
+MAX_BRACKET_EXPANSIONS = 6
+
+# Continuación: se resuelve en frío uno de cada CONTINUATION_STRIDE puntos y el resto
+# parte de la predicción de sus vecinos; por debajo de CONTINUATION_MIN_POINTS no compensa
+CONTINUATION_STRIDE = 8
+CONTINUATION_MIN_POINTS = 32
+
+# Estado de cada punto resuelto por `solve_equation_array`
+STATUS_OK = 0
+STATUS_DATOS_INVALIDOS = 1
+STATUS_SIN_SOLUCION_REAL = 2
+STATUS_SIN_CAMBIO_DE_SIGNO = 3
+STATUS_NO_CONVERGE = 4
+
+STATUS_MENSAJES = {
+    STATUS_DATOS_INVALIDOS: "Faltan valores conocidos o no son numéricos.",
+    STATUS_SIN_SOLUCION_REAL: "La ecuación no tiene solución real con los valores proporcionados.",
+    STATUS_SIN_CAMBIO_DE_SIGNO: "No se puede encontrar una raíz en el intervalo de búsqueda. Cambia los parámetros o revisa los datos de entrada.",
+    STATUS_NO_CONVERGE: "El método numérico no convergió.",
+}
+
+
+def _parameter_arrays(compiled, known_values: dict, size: int) -> list:
+    """
+    Devuelve los parámetros de una ecuación compilada como arreglos de longitud `size`.
+
+    Raises:
+        ValueError: Si falta algún parámetro o su valor no es numérico.
+    """
+    missing = [name for name in compiled.params if known_values.get(name) is None]
+    if missing:
+        raise ValueError(
+            f"Faltan valores conocidos para resolver '{compiled.variable}': {', '.join(missing)}."
+        )
+    try:
+        return [
+            np.broadcast_to(np.asarray(known_values[name], dtype=float), (size,))
+            for name in compiled.params
+        ]
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Valor no numérico en los valores conocidos: {e}")
+
+
+def _take(arg, index):
+    """
+    Devuelve los valores de un parámetro en las posiciones `index`.
+
+    Los parámetros comunes a todos los puntos son vistas de un escalar (paso 0); en ese
+    caso se devuelve el escalar, que NumPy difunde sin copiar el arreglo.
+    """
+    if arg.strides[0] == 0:
+        return arg[:1]
+    return arg[index]
+
+
+def _select_closed_form(compiled, args: list, size: int):
+    """
+    Evalúa las soluciones de forma cerrada y elige una por punto.
+
+    Igual que `solve_equation`, prefiere la primera solución real y positiva y, si no
+    existe, la primera solución real.
+
+    Returns:
+        numpy.ndarray: Solución por punto (NaN si no hay solución real).
+    """
+    candidates = []
+    with np.errstate(all='ignore'):
+        for solution in compiled.solutions:
+            value = np.broadcast_to(np.asarray(solution(*args)), (size,))
+            real = np.where(np.imag(value) == 0, np.real(value), np.nan).astype(float)
+            real[~np.isfinite(real)] = np.nan
+            candidates.append(real)
+    result = np.full(size, np.nan)
+    for candidate in candidates:
+        take = np.isnan(result) & (candidate > 0)
+        result[take] = candidate[take]
+    for candidate in candidates:
+        take = np.isnan(result) & ~np.isnan(candidate)
+        result[take] = candidate[take]
+    return result
+
+
+def bracketed_root(func, lower, upper, xtol=1e-6, maxiter=50):
+    """
+    Busca simultáneamente una raíz de `func` en cada intervalo [lower, upper].
+
+    Implementa el método de Chandrupatla (interpolación cuadrática inversa protegida
+    con bisección, de la misma familia que Brent) sobre arreglos: cada punto avanza
+    de forma independiente y deja de iterar al converger.
+
+    Args:
+        func (callable): Función `func(x, index)` que evalúa el residuo en los puntos
+                         `x` correspondientes a las posiciones `index` del lote.
+        lower (numpy.ndarray): Extremos inferiores de los intervalos.
+        upper (numpy.ndarray): Extremos superiores de los intervalos.
+        xtol (float, optional): Tolerancia absoluta en x. Por defecto es 1e-6.
+        maxiter (int, optional): Número máximo de iteraciones por punto. Por defecto es 50.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]: Una tupla conteniendo:
+            - Las raíces (NaN donde no hubo cambio de signo o no se convergió).
+            - El número de iteraciones por punto.
+            - Un arreglo booleano que indica qué puntos convergieron.
+    """
+    lower = np.asarray(lower, dtype=float)
+    upper = np.asarray(upper, dtype=float)
+    size = lower.shape[0]
+    all_index = np.arange(size)
+    root = np.full(size, np.nan)
+    iterations = np.zeros(size, dtype=int)
+    converged = np.zeros(size, dtype=bool)
+
+    b, a = lower.copy(), upper.copy()
+    fb, fa = func(b, all_index), func(a, all_index)
+    converged |= fb == 0
+    root[fb == 0] = b[fb == 0]
+    exact_upper = (fa == 0) & ~converged
+    converged |= exact_upper
+    root[exact_upper] = a[exact_upper]
+    active = ~converged & (np.sign(fa) * np.sign(fb) < 0)
+    c, fc = a.copy(), fa.copy()
+    t = np.full(size, 0.5)
+    eps = np.finfo(float).eps
+
+    for _ in range(maxiter):
+        index = np.flatnonzero(active)
+        if index.size == 0:
+            break
+        ai, bi, ci = a[index], b[index], c[index]
+        fai, fbi, fci = fa[index], fb[index], fc[index]
+        xt = ai + t[index] * (bi - ai)
+        ft = func(xt, index)
+        iterations[index] += 1
+
+        same_sign = np.sign(ft) == np.sign(fai)
+        ci = np.where(same_sign, ai, bi)
+        fci = np.where(same_sign, fai, fbi)
+        bi = np.where(same_sign, bi, ai)
+        fbi = np.where(same_sign, fbi, fai)
+        ai, fai = xt, ft
+
+        use_a = np.abs(fai) < np.abs(fbi)
+        xm = np.where(use_a, ai, bi)
+        fm = np.where(use_a, fai, fbi)
+        tol = 2 * eps * np.abs(xm) + xtol
+        with np.errstate(all='ignore'):
+            tlim = tol / np.abs(bi - ai)
+        done = (fm == 0) | (tlim > 0.5)
+
+        with np.errstate(all='ignore'):
+            xi = (ai - bi) / (ci - bi)
+            phi = (fai - fbi) / (fci - fbi)
+            t_iqi = (fai / (fbi - fai) * fci / (fbi - fci)
+                     + (ci - ai) / (bi - ai) * fai / (fci - fai) * fbi / (fci - fbi))
+        use_iqi = (phi ** 2 < xi) & ((1 - phi) ** 2 < 1 - xi) & np.isfinite(t_iqi)
+        ti = np.clip(np.where(use_iqi, t_iqi, 0.5), tlim, 1 - tlim)
+
+        a[index], b[index], c[index] = ai, bi, ci
+        fa[index], fb[index], fc[index] = fai, fbi, fci
+        t[index] = ti
+        root[index[done]] = xm[done]
+        converged[index[done]] = True
+        active[index[done]] = False
+
+    return root, iterations, converged
+
+
+def safeguarded_newton(terms, lower, upper, x0=None, xtol=1e-6, maxiter=50, halley=True, func=None):
+    """
+    Busca simultáneamente una raíz en cada intervalo [lower, upper] con Newton o Halley.
+
+    Cada paso usa las derivadas analíticas del residuo; si el paso sale del intervalo
+    que encierra la raíz, no es finito o no reduce lo suficiente el paso anterior, se
+    sustituye por una bisección (como `rtsafe`). El intervalo se actualiza en cada
+    iteración con el signo del residuo, por lo que la convergencia está garantizada.
+
+    Args:
+        terms (callable): Función `terms(x, index)` que devuelve `(f, f', f'')` en los
+                          puntos `x` correspondientes a las posiciones `index` del lote.
+        lower (numpy.ndarray): Extremos inferiores de los intervalos.
+        upper (numpy.ndarray): Extremos superiores de los intervalos.
+        x0 (numpy.ndarray, optional): Estimación inicial por punto (por ejemplo, la
+                                      solución de un punto vecino). Los valores NaN o
+                                      fuera del intervalo se sustituyen por su punto medio.
+        xtol (float, optional): Tolerancia absoluta en x. Por defecto es 1e-6.
+        maxiter (int, optional): Número máximo de iteraciones por punto. Por defecto es 50.
+        halley (bool, optional): True para Halley (usa f''), False para Newton.
+        func (callable, optional): Función `func(x, index)` que evalúa solo el residuo,
+                                   más barata que `terms`, para los extremos del intervalo.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]: Una tupla conteniendo:
+            - Las raíces (NaN donde no hubo cambio de signo o no se convergió).
+            - El número de iteraciones por punto.
+            - Un arreglo booleano que indica qué puntos convergieron.
+    """
+    # a: extremo con f < 0, b: extremo con f > 0 (no necesariamente a < b)
+    a = np.asarray(lower, dtype=float).copy()
+    b = np.asarray(upper, dtype=float).copy()
+    size = a.shape[0]
+    all_index = np.arange(size)
+    root = np.full(size, np.nan)
+    iterations = np.zeros(size, dtype=int)
+    converged = np.zeros(size, dtype=bool)
+
+    if func is None:
+        func = lambda x, index: terms(x, index)[0]
+    fa = func(a, all_index)
+    fb = func(b, all_index)
+    for x_end, f_end in ((a, fa), (b, fb)):
+        exact = (f_end == 0) & ~converged
+        root[exact] = x_end[exact]
+        converged |= exact
+    active = ~converged & (np.sign(fa) * np.sign(fb) < 0)
+    swap = fa > 0
+    a[swap], b[swap] = b[swap], a[swap]
+
+    lo, hi = np.minimum(a, b), np.maximum(a, b)
+    x = 0.5 * (lo + hi)
+    if x0 is not None:
+        x0 = np.broadcast_to(np.asarray(x0, dtype=float), (size,))
+        inside = np.isfinite(x0) & (x0 > lo) & (x0 < hi)
+        x[inside] = x0[inside]
+    dx = hi - lo
+    dx_old = dx.copy()
+
+    for _ in range(maxiter):
+        index = np.flatnonzero(active)
+        if index.size == 0:
+            break
+        xi = x[index]
+        f, d1, d2 = terms(xi, index)
+        iterations[index] += 1
+
+        negative = f < 0
+        a[index[negative]] = xi[negative]
+        b[index[f > 0]] = xi[f > 0]
+        ai, bi = a[index], b[index]
+        lo, hi = np.minimum(ai, bi), np.maximum(ai, bi)
+
+        with np.errstate(all='ignore'):
+            if halley:
+                step = 2 * f * d1 / (2 * d1 ** 2 - f * d2)
+            else:
+                step = f / d1
+        x_new = xi - step
+        bisect = (~np.isfinite(x_new) | (x_new <= lo) | (x_new >= hi)
+                  | (np.abs(2 * step) > dx_old[index]))
+        x_new = np.where(bisect, 0.5 * (lo + hi), x_new)
+        dx_old[index] = dx[index]
+        dx[index] = np.abs(x_new - xi)
+
+        done = (f == 0) | (dx[index] < xtol)
+        x_new = np.where(f == 0, xi, x_new)
+        x[index] = x_new
+        root[index[done]] = x_new[done]
+        converged[index[done]] = True
+        active[index[done]] = False
+
+    return root, iterations, converged
+
+
+def expand_brackets(func, lower, upper, factor=BRACKET_EXPANSION_FACTOR,
+                    max_expansions=MAX_BRACKET_EXPANSIONS):
+    """
+    Amplía los intervalos [lower, upper] cuyo residuo no cambia de signo.
+
+    En cada ampliación el intervalo pasa a ser [upper, upper * factor]: como en el
+    intervalo anterior no había cambio de signo, la raíz (si existe) está más allá.
+
+    Args:
+        func (callable): Función `func(x, index)` que evalúa el residuo (ver `bracketed_root`).
+        lower (numpy.ndarray): Extremos inferiores de los intervalos.
+        upper (numpy.ndarray): Extremos superiores de los intervalos.
+        factor (float, optional): Factor de cada ampliación. Por defecto `BRACKET_EXPANSION_FACTOR`.
+        max_expansions (int, optional): Número máximo de ampliaciones. Por defecto
+                                        `MAX_BRACKET_EXPANSIONS`.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: Los extremos inferiores y superiores finales.
+    """
+    lower = np.asarray(lower, dtype=float).copy()
+    upper = np.asarray(upper, dtype=float).copy()
+    all_index = np.arange(lower.shape[0])
+    f_lower = func(lower, all_index)
+    f_upper = func(upper, all_index)
+    no_change = np.sign(f_lower) * np.sign(f_upper) > 0
+    for _ in range(max_expansions):
+        index = np.flatnonzero(no_change)
+        if index.size == 0:
+            break
+        new_upper = upper[index] * factor
+        f_new = func(new_upper, index)
+        lower[index], f_lower[index] = upper[index], f_upper[index]
+        upper[index], f_upper[index] = new_upper, f_new
+        no_change[index] = np.sign(f_lower[index]) * np.sign(f_new) > 0
+    return lower, upper
+
+
+def numeric_root(compiled, args: list, size: int, upper, maxiter=50, tol=1e-6,
+                 method=DEFAULT_NUMERIC_METHOD, x0=None, lower=None, expand=True) -> dict:
+    """
+    Resuelve numéricamente una ecuación compilada para `size` puntos.
+
+    Busca la raíz en [lower, upper] (por defecto [0, upper]) y, donde el residuo no
+    cambia de signo, amplía el intervalo con `expand_brackets` antes de iterar.
+
+    Args:
+        compiled (CompiledEquation): Ecuación compilada para la incógnita.
+        args (list[numpy.ndarray]): Parámetros como arreglos de longitud `size` (los comunes
+                                    a todos los puntos pueden ser vistas de un escalar).
+        size (int): Número de puntos.
+        upper (numpy.ndarray): Extremo superior inicial del intervalo de cada punto.
+        maxiter (int, optional): Iteraciones máximas. Por defecto es 50.
+        tol (float, optional): Tolerancia absoluta. Por defecto es 1e-6.
+        method (str, optional): Uno de `NUMERIC_METHODS`. Por defecto `DEFAULT_NUMERIC_METHOD`.
+        x0 (numpy.ndarray, optional): Estimación inicial por punto (solo Newton/Halley).
+        lower (numpy.ndarray, optional): Extremo inferior del intervalo. Por defecto 0.
+        expand (bool, optional): Si es False no se amplían los intervalos sin cambio de signo.
+
+    Returns:
+        dict: Diccionario con 'values' (raíces, NaN donde no hay), 'iterations',
+              'status' (ver `STATUS_MENSAJES`) y 'upper' (extremo superior final del intervalo).
+
+    Raises:
+        ValueError: Si el método no es uno de `NUMERIC_METHODS`.
+    """
+    if method not in NUMERIC_METHODS:
+        raise ValueError(f"Método numérico desconocido '{method}'. Opciones: {', '.join(NUMERIC_METHODS)}.")
+    residual = compiled.residual
+
+    def safe_residual(x, index):
+        with np.errstate(all='ignore'):
+            values = np.asarray(residual(*(_take(arg, index) for arg in args), x), dtype=float)
+        values = np.broadcast_to(values, x.shape).copy()
+        values[~np.isfinite(values)] = RESIDUAL_FALLBACK
+        return values
+
+    lower = np.zeros(size) if lower is None else np.broadcast_to(np.asarray(lower, dtype=float), (size,))
+    upper = np.broadcast_to(np.asarray(upper, dtype=float), (size,))
+    if expand:
+        lower, upper = expand_brackets(safe_residual, lower, upper)
+    if method == 'brentq' or compiled.newton_terms is None:
+        roots, iterations, converged = bracketed_root(safe_residual, lower, upper,
+                                                      xtol=tol, maxiter=maxiter)
+    else:
+        newton_terms = compiled.newton_terms
+
+        def terms(x, index):
+            with np.errstate(all='ignore'):
+                f, d1, d2 = (np.broadcast_to(np.asarray(value, dtype=float), x.shape)
+                             for value in newton_terms(*(_take(arg, index) for arg in args), x))
+            f = f.copy()
+            f[~np.isfinite(f)] = RESIDUAL_FALLBACK
+            return f, d1, d2
+
+        roots, iterations, converged = safeguarded_newton(terms, lower, upper, x0=x0, xtol=tol,
+                                                          maxiter=maxiter, halley=method == 'halley',
+                                                          func=safe_residual)
+    status = np.where(converged, STATUS_OK,
+                      np.where(iterations > 0, STATUS_NO_CONVERGE, STATUS_SIN_CAMBIO_DE_SIGNO))
+    return {'values': roots, 'iterations': iterations, 'status': status, 'upper': upper}
+
+
+def continuation_root(compiled, args: list, size: int, upper, maxiter=50, tol=1e-6,
+                      method=DEFAULT_NUMERIC_METHOD, stride=CONTINUATION_STRIDE) -> dict:
+    """
+    Resuelve numéricamente `size` puntos consecutivos de un barrido por continuación.
+
+    En un barrido, puntos vecinos tienen raíces casi iguales. Se resuelve en frío uno
+    de cada `stride` puntos (y el último); para los demás, la raíz se predice
+    interpolando las de sus vecinos resueltos (es decir, con la raíz y la pendiente
+    del tramo) y se usa como estimación inicial dentro de un intervalo estrecho a su
+    alrededor. Los puntos cuya predicción no encierra la raíz, o que no convergen,
+    se resuelven de nuevo con el intervalo completo.
+
+    Los argumentos y el resultado son los de `numeric_root`; el orden de los puntos
+    debe ser el del barrido.
+    """
+    if size < CONTINUATION_MIN_POINTS or stride < 2:
+        return numeric_root(compiled, args, size, upper, maxiter=maxiter, tol=tol, method=method)
+    upper = np.broadcast_to(np.asarray(upper, dtype=float), (size,))
+
+    # 1. Puntos semilla, resueltos en frío
+    seeds = np.unique(np.append(np.arange(0, size, stride), size - 1))
+    seed_solution = numeric_root(compiled, [_take(arg, seeds) for arg in args], seeds.size, upper[seeds],
+                                 maxiter=maxiter, tol=tol, method=method)
+    values = np.full(size, np.nan)
+    iterations = np.zeros(size, dtype=int)
+    status = np.full(size, STATUS_NO_CONVERGE)
+    final_upper = upper.copy()
+    values[seeds] = seed_solution['values']
+    iterations[seeds] = seed_solution['iterations']
+    status[seeds] = seed_solution['status']
+    final_upper[seeds] = seed_solution['upper']
+
+    # 2. Predicción a partir de las semillas vecinas e intervalo estrecho alrededor
+    rest = np.setdiff1d(np.arange(size), seeds, assume_unique=True)
+    right = np.searchsorted(seeds, rest)
+    left_root, right_root = values[seeds[right - 1]], values[seeds[right]]
+    weight = (rest - seeds[right - 1]) / (seeds[right] - seeds[right - 1])
+    x0 = left_root + weight * (right_root - left_root)
+    half_width = 2 * np.abs(right_root - left_root) + 1e-3 * np.abs(x0) + 10 * tol
+    predicted = np.isfinite(x0)
+    index = rest[predicted]
+    if index.size:
+        narrow = numeric_root(compiled, [_take(arg, index) for arg in args], index.size,
+                              x0[predicted] + half_width[predicted], maxiter=maxiter, tol=tol,
+                              method=method, x0=x0[predicted],
+                              lower=np.maximum(x0[predicted] - half_width[predicted], 0), expand=False)
+        values[index] = narrow['values']
+        iterations[index] = narrow['iterations']
+        status[index] = narrow['status']
+
+    # 3. Respaldo con el intervalo completo donde la continuación no funcionó
+    retry = rest[status[rest] != STATUS_OK]
+    if retry.size:
+        x0_retry = np.full(size, np.nan)
+        x0_retry[rest] = x0
+        full = numeric_root(compiled, [_take(arg, retry) for arg in args], retry.size, upper[retry],
+                            maxiter=maxiter, tol=tol, method=method, x0=x0_retry[retry])
+        values[retry] = full['values']
+        iterations[retry] += full['iterations']
+        status[retry] = full['status']
+        final_upper[retry] = full['upper']
+    return {'values': values, 'iterations': iterations, 'status': status, 'upper': final_upper}
+
+
+def convection_regime_index(known_values_for_h: dict, flow_type: str, orientation: str, size: int):
+    """
+    Elige, para cada punto, la correlación de convección cuyas restricciones se cumplen.
+
+    Las correlaciones de `CONVECTION_REGIMES` se prueban en orden y cada punto se queda
+    con la primera cuyas restricciones (compiladas una sola vez como predicados NumPy)
+    se cumplen; las restricciones con variables ausentes se ignoran, como en
+    `check_restrictions`.
+
+    Args:
+        known_values_for_h (dict): Valores conocidos (escalares o arreglos de longitud `size`).
+        flow_type (str): Tipo de flujo, "interior" o "exterior".
+        orientation (str): Orientación, "vertical" u "horizontal".
+        size (int): Número de puntos.
+
+    Returns:
+        numpy.ndarray: Índice en `CONVECTION_REGIMES` por punto (-1 si ninguna correlación
+                       es aplicable).
+    """
+    regime_index = np.full(size, -1)
+    pending = np.ones(size, dtype=bool)
+    for index, regime in enumerate(CONVECTION_REGIMES):
+        eq_data = EQUATIONS.get(f"conv_{flow_type}_{orientation}_{regime}")
+        if not isinstance(eq_data, dict) or "latex" not in eq_data or "restricciones" not in eq_data:
+            continue
+        mask = pending.copy()
+        for restriction in eq_data["restricciones"]:
+            try:
+                result = get_compiled_restriction(restriction).evaluate(known_values_for_h)
+            except Exception:
+                result = np.zeros(size, dtype=bool)
+            if result is not None:
+                mask &= np.broadcast_to(result, (size,))
+        regime_index[mask] = index
+        pending &= ~mask
+    return regime_index
+
+
+def convection_coefficient_array(known_values_for_h: dict, flow_type: str, orientation: str, size: int):
+    """
+    Calcula el coeficiente de convección 'h' para `size` puntos a la vez.
+
+    Equivale a llamar `calculate_convection_coefficient` punto por punto: la
+    correlación de cada punto se elige con `convection_regime_index` y cada grupo de
+    puntos se resuelve con la forma cerrada de su correlación.
+
+    Args:
+        known_values_for_h (dict): Valores conocidos (escalares o arreglos de longitud `size`).
+        flow_type (str): Tipo de flujo, "interior" o "exterior".
+        orientation (str): Orientación, "vertical" u "horizontal".
+        size (int): Número de puntos.
+
+    Returns:
+        numpy.ndarray: Valores de 'h' (NaN donde ninguna correlación es aplicable o
+                       la correlación elegida no tiene solución real).
+    """
+    known_values = {k: v for k, v in known_values_for_h.items() if k != 'h'}
+    h_values = np.full(size, np.nan)
+    with phase('h'):
+        regime_index = convection_regime_index(known_values, flow_type, orientation, size)
+        for index, regime in enumerate(CONVECTION_REGIMES):
+            mask = regime_index == index
+            if not mask.any():
+                continue
+            try:
+                compiled = get_compiled_equation(f"conv_{flow_type}_{orientation}_{regime}", "h")
+                args = [arg[mask] for arg in _parameter_arrays(compiled, known_values, size)]
+                h_values[mask] = _select_closed_form(compiled, args, int(mask.sum()))
+            except ValueError:
+                continue
+    return h_values
+
+
+def solve_equation_array(equation: str, known_values: dict, variable_to_solve: str, size: int,
+                         maxiter=50, tol=1e-6, method=DEFAULT_NUMERIC_METHOD, x0=None,
+                         continuation=False):
+    """
+    Resuelve una ecuación para `size` puntos a la vez.
+
+    Usa la forma cerrada de la ecuación compilada cuando existe y la ecuación no es
+    solo numérica; en otro caso aplica `numeric_root` sobre el residuo en el
+    intervalo [0, r*10] de cada punto (ampliado si no contiene la raíz), igual que
+    `solve_equation`.
+
+    Args:
+        equation (str): Clave del catálogo `EQUATIONS` o ecuación en formato Python/SymPy.
+        known_values (dict): Valores conocidos (escalares o arreglos de longitud `size`).
+        variable_to_solve (str): Nombre de la incógnita.
+        size (int): Número de puntos.
+        maxiter (int, optional): Iteraciones máximas del método numérico. Por defecto es 50.
+        tol (float, optional): Tolerancia absoluta del método numérico. Por defecto es 1e-6.
+        method (str, optional): Método numérico, uno de `NUMERIC_METHODS`. Por defecto 'halley'.
+        x0 (numpy.ndarray, optional): Estimación inicial por punto para Newton/Halley.
+        continuation (bool, optional): Si es True, los puntos son un barrido ordenado y se
+                                       resuelven por continuación (`continuation_root`).
+                                       Se ignora si se indica `x0`. Por defecto es False.
+
+    Returns:
+        dict: Diccionario con:
+            - 'values': Valores de la incógnita (NaN donde no hay solución).
+            - 'iterations': Iteraciones del método numérico por punto (0 con solución cerrada).
+            - 'status': Estado por punto (`STATUS_OK` o uno de los códigos de `STATUS_MENSAJES`).
+            - 'numeric': True si se usó el método numérico, False si se usó la forma cerrada.
+
+    Raises:
+        ValueError: Si la ecuación no puede compilarse para la incógnita o faltan
+                    valores conocidos (errores comunes a todos los puntos).
+    """
+    known_values = {k: v for k, v in known_values.items() if k != variable_to_solve}
+    compiled = get_compiled_equation(equation, variable_to_solve)
+    if 'r' in compiled.params and known_values.get('r') is None and known_values.get('diametro') is not None:
+        known_values['r'] = np.asarray(known_values['diametro'], dtype=float) / 2
+    args = _parameter_arrays(compiled, known_values, size)
+    invalid = np.zeros(size, dtype=bool)
+    for arg in args:
+        invalid |= ~np.isfinite(arg)
+
+    if compiled.solutions:
+        with phase('closed_form'):
+            values = _select_closed_form(compiled, args, size)
+        status = np.where(np.isnan(values), STATUS_SIN_SOLUCION_REAL, STATUS_OK)
+        status[invalid] = STATUS_DATOS_INVALIDOS
+        return {
+            'values': values,
+            'iterations': np.zeros(size, dtype=int),
+            'status': status,
+            'numeric': False,
+        }
+
+    r_value = np.broadcast_to(np.asarray(known_values.get('r', 0.01), dtype=float), (size,))
+    with phase('numeric'):
+        if continuation and x0 is None:
+            solution = continuation_root(compiled, args, size, r_value * 10, maxiter=maxiter, tol=tol,
+                                         method=method)
+        else:
+            solution = numeric_root(compiled, args, size, r_value * 10, maxiter=maxiter, tol=tol,
+                                    method=method, x0=x0)
+    status = solution['status']
+    status[invalid] = STATUS_DATOS_INVALIDOS
+    return {
+        'values': solution['values'],
+        'iterations': solution['iterations'],
+        'status': status,
+        'numeric': True,
+    }
+
+
+def solve_espesor_points(equation_key: str, point_values: dict, size: int, known_values: dict,
+                         flow_type: str = None, orientation: str = None, continuation: bool = False,
+                         use_lookup: bool = True) -> dict:
+    """
+    Calcula el espesor 'e' (y 'h' cuando corresponde) en `size` puntos a la vez.
+
+    Reproduce la lógica de `/plot_espesor`: en las ecuaciones de óptimo económico 'h' se
+    calcula en cada punto con las correlaciones de convección (salvo que 'h' sea una de
+    las variables que cambian por punto), y luego se despeja 'e' para todos los puntos.
+    Si hay tablas precalculadas (ver `services.lookup`), los puntos que caen en ellas
+    se interpolan y solo el resto se resuelve.
+
+    Args:
+        equation_key (str): Clave de la ecuación en `EQUATIONS`.
+        point_values (dict): Variables que cambian por punto, como arreglos de longitud `size`.
+        size (int): Número de puntos.
+        known_values (dict): Valores conocidos para las demás variables.
+        flow_type (str, optional): Tipo de flujo, necesario para calcular 'h'.
+        orientation (str, optional): Orientación, necesaria para calcular 'h'.
+        continuation (bool, optional): True si los puntos forman un barrido ordenado y
+                                       pueden resolverse por continuación. Por defecto es False.
+        use_lookup (bool, optional): False para resolver siempre con el método exacto
+                                     (por ejemplo, al construir las tablas). Por defecto es True.
+
+    Returns:
+        dict: Diccionario con los arreglos 'e', 'h' (NaN donde no hay valor) e
+              'iterations', además de 'h_calculado' (bool) que indica si 'h' aplica.
+    """
+    current_known_values = dict(known_values)
+    current_known_values.update(point_values)
+
+    if use_lookup and equation_key.startswith('optimo_economico') and 'h' not in point_values \
+            and flow_type and orientation:
+        lookup = lookup_espesor(equation_key, current_known_values, size, flow_type, orientation)
+        if lookup is not None:
+            return _merge_lookup(equation_key, point_values, size, known_values, flow_type, orientation,
+                                 continuation, lookup)
+
+    h_values = np.full(size, np.nan)
+    h_calculado = False
+    if equation_key.startswith('optimo_economico') and 'h' not in point_values:
+        if flow_type and orientation:
+            h_calculado = True
+            h_values = convection_coefficient_array(current_known_values, flow_type, orientation, size)
+            current_known_values['h'] = h_values
+    elif 'h' in point_values:
+        h_calculado = True
+        h_values = np.broadcast_to(np.asarray(point_values['h'], dtype=float), (size,))
+
+    try:
+        solution = solve_equation_array(equation_key, current_known_values, 'e', size,
+                                        continuation=continuation)
+        e_values, iterations = solution['values'], solution['iterations']
+    except ValueError:
+        e_values, iterations = np.full(size, np.nan), np.zeros(size, dtype=int)
+
+    return {
+        'e': e_values,
+        'h': h_values,
+        'iterations': iterations,
+        'h_calculado': h_calculado,
+    }
+
+
+def _merge_lookup(equation_key: str, point_values: dict, size: int, known_values: dict,
+                  flow_type: str, orientation: str, continuation: bool, lookup: dict) -> dict:
+    """Completa con el método exacto los puntos que las tablas precalculadas no respondieron."""
+    e_values, h_values = lookup['e'], lookup['h']
+    iterations = np.zeros(size, dtype=int)
+    pending = np.flatnonzero(~lookup['served'])
+    if pending.size:
+        pending_values = {
+            name: np.broadcast_to(np.asarray(values, dtype=float), (size,))[pending]
+            for name, values in point_values.items()
+        }
+        exact = solve_espesor_points(equation_key, pending_values, pending.size, known_values, flow_type,
+                                     orientation, continuation, use_lookup=False)
+        e_values[pending] = exact['e']
+        h_values[pending] = exact['h']
+        iterations[pending] = exact['iterations']
+    return {
+        'e': e_values,
+        'h': h_values,
+        'iterations': iterations,
+        'h_calculado': True,
+    }
+
+
+def sweep_espesor(equation_key: str, variable: str, x_values, known_values: dict,
+                  flow_type: str = None, orientation: str = None) -> dict:
+    """
+    Calcula el espesor 'e' (y 'h' cuando corresponde) para todos los valores de una variable.
+
+    Los puntos se resuelven por continuación (ver `continuation_root`): cada punto parte
+    de la solución de sus vecinos, por lo que conviene que `x_values` esté ordenado.
+
+    Args:
+        equation_key (str): Clave de la ecuación en `EQUATIONS`.
+        variable (str): Variable que se barre.
+        x_values (numpy.ndarray): Valores de la variable barrida.
+        known_values (dict): Valores conocidos para las demás variables.
+        flow_type (str, optional): Tipo de flujo, necesario para calcular 'h'.
+        orientation (str, optional): Orientación, necesaria para calcular 'h'.
+
+    Returns:
+        dict: Diccionario con los arreglos 'x', 'e', 'h' (NaN donde no hay valor) y
+              'iterations', además de 'h_calculado' (bool) que indica si 'h' aplica.
+    """
+    x_values = np.asarray(x_values, dtype=float)
+    result = solve_espesor_points(equation_key, {variable: x_values}, x_values.shape[0],
+                                  known_values, flow_type, orientation, continuation=True)
+    result['x'] = x_values
+    return result
+
+
+def range_size(min_val: float, max_val: float, step_val: float) -> int:
+    """
+    Número de puntos de `np.arange(min_val, max_val + step_val, step_val)`, sin crearlo.
+
+    Args:
+        min_val (float): Primer valor del rango.
+        max_val (float): Último valor del rango (incluido).
+        step_val (float): Paso, positivo.
+
+    Returns:
+        int: Número de puntos (0 si el rango está vacío).
+    """
+    return max(int(np.ceil((max_val + step_val - min_val) / step_val)), 0)
+
+
+def iter_sweep_espesor(equation_key: str, variable: str, min_val: float, step_val: float, size: int,
+                       known_values: dict, flow_type: str = None, orientation: str = None,
+                       first_chunk: int = STREAM_FIRST_CHUNK, max_chunk: int = STREAM_MAX_CHUNK):
+    """
+    Calcula un barrido como `sweep_espesor`, entregando los puntos por bloques.
+
+    El primer bloque es pequeño para que el primer resultado llegue cuanto antes; los
+    siguientes duplican su tamaño hasta `max_chunk`. Los valores de la variable se
+    generan bloque a bloque, iguales a los de `np.arange(min_val, max_val + step_val,
+    step_val)`, de modo que la memoria no crece con el número de puntos.
+
+    Args:
+        equation_key (str): Clave de la ecuación en `EQUATIONS`.
+        variable (str): Variable que se barre.
+        min_val (float): Primer valor de la variable.
+        step_val (float): Paso entre valores consecutivos.
+        size (int): Número de puntos (ver `range_size`).
+        known_values (dict): Valores conocidos para las demás variables.
+        flow_type (str, optional): Tipo de flujo, necesario para calcular 'h'.
+        orientation (str, optional): Orientación, necesaria para calcular 'h'.
+        first_chunk (int, optional): Puntos del primer bloque. Por defecto `STREAM_FIRST_CHUNK`.
+        max_chunk (int, optional): Puntos máximos por bloque. Por defecto `STREAM_MAX_CHUNK`.
+
+    Yields:
+        dict: El resultado de `sweep_espesor` para los puntos del bloque, con 'start'
+              (índice del primer punto del bloque).
+    """
+    # np.arange calcula el punto i como min_val + i * ((min_val + step_val) - min_val)
+    delta = (min_val + step_val) - min_val
+    start, chunk = 0, max(first_chunk, 1)
+    while start < size:
+        stop = min(start + chunk, size)
+        x_values = min_val + np.arange(start, stop) * delta
+        result = solve_espesor_points(equation_key, {variable: x_values}, x_values.shape[0],
+                                      known_values, flow_type, orientation, continuation=True)
+        result['x'] = x_values
+        result['start'] = start
+        yield result
+        start, chunk = stop, min(chunk * 2, max_chunk)
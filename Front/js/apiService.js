@@ -1,6 +1,6 @@
 /**
  * @file apiService.js
- * @summary Define la URL base para las llamadas a la API.
+ * @summary Define la URL base para las llamadas a la API y la lectura de respuestas en streaming.
  * Este módulo centraliza la configuración del endpoint de la API, permitiendo
  * que sea fácilmente configurable según el entorno de despliegue.
  */
@@ -15,5 +15,57 @@
  */
 const API_BASE = window.API_BASE || '/';
 
-// Podríamos añadir aquí funciones genéricas para hacer fetch, si se repiten mucho.
-// Por ahora, solo la constante API_BASE.
+/**
+ * Tipo MIME de las respuestas en streaming con una línea JSON por evento (NDJSON).
+ * @const {string}
+ */
+const NDJSON_MIMETYPE = 'application/x-ndjson';
+
+/**
+ * Realiza una solicitud que pide la respuesta en streaming (NDJSON) y entrega cada
+ * evento a `onEvent` en cuanto llega, sin esperar a que termine la respuesta.
+ * Si el servidor responde con JSON normal (por ejemplo, una versión sin streaming),
+ * devuelve ese objeto completo.
+ * @async
+ * @param {string} url - URL de la solicitud.
+ * @param {RequestInit} options - Opciones de `fetch`; se añade la cabecera `Accept`.
+ * @param {function(object): void} onEvent - Recibe cada evento (`{event: ..., ...}`).
+ * @returns {Promise<object|null>} El cuerpo JSON si la respuesta no fue en streaming; null en caso contrario.
+ * @throws {Error} Si la respuesta no es correcta o llega un evento 'error'.
+ */
+async function fetchNdjson(url, options, onEvent) {
+    const response = await fetch(url, {
+        ...options,
+        headers: { ...(options.headers || {}), 'Accept': NDJSON_MIMETYPE }
+    });
+    if (!response.ok) {
+        const errorData = await response.json().catch(() => ({ error: 'Error desconocido del servidor.' }));
+        throw new Error(errorData.error || `Error ${response.status}`);
+    }
+    const contentType = response.headers.get('Content-Type') || '';
+    if (!contentType.startsWith(NDJSON_MIMETYPE) || !response.body) {
+        return await response.json();
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    const handleLine = (line) => {
+        if (!line.trim()) return;
+        const event = JSON.parse(line);
+        if (event.event === 'error') {
+            throw new Error(event.error || 'Error del servidor durante el streaming.');
+        }
+        onEvent(event);
+    };
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop(); // La última línea puede estar incompleta
+        lines.forEach(handleLine);
+    }
+    handleLine(buffer + decoder.decode());
+    return null;
+}
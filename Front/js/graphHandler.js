@@ -14,6 +14,8 @@ const PRECISION_ESPESOR = 4; // Para el eje Y principal (espesor óptimo)
 const PRECISION_H = 4;       // Para el coeficiente de convección
 const PRECISION_RC = 4;      // Para el espesor crítico
 
+const MAX_PUNTOS_GRAFICA = 100000; // Igual que el límite del backend en /plot_espesor
+
 /**
  * Instancia del gráfico Chart.js para mostrar el espesor.
  * @type {import('chart.js').Chart | null}
@@ -25,6 +27,59 @@ let chartEspesor = null;
  */
 let currentGraphData = null;
 
+/**
+ * Crea una gráfica provisional con la serie de espesor vacía, que se completa a medida
+ * que llegan los bloques de puntos del backend. Al terminar, la gráfica definitiva
+ * (con la serie secundaria y sus ejes) la reemplaza.
+ * @param {HTMLCanvasElement} canvas - Lienzo de la gráfica.
+ * @param {string} variable - Variable del eje X.
+ * @returns {{append: function(number[], Array<number|null>): void}} Objeto para añadir puntos.
+ */
+function startPreviewChart(canvas, variable) {
+    if (chartEspesor) {
+        chartEspesor.destroy();
+    }
+    const points = [];
+    chartEspesor = new Chart(canvas, {
+        type: 'line',
+        data: {
+            datasets: [{
+                label: `Espesor (m) vs ${leyendas[variable] || variable}`,
+                data: points,
+                borderColor: PRIMARY_DATASET_COLOR,
+                backgroundColor: PRIMARY_DATASET_BG_COLOR,
+                fill: true,
+                tension: 0.1,
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            animation: false,
+            parsing: false,
+            scales: {
+                x: { type: 'linear', title: { display: true, text: leyendas[variable] || variable } },
+                y: { type: 'linear', title: { display: true, text: 'Espesor (m)' } }
+            }
+        }
+    });
+    const chart = chartEspesor;
+    let updatePending = false;
+    return {
+        append(xs, ys) {
+            xs.forEach((x, index) => points.push({ x, y: ys[index] }));
+            // Como máximo un redibujado por cuadro, aunque lleguen varios bloques
+            if (!updatePending) {
+                updatePending = true;
+                requestAnimationFrame(() => {
+                    updatePending = false;
+                    if (chartEspesor === chart) chart.update('none');
+                });
+            }
+        }
+    };
+}
+
 /**
  * Calcula el valor mínimo y máximo de Y a través de múltiples datasets.
  * @param {Array<object>} datasets - Array de datasets de Chart.js (ej. [{ data: [{x,y},...] }, ...]).
@@ -238,10 +293,10 @@ function initGraphHandler() {
             return;
         }
 
-        // Validación de máximo de iteraciones (solo frontend)
+        // Validación de máximo de puntos (el backend resuelve el barrido de forma vectorizada)
         const numIteraciones = Math.floor((max_val - min_val) / step_val) + 1;
-        if (numIteraciones > 500) {
-            resultadoGrafica.textContent = `El número de iteraciones (${numIteraciones}) supera el máximo permitido (500). Ajusta el rango o el paso.`;
+        if (numIteraciones > MAX_PUNTOS_GRAFICA) {
+            resultadoGrafica.textContent = `El número de iteraciones (${numIteraciones}) supera el máximo permitido (${MAX_PUNTOS_GRAFICA}). Ajusta el rango o el paso.`;
             resultadoGrafica.classList.add('text-red-600');
             graficarBtn.disabled = false;
             graficarBtn.textContent = originalGraphButtonText;
@@ -255,7 +310,16 @@ function initGraphHandler() {
              * Respuesta de la API para la solicitud de datos de la gráfica.
              * @type {Response}
              */
-            const response = await fetch(`${API_BASE}plot_espesor`, {
+            /**
+             * Datos de la gráfica, que se van completando con cada bloque recibido.
+             * @type {{x: number[], y: number[], h_vals?: number[], rc_vals?: number[], error?: string}}
+             */
+            const streamedData = { x: [], y: [], h_vals: [] };
+            const preview = startPreviewChart(canvasGrafica, variableSeleccionada);
+            let totalPuntos = 0;
+
+            // Los puntos llegan por bloques (NDJSON) y se dibujan a medida que se calculan
+            const fullResponse = await fetchNdjson(`${API_BASE}plot_espesor`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({
@@ -268,21 +332,20 @@ function initGraphHandler() {
                     flow_type: ambiente,
                     orientation: orientacion
                 })
+            }, (event) => {
+                if (event.event === 'start') {
+                    totalPuntos = event.total;
+                } else if (event.event === 'points') {
+                    streamedData.x.push(...event.x);
+                    streamedData.y.push(...event.y);
+                    streamedData.h_vals.push(...event.h_vals);
+                    preview.append(event.x, event.y);
+                    resultadoGrafica.textContent = `Graficando... ${streamedData.x.length} de ${totalPuntos} puntos.`;
+                } else if (event.event === 'end') {
+                    streamedData.iterations = event.iterations;
+                }
             });
-
-            if (!response.ok) {
-                /**
-                 * Datos del error en formato JSON si la respuesta no es OK.
-                 * @type {{error: string}}
-                 */
-                const errorData = await response.json().catch(() => ({ error: 'Error desconocido del servidor al graficar.' }));
-                throw new Error(errorData.error || `Error ${response.status}`);
-            }
-            /**
-             * Datos de la gráfica obtenidos de la API.
-             * @type {{x: number[], y: number[], h_vals?: number[], rc_vals?: number[], error?: string}}
-             */
-            const data = await response.json();
+            const data = fullResponse || streamedData;
             currentGraphData = data; // Almacenar datos para uso posterior
 
             if (data.error) {
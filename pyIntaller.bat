@@ -1,4 +1,9 @@
 @echo off
+echo Generando los kernels NumPy del catalogo de ecuaciones...
+pushd "BackAPI\src"
+python -m services.kernel_codegen || (popd & exit /b 1)
+popd
+
 echo Iniciando el proceso de empaquetado con PyInstaller...
 
 pyinstaller --name CalculadoraEspesores --onefile ^
@@ -8,6 +13,10 @@ pyinstaller --name CalculadoraEspesores --onefile ^
   --add-data "BackAPI/src/services;services" ^
   --add-data ".env;." ^
   --paths "BackAPI/src" ^
+  --hidden-import services.equation_kernels ^
+  --exclude-module pydantic ^
+  --exclude-module marshmallow ^
+  --exclude-module scipy ^
   "BackAPI/src/main.py"
 
 echo.